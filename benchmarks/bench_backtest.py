@@ -0,0 +1,51 @@
+"""Backtest throughput on the bundled data/ CSVs, in symbol-years per second.
+
+Run from the project root:
+    python -m benchmarks.bench_backtest --repeat 200 --workers 4
+"""
+import argparse
+import os
+import time
+
+from stock.backtest import BARS_PER_YEAR, backtest_universe
+from stock.data.csv_provider import load_symbol_csv
+from stock.utils import discover_symbols
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark stock.backtest on the bundled CSVs")
+    parser.add_argument("--data-dir", default="data", help="CSV directory (default: data)")
+    parser.add_argument("--repeat", type=int, default=100, help="Copies of each CSV series in the universe (default: 100)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (default: CPU count)")
+    parser.add_argument("--fast", type=int, default=20)
+    parser.add_argument("--slow", type=int, default=50)
+    args = parser.parse_args()
+
+    series = {}
+    for sym in discover_symbols(args.data_dir):
+        ts = load_symbol_csv(sym, args.data_dir)
+        if ts:
+            series[sym] = ts
+    if not series:
+        print(f"No CSVs found in {args.data_dir}")
+        return
+
+    # Replicate the bundled series so the run is long enough to time
+    universe = [f"{sym}#{i}" for i in range(max(1, args.repeat)) for sym in series]
+
+    def loader(key: str):
+        return series[key.split("#", 1)[0]]
+
+    symbol_years = sum(len(series[k.split("#", 1)[0]]) for k in universe) / BARS_PER_YEAR
+    for workers in sorted({1, max(1, args.workers)}):
+        t0 = time.perf_counter()
+        results = backtest_universe(universe, loader, fast=args.fast, slow=args.slow, workers=workers)
+        elapsed = time.perf_counter() - t0
+        print(
+            f"workers={workers}\tsymbols={len(results)}\tsymbol_years={symbol_years:.1f}"
+            f"\tseconds={elapsed:.3f}\tsymbol_years_per_sec={symbol_years / elapsed:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
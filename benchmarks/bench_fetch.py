@@ -0,0 +1,81 @@
+"""Fetch throughput against the local mock market-data server, in symbols per second.
+
+Starts stock.data.mock_server in-process on a free port (no network, no quota)
+and loads the bundled CSV symbols through the real provider code. Run from the
+project root:
+    python -m benchmarks.bench_fetch --source yahoo --repeat 50 --threads 1,4,16 --latency-ms 40
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from stock.data import alpha_vantage, yahoo
+from stock.data.mock_server import MockMarket, start_in_thread
+from stock.data.resilience import FetchError
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark provider fetches against stock.data.mock_server")
+    parser.add_argument("--data-dir", default="data", help="CSV directory served by the mock (default: data)")
+    parser.add_argument("--source", choices=["yahoo", "alphavantage"], default="yahoo")
+    parser.add_argument("--repeat", type=int, default=20, help="Fetches of each symbol per run (default: 20)")
+    parser.add_argument("--threads", default="1,4,16", help="Comma-separated thread counts to try (default: 1,4,16)")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Mock latency per request (default: 20)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=0, help="Mock requests per --rate-window (0 = unlimited)")
+    parser.add_argument("--rate-window", type=float, default=60.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    market = MockMarket.from_data_dir(
+        args.data_dir,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_limit=args.rate_limit,
+        rate_window=args.rate_window,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    if not market.series:
+        print(f"No CSVs found in {args.data_dir}")
+        return
+    server, base_url = start_in_thread(market)
+    yahoo.set_base_url(base_url)
+    alpha_vantage.set_base_url(base_url)
+
+    if args.source == "yahoo":
+        def load(sym: str):
+            return yahoo.load_symbol_yahoo(sym, range_="max")
+    else:
+        def load(sym: str):
+            return alpha_vantage.load_symbol_alphavantage(sym, api_key="mock")
+
+    def fetch(sym: str):
+        try:
+            return load(sym)
+        except FetchError:
+            return None
+
+    universe = [sym for _ in range(max(1, args.repeat)) for sym in market.series]
+    try:
+        for threads in [int(t) for t in args.threads.split(",") if t.strip()]:
+            before = dict(market.stats)
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=max(1, threads)) as pool:
+                loaded = sum(1 for ts in pool.map(fetch, universe) if ts)
+            elapsed = time.perf_counter() - t0
+            requests = market.stats["requests"] - before["requests"]
+            limited = market.stats["rate_limited"] - before["rate_limited"]
+            errors = market.stats["errors"] - before["errors"]
+            print(
+                f"threads={threads}\tsymbols={len(universe)}\tloaded={loaded}\trequests={requests}"
+                f"\trate_limited={limited}\terrors={errors}\tseconds={elapsed:.3f}\tsymbols_per_sec={len(universe) / elapsed:.1f}"
+            )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
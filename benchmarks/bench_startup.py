@@ -0,0 +1,83 @@
+"""Startup time of the entry points, measured in fresh interpreters.
+
+Each case is run --repeat times as a subprocess and the median wall time is
+reported. --audit prints the slowest imports (python -X importtime) behind each
+entry point, to spot modules that should be imported lazily. Run from the
+project root:
+    python -m benchmarks.bench_startup --repeat 10 --audit
+"""
+import argparse
+import importlib.util
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+
+def _cases(cache_dir: str) -> Dict[str, List[str]]:
+    py = sys.executable
+    cases = {
+        "import stock.cli": [py, "-c", "import stock.cli"],
+        "main.py --help": [py, "main.py", "--help"],
+        "main.py cache stats": [py, "main.py", "cache", "stats", "--cache-dir", cache_dir],
+        "scan csv (data/)": [py, "main.py", "--data-dir", "data", "--top", "1"],
+    }
+    if importlib.util.find_spec("fastapi") is not None:
+        cases["import stock.web.server"] = [py, "-c", "import stock.web.server"]
+    return cases
+
+
+def _time(cmd: List[str], repeat: int) -> Tuple[float, float]:
+    runs = []
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        runs.append(time.perf_counter() - t0)
+    return statistics.median(runs), min(runs)
+
+
+def audit(module: str, top: int = 15) -> List[Tuple[int, int, str]]:
+    """(self_us, cumulative_us, name) for the slowest imports behind `import module`."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=False)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            rows.append((int(parts[0]), int(parts[1]), parts[2].rstrip()))
+        except ValueError:
+            continue  # header line
+        if rows[-1][2].strip() == "site":
+            # Interpreter startup (site and .pth files) is reported first; not ours to fix
+            rows = []
+    rows.sort(key=lambda r: r[1], reverse=True)
+    return rows[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark interpreter startup for the CLI and web entry points")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case; the median is reported (default: 5)")
+    parser.add_argument("--audit", action="store_true", help="Also list the slowest imports behind each entry point")
+    parser.add_argument("--top", type=int, default=15, help="Rows per --audit table (default: 15)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for name, cmd in _cases(cache_dir).items():
+            median, best = _time(cmd, args.repeat)
+            print(f"{name}\tmedian_ms={median * 1000:.1f}\tmin_ms={best * 1000:.1f}")
+
+    if args.audit:
+        modules = ["stock.cli", "stock.recommend"]
+        if importlib.util.find_spec("fastapi") is not None:
+            modules.append("stock.web.server")
+        for module in modules:
+            print(f"\n{module}: slowest imports (cumulative ms, self ms)")
+            for self_us, cum_us, name in audit(module, args.top):
+                print(f"  {cum_us / 1000:8.1f}  {self_us / 1000:8.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Stage-by-stage timings of the analysis pipeline on a synthetic universe.
+
+Run from the project root:
+    python -m benchmarks.run --symbols 100 --years 1 --output bench.json
+    python -m benchmarks.run --symbols 1000 --years 10 --baseline benchmarks/baseline.json
+    python -m benchmarks.run --symbols 100 --years 1 --interval 5m   # ~78x the daily bar count
+
+Sizes from 100 to 10,000 symbols and 1 to 30 years are supported. Results are
+JSON ({"config": ..., "stages": {name: {"seconds", "per_symbol_us", ...}}}).
+With --baseline, per-symbol time of every stage is compared to the stored run
+and the exit status is 1 when any stage is slower than --tolerance allows.
+--save-baseline writes the current run as the new baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from stock import indicators
+from stock.data.cache import make_cached_loader
+from stock.data.csv_provider import load_symbol_csv
+from stock.data.timeseries import check_interval
+from stock.recommend import _score, _sparkline_svg, analyze_and_rank_with_loader
+from stock.strategy.sma_crossover import evaluate_symbol
+
+from .synthetic import generate_universe, write_csv_universe
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def _time_stage(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run_benchmarks(n_symbols: int, years: int, fast: int = 50, slow: int = 200, repeat: int = 3, seed: int = 42, stages: Optional[List[str]] = None, interval: str = "1d") -> Dict:
+    universe = generate_universe(n_symbols, years, seed=seed, interval=interval)
+    symbols = list(universe)
+    bars = sum(len(ts) for ts in universe.values())
+    workdir = tempfile.mkdtemp(prefix="stock-bench-")
+    try:
+        data_dir = os.path.join(workdir, "data")
+        write_csv_universe(universe, data_dir)
+
+        # Warm a cache directory so the decode stage only reads and decodes
+        cached = make_cached_loader(lambda s: universe.get(s), source="bench", cache_dir=os.path.join(workdir, "cache"), ttl_hours=24, throttle_ms=0, interval=interval)
+        for sym in symbols:
+            cached(sym)
+
+        feats = {sym: evaluate_symbol(ts, fast=fast, slow=slow) for sym, ts in universe.items()}
+        closes = {sym: ts["close"] for sym, ts in universe.items()}
+
+        plan = {
+            "csv_load": lambda: [load_symbol_csv(s, data_dir, interval=interval) for s in symbols],
+            "cache_decode": lambda: [cached(s) for s in symbols],
+            "sma": lambda: [indicators.sma(c, fast) for c in closes.values()],
+            "ema": lambda: [indicators.ema(c, fast) for c in closes.values()],
+            "rsi": lambda: [indicators.rsi(c, 14) for c in closes.values()],
+            "macd": lambda: [indicators.macd(c) for c in closes.values()],
+            "evaluate_symbol": lambda: [evaluate_symbol(ts, fast=fast, slow=slow) for ts in universe.values()],
+            "score": lambda: [_score(f) for f in feats.values()],
+            "sparkline_svg": lambda: [_sparkline_svg(closes[s], f["sma_fast"], f["sma_slow"]) for s, f in feats.items()],
+            "analyze_and_rank": lambda: analyze_and_rank_with_loader(symbols, universe.get, fast=fast, slow=slow, include_chart=True),
+        }
+        results: Dict[str, Dict] = {}
+        for name, fn in plan.items():
+            if stages and name not in stages:
+                continue
+            secs = _time_stage(fn, repeat)
+            results[name] = {
+                "seconds": secs,
+                "per_symbol_us": secs / max(1, n_symbols) * 1e6,
+                "bars_per_sec": bars / secs if secs > 0 else None,
+            }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "config": {"symbols": n_symbols, "years": years, "interval": interval, "bars": bars, "fast": fast, "slow": slow, "repeat": repeat, "seed": seed},
+        "env": {"python": sys.version.split()[0], "platform": platform.platform()},
+        "stages": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Return a list of regression messages (per-symbol time above baseline * (1 + tolerance))."""
+    regressions: List[str] = []
+    for name, cur in current.get("stages", {}).items():
+        base = baseline.get("stages", {}).get(name)
+        if not base or not base.get("per_symbol_us"):
+            continue
+        ratio = cur["per_symbol_us"] / base["per_symbol_us"]
+        if ratio > 1.0 + tolerance:
+            regressions.append(f"{name}: {cur['per_symbol_us']:.1f}us vs {base['per_symbol_us']:.1f}us per symbol (x{ratio:.2f})")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the stock analysis pipeline stage by stage")
+    parser.add_argument("--symbols", type=int, default=100, help="Synthetic universe size, 100-10000 (default: 100)")
+    parser.add_argument("--years", type=int, default=1, help="Years of daily bars per symbol, 1-30 (default: 1)")
+    parser.add_argument("--interval", default="1d", help="Bar size of the synthetic series, e.g. 5m or 1m for intraday-sized inputs (default: 1d)")
+    parser.add_argument("--fast", type=int, default=50)
+    parser.add_argument("--slow", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per stage; the best time is kept (default: 3)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--stages", default="", help="Comma-separated subset of stages to run")
+    parser.add_argument("--output", default="", help="Write JSON results to this path (default: stdout only)")
+    parser.add_argument("--baseline", default="", help=f"Compare against a stored run (e.g. {DEFAULT_BASELINE})")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs baseline before failing (default: 0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline (--baseline path or the default)")
+    args = parser.parse_args()
+
+    if not (100 <= args.symbols <= 10000) or not (1 <= args.years <= 30):
+        parser.error("--symbols must be 100-10000 and --years 1-30")
+    try:
+        args.interval = check_interval(args.interval)
+    except ValueError as e:
+        parser.error(str(e))
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()] or None
+    result = run_benchmarks(args.symbols, args.years, fast=args.fast, slow=args.slow, repeat=args.repeat, seed=args.seed, stages=stages, interval=args.interval)
+
+    print(f"{'STAGE':<18}{'SECONDS':>10}{'US/SYMBOL':>12}{'BARS/SEC':>14}")
+    for name, st in result["stages"].items():
+        bps = f"{st['bars_per_sec']:.0f}" if st["bars_per_sec"] else "n/a"
+        print(f"{name:<18}{st['seconds']:>10.4f}{st['per_symbol_us']:>12.1f}{bps:>14}")
+
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    baseline_path = args.baseline or DEFAULT_BASELINE
+    if args.save_baseline:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"Baseline saved to {baseline_path}")
+        return
+    if args.baseline:
+        try:
+            with open(baseline_path, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        except Exception as e:
+            print(f"Could not read baseline {baseline_path}: {e}")
+            raise SystemExit(2)
+        base_cfg = baseline.get("config", {})
+        if base_cfg.get("symbols") != args.symbols or base_cfg.get("years") != args.years or base_cfg.get("interval", "1d") != args.interval:
+            print("Note: baseline was recorded with a different universe size; comparing per-symbol times.")
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print("Regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            raise SystemExit(1)
+        print("No regressions vs baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Synthetic OHLCV universes for benchmarks (geometric random walk, seeded)."""
+import math
+import os
+import random
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List
+
+from stock.backtest import BARS_PER_YEAR
+from stock.data.csv_provider import csv_dir
+from stock.data.timeseries import DAILY, INTERVALS, TimeSeries, TimeSeriesBuilder, check_interval, is_intraday
+
+# Regular US session in UTC (13:30-20:00, ignoring daylight saving)
+SESSION_OPEN = (13, 30)
+SESSION_SECONDS = 390 * 60
+
+
+def trading_days(start: date, count: int) -> List[int]:
+    out: List[int] = []
+    d = start
+    while len(out) < count:
+        if d.weekday() < 5:
+            out.append(d.toordinal())
+        d += timedelta(days=1)
+    return out
+
+
+def session_bars(days: List[int], interval: str) -> List[int]:
+    """Unix timestamps of every intraday bar in the given trading days (ordinals)."""
+    step = INTERVALS[interval]
+    out: List[int] = []
+    for d in days:
+        day = date.fromordinal(d)
+        start = int(datetime(day.year, day.month, day.day, *SESSION_OPEN, tzinfo=timezone.utc).timestamp())
+        out.extend(range(start, start + SESSION_SECONDS, step))
+    return out
+
+
+def make_series(rng: random.Random, days: List[int], start_price: float = 100.0, interval: str = DAILY) -> TimeSeries:
+    drift = rng.uniform(-0.0002, 0.0006)
+    vol = rng.uniform(0.008, 0.03)
+    if is_intraday(interval):
+        # Same daily drift/volatility spread over the session's bars
+        per_day = SESSION_SECONDS / INTERVALS[interval]
+        drift /= per_day
+        vol /= math.sqrt(per_day)
+    price = start_price
+    builder = TimeSeriesBuilder()
+    for d in days:
+        o = price
+        c = max(0.01, o * math.exp(drift + vol * rng.gauss(0.0, 1.0)))
+        h = max(o, c) * (1.0 + abs(rng.gauss(0.0, vol / 2)))
+        l = min(o, c) * (1.0 - abs(rng.gauss(0.0, vol / 2)))
+        builder.append(d, o, h, l, c, int(rng.uniform(1e5, 5e7)))
+        price = c
+    return builder.build(currency="USD", interval=interval)
+
+
+def generate_universe(n_symbols: int = 100, years: int = 1, seed: int = 42, interval: str = DAILY) -> Dict[str, TimeSeries]:
+    """Return {symbol: TimeSeries} with years * 252 trading days of bars per symbol (78 per day at 5m)."""
+    interval = check_interval(interval)
+    rng = random.Random(seed)
+    days = trading_days(date(2000, 1, 3), max(1, years) * BARS_PER_YEAR)
+    keys = session_bars(days, interval) if is_intraday(interval) else days
+    return {f"SYM{i:05d}": make_series(rng, keys, rng.uniform(5.0, 500.0), interval) for i in range(n_symbols)}
+
+
+def write_csv_universe(universe: Dict[str, TimeSeries], data_dir: str) -> None:
+    """Write each series as <data_dir>/<SYMBOL>.csv (intraday: <data_dir>/<interval>/) in the loader's schema."""
+    for sym, ts in universe.items():
+        folder = csv_dir(data_dir, ts.interval)
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"{sym}.csv"), "w", encoding="utf-8", newline="") as f:
+            f.write("Date,Open,High,Low,Close,Volume\n")
+            for d, o, h, l, c, v in zip(ts.dates(), ts["open"], ts["high"], ts["low"], ts["close"], ts["volume"]):
+                f.write(f"{d.isoformat()},{o:.4f},{h:.4f},{l:.4f},{c:.4f},{v}\n")
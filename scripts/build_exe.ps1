@@ -15,6 +15,7 @@ Write-Host "Building single-file EXE..."
 pyinstaller --noconfirm --clean --onefile `
   --name $Name `
   --add-data "$addData" `
+  --exclude-module tkinter --exclude-module _tkinter `
   $iconArg `
   run_web.py
 
@@ -1,24 +1,74 @@
 import argparse
 import os
-from typing import List
+import sys
+from typing import List, Optional
 
-from .recommend import analyze_and_rank, analyze_and_rank_with_loader
 from .utils import discover_symbols
-from .data.provider import get_loader
 
+# Scan modules (recommend, strategies, providers) are imported inside main() so
+# the `cache`/`refresh` subcommands and --help don't pay for them
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description="Analyze stock trends from CSVs and suggest buys.")
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "cache":
+        cache_main(argv[1:])
+        return
+    if argv and argv[0] == "refresh":
+        refresh_main(argv[1:])
+        return
+
+    from .data.timeseries import INTERVALS
+
+    parser = argparse.ArgumentParser(description="Analyze stock trends from CSVs and suggest buys.", epilog="Cache maintenance: main.py cache --help; prewarming: main.py refresh --help")
     parser.add_argument("--data-dir", default="data", help="Directory containing <SYMBOL>.csv files (default: data)")
     parser.add_argument("--symbols", default="", help="Comma-separated list of symbols to analyze (default: discover all CSVs)")
     parser.add_argument("--top", type=int, default=10, help="How many top candidates to display")
     parser.add_argument("--fast", type=int, default=50, help="Fast SMA window (default: 50)")
     parser.add_argument("--slow", type=int, default=200, help="Slow SMA window (default: 200)")
     parser.add_argument("--source", choices=["csv", "alphavantage", "yahoo"], default="csv", help="Data source (default: csv)")
+    parser.add_argument(
+        "--interval",
+        choices=[*INTERVALS, "1h"],
+        default="1d",
+        help="Bar size (default: 1d). Intraday works with yahoo and with CSVs in <data-dir>/<interval>/; SMA windows count bars",
+    )
+    parser.add_argument(
+        "--timeframe",
+        choices=[*INTERVALS, "1h"],
+        default="",
+        help="Analyze on a coarser timeframe resampled from the --interval bars, e.g. 1wk or 1mo from daily data (default: same as --interval)",
+    )
     parser.add_argument("--apikey", default="", help="API key (required for alphavantage)")
     parser.add_argument("--decision-only", action="store_true", help="Only display BUY decisions")
     parser.add_argument("--auto", type=int, default=0, help="Auto-scan N symbols from the data source (API listing for alphavantage)")
-    args = parser.parse_args()
+    parser.add_argument("--export", default="", help="Also write every result, with its features, to a file as the scan runs: .csv, .jsonl (optionally .gz), .parquet or .arrow (these two need pyarrow)")
+    parser.add_argument("--export-format", choices=["csv", "jsonl", "parquet", "arrow"], default=None, help="Export format when the --export suffix doesn't tell")
+    parser.add_argument(
+        "--snapshot",
+        nargs="?",
+        const="default",
+        default="",
+        help="Keep a named scan snapshot in the cache: only symbols whose data or parameters changed are re-evaluated, and BUYs gained/lost since the last run are listed",
+    )
+    parser.add_argument("--strategy", default="sma_crossover", help="Strategy name(s), comma-separated, or 'all' (default: sma_crossover)")
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="stages",
+        choices=["stages", "cprofile", "sample"],
+        help="Print per-stage timings and cache/throttle/upstream counters; 'cprofile' or 'sample' also run the scan under a profiler and print hot functions",
+    )
+    parser.add_argument("--profile-out", default="", help="With --profile cprofile: write a pstats file; with --profile sample: write folded stacks for flamegraph tools")
+    args = parser.parse_args(argv)
+    timeframe = args.timeframe or args.interval
+    if timeframe != args.interval:
+        from .resample import check_timeframe
+
+        try:
+            timeframe = check_timeframe(args.interval, timeframe)
+        except ValueError as e:
+            parser.error(str(e))
 
     if args.symbols.strip():
         symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
@@ -29,7 +79,7 @@ def main() -> None:
             symbols = get_universe("alphavantage", api_key=api_key, max_symbols=args.auto)
             if not symbols:
                 print("Auto-scan returned no symbols (check API key or rate limits). Falling back to CSV discovery.")
-                symbols = discover_symbols(args.data_dir)
+                symbols = discover_symbols(args.data_dir, args.interval)
         elif args.auto > 0 and args.source == "yahoo":
             from .data.provider import get_universe
             symbols = get_universe("yahoo", max_symbols=args.auto)
@@ -37,25 +87,143 @@ def main() -> None:
             from .data.provider import get_universe
             symbols = get_universe("yahoo", max_symbols=10)
             if not symbols:
-                symbols = discover_symbols(args.data_dir)
+                symbols = discover_symbols(args.data_dir, args.interval)
         else:
-            symbols = discover_symbols(args.data_dir)
+            symbols = discover_symbols(args.data_dir, args.interval)
 
     if not symbols:
         print(f"No symbols found. Place CSVs in {args.data_dir} or pass --symbols.")
         return
 
+    from .data.provider import get_loader
+    from .recommend import analyze_and_rank_with_loader
+
     # Build loader based on source
     api_key = args.apikey or os.getenv("ALPHAVANTAGE_API_KEY", "")
-    loader = get_loader(args.source, data_dir=args.data_dir, api_key=api_key)
-    # Wrap with cache + throttle
     try:
-        from .data.cache import make_cached_loader
-        loader = make_cached_loader(loader, source=args.source, cache_dir=".cache", ttl_hours=24, throttle_ms=400)
+        loader = get_loader(args.source, data_dir=args.data_dir, api_key=api_key, interval=args.interval)
+    except ValueError as e:
+        print(e)
+        return
+    # Wrap with cache + throttle; keep indicator state next to the cache for incremental runs
+    state_store = None
+    try:
+        from .data.cache import IndicatorStateStore, make_cached_loader
+        # Intraday bars go stale within the hour
+        ttl_hours = 24 if args.interval == "1d" else 1
+        loader = make_cached_loader(loader, source=args.source, cache_dir=".cache", ttl_hours=ttl_hours, throttle_ms=400, interval=args.interval)
+        if timeframe != args.interval:
+            from .resample import make_resampled_loader
+
+            loader = make_resampled_loader(loader, timeframe, source=args.source, cache_dir=".cache", base_interval=args.interval, ttl_hours=ttl_hours)
+        state_store = IndicatorStateStore(args.source, cache_dir=".cache", interval=timeframe)
     except Exception:
         pass
 
-    ranked = analyze_and_rank_with_loader(symbols, loader, fast=args.fast, slow=args.slow)
+    from .strategy.registry import STRATEGIES
+    if args.strategy.strip().lower() == "all":
+        strategies = list(STRATEGIES)
+    else:
+        strategies = [s.strip().lower() for s in args.strategy.split(",") if s.strip()]
+    unknown = [s for s in strategies if s not in STRATEGIES]
+    if unknown:
+        print(f"Unknown strategy: {', '.join(unknown)}. Available: {', '.join(STRATEGIES)}")
+        return
+    multi = len(strategies) > 1
+
+    errors: dict = {}
+    snapshot = None
+    if args.snapshot:
+        from .snapshot import ScanSnapshot, snapshot_path
+
+        snapshot = ScanSnapshot(snapshot_path(".cache", args.source, args.snapshot, args.interval, timeframe))
+    exporter = None
+    if args.export:
+        from .export import open_exporter
+
+        try:
+            exporter = open_exporter(args.export, args.export_format)
+        except (ValueError, OSError) as e:
+            print(e)
+            return
+
+    def run():
+        if exporter is None:
+            return analyze_and_rank_with_loader(symbols, loader, fast=args.fast, slow=args.slow, state_store=state_store, strategies=strategies, errors=errors, snapshot=snapshot)
+        with exporter:
+            return _scan_to_export(args, symbols, loader, state_store, strategies, errors, exporter, snapshot)
+
+    profile_report = None
+    if args.profile in ("cprofile", "sample"):
+        from .profiling import run_profiled
+        ranked, profile_report = run_profiled(run, mode=args.profile, out_path=args.profile_out or None)
+    else:
+        ranked = run()
+    _print_ranked(args, ranked, symbols, multi)
+    if exporter is not None:
+        print(f"Exported {exporter.rows} row(s) to {args.export}")
+    if snapshot is not None:
+        _print_changes(snapshot, multi)
+        try:
+            snapshot.save()
+        except OSError as e:
+            print(f"Could not save the snapshot: {e}")
+    if errors:
+        print()
+        print(f"Skipped {len(errors)} symbol(s):")
+        for sym, reason in errors.items():
+            print(f"  {sym}\t{reason}")
+    if args.profile:
+        from .metrics import METRICS
+        print()
+        print(METRICS.summary())
+    if profile_report:
+        print()
+        print(profile_report)
+
+
+def _scan_to_export(args: argparse.Namespace, symbols: List[str], loader, state_store, strategies: List[str], errors: dict, exporter, snapshot=None) -> List[dict]:
+    """Stream every result to exporter and keep only the rows _print_ranked will show.
+
+    Holds at most --top results (after --decision-only) in a heap instead of
+    the whole ranked list; ties keep scan order like the full sort does.
+    """
+    import heapq
+    from .recommend import iter_analyze_with_loader
+
+    top: List[tuple] = []
+    seq = 0
+    for _sym, rows in iter_analyze_with_loader(symbols, loader, fast=args.fast, slow=args.slow, state_store=state_store, strategies=strategies, errors=errors, features=True, snapshot=snapshot):
+        for item in rows:
+            exporter.write(item)
+            if args.decision_only and item["meta"].get("decision") != "BUY":
+                continue
+            seq += 1
+            entry = (item["score"], -seq, item)
+            if len(top) < args.top:
+                heapq.heappush(top, entry)
+            elif top and entry[:2] > top[0][:2]:
+                heapq.heapreplace(top, entry)
+    return [item for _score, _seq, item in sorted(top, key=lambda e: e[:2], reverse=True)]
+
+
+def _print_changes(snapshot, multi: bool) -> None:
+    """Summarize a snapshot run: how much was re-evaluated and which BUYs flipped."""
+    from datetime import datetime
+
+    print()
+    if snapshot.saved_at is None:
+        print(f"Snapshot started: evaluated {snapshot.evaluated} symbol(s).")
+        return
+    since = datetime.fromtimestamp(snapshot.saved_at).isoformat(sep=" ", timespec="minutes")
+    changes = snapshot.changes()
+    print(f"Since the snapshot of {since}: re-evaluated {snapshot.evaluated}, unchanged {snapshot.reused}; {len(changes['new_buys'])} new BUY, {len(changes['lost_buys'])} lost BUY.")
+    for mark, key in (("+", "new_buys"), ("-", "lost_buys")):
+        for sym, strategy in changes[key]:
+            print(f"  {mark} {sym}" + (f"\t{strategy}" if multi else ""))
+
+
+def _print_ranked(args: argparse.Namespace, ranked: List[dict], symbols: List[str], multi: bool) -> None:
     if args.decision_only:
         ranked = [r for r in ranked if (r.get("meta", {}).get("decision") == "BUY")]
     if not ranked:
@@ -67,7 +235,7 @@ def main() -> None:
         return
 
     print(f"Top {min(args.top, len(ranked))} candidates (higher score = better):")
-    print("SYMBOL\tSCORE\tDECISION\tLAST_CLOSE\tDIST_200SMA%\t50SMA_SLOPE\tLAST_SIGNAL")
+    print("SYMBOL\tSCORE\tDECISION\tLAST_CLOSE\tDIST_200SMA%\t50SMA_SLOPE\tLAST_SIGNAL" + ("\tSTRATEGY" if multi else ""))
     for i, item in enumerate(ranked[: args.top], start=1):
         meta = item["meta"]
         last_close = meta.get("last_close")
@@ -78,4 +246,200 @@ def main() -> None:
         last_close_s = f"{last_close:.2f}" if isinstance(last_close, (int, float)) else "nan"
         dist200_s = f"{dist200:.2f}" if isinstance(dist200, (int, float)) else "nan"
         slope50_s = f"{slope50:.4f}" if isinstance(slope50, (int, float)) else "nan"
-        print(f"{item['symbol']}\t{item['score']:.3f}\t{decision}\t{last_close_s}\t{dist200_s}\t{slope50_s}\t{last_signal or 'none'}")
+        strategy_s = f"\t{meta.get('strategy')}" if multi else ""
+        print(f"{item['symbol']}\t{item['score']:.3f}\t{decision}\t{last_close_s}\t{dist200_s}\t{slope50_s}\t{last_signal or 'none'}{strategy_s}")
+
+
+def _parse_bytes(value: str) -> int:
+    """'500M', '2G', '750k' or a plain byte count."""
+    text = value.strip().upper().rstrip("B")
+    mult = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}.get(text[-1:], 1)
+    if mult > 1:
+        text = text[:-1]
+    try:
+        return int(float(text) * mult)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size '{value}' (e.g. 500M, 2G)")
+
+
+def _fmt_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024.0
+    return f"{n:.1f} GB"
+
+
+def cache_main(argv: List[str]) -> None:
+    """`main.py cache ...` subcommands for inspecting and maintaining the on-disk cache."""
+    from .data import cache as dcache
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--cache-dir", default=".cache", help="Cache directory (default: .cache)")
+    common.add_argument("--source", default="", help="Only this source (default: every source under the cache dir)")
+    parser = argparse.ArgumentParser(prog="main.py cache", description="Inspect and maintain the on-disk data cache.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", parents=[common], help="Entries, bytes and an age histogram per source")
+    prune = sub.add_parser("prune", parents=[common], help="Remove entries older than an age and/or beyond a size")
+    prune.add_argument("--older-than", type=float, default=None, help="Remove series fetched more than N hours ago")
+    prune.add_argument("--max-bytes", type=_parse_bytes, default=None, help="Then evict LRU entries until the cache fits (e.g. 500M)")
+    prune.add_argument("--dry-run", action="store_true", help="Only show what would be removed")
+    evict = sub.add_parser("evict", parents=[common], help="Evict least-recently-used entries down to a byte budget")
+    evict.add_argument("max_bytes", type=_parse_bytes, help="Byte budget, e.g. 200M")
+    evict.add_argument("--dry-run", action="store_true", help="Only show what would be removed")
+    verify = sub.add_parser("verify", parents=[common], help="Check that every entry decodes and is well-formed")
+    verify.add_argument("--repair", action="store_true", help="Delete broken entries")
+    sub.add_parser("compact", parents=[common], help="Rewrite entries in the compact format; drop orphaned state and expired negative entries")
+    neg = sub.add_parser("negative", parents=[common], help="List or clear negatively cached (failed/unknown) symbols")
+    neg.add_argument("--symbols", default="", help="Comma-separated symbols to clear with --clear (default: all)")
+    neg.add_argument("--clear", action="store_true", help="Remove entries instead of listing them")
+    neg.add_argument("--all", action="store_true", help="Also list expired entries")
+    listing = sub.add_parser("listing", parents=[common], help="Show (or --refresh) the cached Alpha Vantage LISTING_STATUS universe")
+    listing.add_argument("--refresh", action="store_true", help="Download a fresh listing (uses one API call)")
+    listing.add_argument("--apikey", default="", help="API key for --refresh (default: ALPHAVANTAGE_API_KEY)")
+    listing.add_argument("--state", choices=["active", "delisted"], default="active")
+    args = parser.parse_args(argv)
+    source = args.source.lower() or None
+
+    if args.command == "listing":
+        import time as _time
+        from .data.listing import listing_path, load_listing
+
+        path = listing_path(args.cache_dir, args.state)
+        if not args.refresh and not os.path.exists(path):
+            print("No cached listing yet. Run with --refresh (needs an API key) or use --auto with --source alphavantage.")
+            return
+        index = load_listing(args.apikey or os.getenv("ALPHAVANTAGE_API_KEY", ""), state=args.state, cache_dir=args.cache_dir, ttl_hours=float("inf"), refresh=args.refresh)
+        if index is None:
+            print("Could not download the listing (rate limit, network or API key).")
+            return
+        age_h = (_time.time() - os.path.getmtime(path)) / 3600.0
+        print(f"{path}: {len(index)} symbols, fetched {age_h:.1f}h ago")
+        print("EXCHANGE\tSYMBOLS")
+        for exch, n in index.exchanges().items():
+            print(f"{exch or '-'}\t{n}")
+        print("ASSET_TYPE\tSYMBOLS")
+        for kind, n in index.asset_types().items():
+            print(f"{kind or '-'}\t{n}")
+        return
+
+    if args.command == "stats":
+        stats = dcache.cache_stats(args.cache_dir, source)
+        if not stats:
+            print(f"Cache {args.cache_dir} is empty.")
+            return
+        labels = [label for _h, label in dcache.AGE_BUCKETS]
+        print("SOURCE\tENTRIES\tFILES\tSIZE\t" + "\t".join(labels))
+        for src, st in sorted(stats.items()):
+            print(f"{src}\t{st['entries']}\t{st['files']}\t{_fmt_bytes(st['bytes'])}\t" + "\t".join(str(st["ages"][label]) for label in labels))
+        total = sum(st["bytes"] for st in stats.values())
+        budget = dcache.CACHE_MAX_BYTES
+        print(f"Total: {_fmt_bytes(total)}" + (f" of {_fmt_bytes(budget)} budget (STOCK_CACHE_MAX_BYTES)" if budget else ""))
+        return
+
+    if args.command in ("prune", "evict"):
+        if args.command == "prune":
+            if args.older_than is None and args.max_bytes is None:
+                print("Nothing to do: pass --older-than HOURS and/or --max-bytes SIZE.")
+                return
+            removed = dcache.prune_cache(args.cache_dir, older_than_hours=args.older_than, max_bytes=args.max_bytes, source=source, dry_run=args.dry_run)
+        else:
+            removed = dcache.evict_lru(args.cache_dir, args.max_bytes, source=source, dry_run=args.dry_run)
+        verb = "Would remove" if args.dry_run else "Removed"
+        freed = sum(r["bytes"] for r in removed)
+        entries = sum(1 for r in removed if r["kind"] == "series")
+        print(f"{verb} {entries} entr{'y' if entries == 1 else 'ies'} ({len(removed)} files, {_fmt_bytes(freed)}).")
+        return
+
+    if args.command == "verify":
+        problems = dcache.verify_cache(args.cache_dir, source, repair=args.repair)
+        if not problems:
+            print("All cache entries OK.")
+            return
+        for p in problems:
+            print(f"{p['path']}\t{p['problem']}")
+        print(f"{len(problems)} broken entr{'y' if len(problems) == 1 else 'ies'}" + (" removed." if args.repair else "; rerun with --repair to delete them."))
+        return
+
+    if args.command == "compact":
+        res = dcache.compact_cache(args.cache_dir, source)
+        print(f"Rewrote {res['rewritten']} entries, removed {res['orphans_removed']} orphaned state files: {_fmt_bytes(res['bytes_before'])} -> {_fmt_bytes(res['bytes_after'])}.")
+        return
+
+    if args.command == "negative":
+        if source:
+            sources = [source]
+        elif os.path.isdir(args.cache_dir):
+            sources = sorted(d for d in os.listdir(args.cache_dir) if os.path.isdir(os.path.join(args.cache_dir, d)))
+        else:
+            sources = []
+        symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()] or None
+        rows = []
+        for src in sources:
+            neg_cache = dcache.NegativeCache(src, cache_dir=args.cache_dir)
+            if args.clear:
+                removed_n = neg_cache.clear(symbols)
+                if removed_n:
+                    print(f"{src}: cleared {removed_n} entr{'y' if removed_n == 1 else 'ies'}")
+                continue
+            rows.extend((src, e) for e in neg_cache.entries(include_expired=args.all))
+        if args.clear:
+            return
+        if not rows:
+            print("No negatively cached symbols.")
+            return
+        print("SOURCE\tSYMBOL\tKIND\tFAILS\tAGE_H\tMESSAGE")
+        for src, e in rows:
+            age = f"{e['age_hours']:.1f}" + (" (expired)" if e.get("expired") else "")
+            print(f"{src}\t{e['symbol']}\t{e.get('kind')}\t{e.get('count', 1)}\t{age}\t{e.get('message', '')}")
+
+
+def refresh_main(argv: List[str]) -> None:
+    """`main.py refresh`: prefetch preset universes into the cache, once or on a schedule."""
+    from .data.refresher import DEFAULT_AT, CacheRefresher
+    from .universe import PRESETS
+
+    parser = argparse.ArgumentParser(prog="main.py refresh", description="Prewarm the data cache for preset universes.")
+    parser.add_argument("--source", choices=["yahoo", "alphavantage"], default="yahoo", help="Data source (default: yahoo)")
+    parser.add_argument("--apikey", default="", help="API key (alphavantage)")
+    parser.add_argument("--presets", default="", help=f"Comma-separated preset names (default: all of {', '.join(PRESETS)})")
+    parser.add_argument("--cache-dir", default=".cache", help="Cache directory (default: .cache)")
+    parser.add_argument("--throttle-ms", type=int, default=1000, help="Delay between upstream requests (default: 1000)")
+    parser.add_argument("--min-age-hours", type=float, default=1.0, help="Refetch entries older than this (default: 1)")
+    parser.add_argument("--once", action="store_true", help="Refresh now and exit instead of running on a schedule")
+    parser.add_argument("--at", default=DEFAULT_AT, help=f"Daily run time, HH:MM UTC, weekdays (default: {DEFAULT_AT})")
+    parser.add_argument("--every", type=float, default=0, help="Run every N minutes instead of daily at --at")
+    args = parser.parse_args(argv)
+
+    presets = [p.strip() for p in args.presets.split(",") if p.strip()] or None
+    try:
+        refresher = CacheRefresher(
+            source=args.source,
+            presets=presets,
+            api_key=args.apikey or os.getenv("ALPHAVANTAGE_API_KEY", ""),
+            cache_dir=args.cache_dir,
+            throttle_ms=args.throttle_ms,
+            min_age_hours=args.min_age_hours,
+            at=args.at,
+            every_minutes=args.every,
+        )
+    except ValueError as e:
+        print(e)
+        return
+
+    def report(summary: dict) -> None:
+        if summary.get("skipped"):
+            print(f"[{summary['finished']}] {summary['source']}: skipped, another process is refreshing this cache")
+            return
+        print(f"[{summary['finished']}] {summary['source']}: {summary['refreshed']} refreshed, {summary['failed']} failed of {summary['due']} due in {summary['seconds']:.1f}s")
+        for sym, reason in summary["errors"].items():
+            print(f"  {sym}\t{reason}")
+
+    if args.once:
+        report(refresher.refresh_once())
+        return
+    print(f"Refreshing {len(refresher.symbols())} symbols from {args.source}; next run {refresher.next_run().isoformat(timespec='minutes')}. Ctrl+C to stop.")
+    try:
+        refresher.run_forever(on_run=report)
+    except KeyboardInterrupt:
+        pass
@@ -1,25 +1,90 @@
 import json
-from datetime import datetime
+import os
+from datetime import datetime, timezone
 from typing import Dict, List, Optional
 from urllib.request import urlopen
 from urllib.parse import urlencode
-import csv
 
+from ..metrics import METRICS, error_class
+from .resilience import FetchError, call_with_retry, classify_exception
+from .timeseries import TimeSeries, TimeSeriesBuilder
 
-def _fetch_json(params: Dict[str, str]) -> Optional[dict]:
-    url = "https://www.alphavantage.co/query?" + urlencode(params)
+
+# Override with STOCK_ALPHAVANTAGE_BASE_URL (e.g. http://127.0.0.1:8765 for stock.data.mock_server)
+BASE_URL = os.getenv("STOCK_ALPHAVANTAGE_BASE_URL", "https://www.alphavantage.co").rstrip("/")
+
+# The free tier's per-minute quota resets on a rolling minute
+RATE_LIMIT_WINDOW = 60.0
+
+
+def set_base_url(url: str) -> None:
+    global BASE_URL
+    BASE_URL = url.rstrip("/")
+
+
+def _query_url(params: Dict[str, str]) -> str:
+    return f"{BASE_URL}/query?" + urlencode(params)
+
+
+def _seconds_to_utc_midnight() -> float:
+    now = datetime.now(timezone.utc)
+    return float(86400 - (now.hour * 3600 + now.minute * 60 + now.second))
+
+
+def _classify_notice(data: dict) -> Optional[FetchError]:
+    """Rate-limit and error notices arrive as HTTP 200 with a single message key."""
+    if "Error Message" in data:
+        text = str(data["Error Message"])
+        lowered = text.lower()
+        # "the parameter apikey is invalid or missing" is about the key, not the symbol
+        if "apikey" in lowered or "api key" in lowered:
+            return FetchError("auth", text[:200], "alphavantage")
+        if "invalid api call" in lowered:
+            return FetchError("not_found", text[:200], "alphavantage")
+        return FetchError("invalid", text[:200], "alphavantage")
+    for k in ("Note", "Information"):
+        if k in data:
+            text = str(data[k])
+            lowered = text.lower()
+            if "per day" in lowered or "daily" in lowered:
+                return FetchError("quota", text[:200], "alphavantage", retry_after=_seconds_to_utc_midnight())
+            if "premium" in lowered:
+                return FetchError("auth", text[:200], "alphavantage")
+            return FetchError("rate_limited", text[:200], "alphavantage", retry_after=RATE_LIMIT_WINDOW)
+    return None
+
+
+def _request_json(params: Dict[str, str]) -> dict:
+    """One API call; raises a classified FetchError on failure or notice."""
+    url = _query_url(params)
     try:
-        with urlopen(url, timeout=20) as resp:
-            return json.loads(resp.read().decode("utf-8"))
-    except Exception:
-        return None
+        with METRICS.timer("upstream_request_seconds", provider="alphavantage"):
+            with urlopen(url, timeout=20) as resp:
+                data = json.loads(resp.read().decode("utf-8"))
+    except Exception as e:
+        err = classify_exception(e, "alphavantage")
+        METRICS.inc("upstream_errors_total", provider="alphavantage", error=error_class(err))
+        raise err
+    if not isinstance(data, dict):
+        METRICS.inc("upstream_errors_total", provider="alphavantage", error="invalid")
+        raise FetchError("invalid", "non-object JSON response", "alphavantage")
+    err = _classify_notice(data)
+    if err is not None:
+        METRICS.inc("upstream_errors_total", provider="alphavantage", error=err.kind)
+        raise err
+    return data
 
 
-def load_symbol_alphavantage(symbol: str, api_key: str, outputsize: str = "compact") -> Optional[Dict[str, List]]:
-    """Fetch daily OHLCV from Alpha Vantage and return csv-like dict of lists.
+def _get_json(params: Dict[str, str]) -> dict:
+    return call_with_retry(lambda _attempt: _request_json(params), "alphavantage")
+
+
+def load_symbol_alphavantage(symbol: str, api_key: str, outputsize: str = "compact") -> TimeSeries:
+    """Fetch daily OHLCV from Alpha Vantage and return a TimeSeries.
 
     Uses TIME_SERIES_DAILY_ADJUSTED. 'outputsize' can be 'compact' (~100 bars) or 'full'.
-    Returns None if any error occurs.
+    Rate-limit notes are retried behind the 'alphavantage' circuit breaker;
+    raises FetchError (stock.data.resilience) if the symbol cannot be loaded.
     """
     params = {
         "function": "TIME_SERIES_DAILY_ADJUSTED",
@@ -27,36 +92,29 @@ def load_symbol_alphavantage(symbol: str, api_key: str, outputsize: str = "compa
         "outputsize": outputsize,
         "apikey": api_key,
     }
-    data = _fetch_json(params)
-    if data is None:
-        return None
-
-    key = None
-    for k in data.keys():
-        if "Time Series" in k:
-            key = k
-            break
-    if not key or key not in data:
-        # Fallback to non-adjusted endpoint
+    try:
+        data = _get_json(params)
+    except FetchError as e:
+        if e.kind != "auth":
+            raise
+        data = {}
+
+    key = next((k for k in data.keys() if "Time Series" in k), None)
+    if not key:
+        # Fallback to non-adjusted endpoint (adjusted is premium-only on some keys)
         params["function"] = "TIME_SERIES_DAILY"
-        data = _fetch_json(params) or {}
+        data = _get_json(params)
         key = next((k for k in data.keys() if "Time Series" in k), None)
-        if not key or key not in data:
-            return None
+        if not key:
+            raise FetchError("empty", "no time series in response", "alphavantage")
 
     ts = data[key]
-    dates = []
-    opens: List[float] = []
-    highs: List[float] = []
-    lows: List[float] = []
-    closes: List[float] = []
-    vols: List[int] = []
 
     # Alpha Vantage dates are in descending order by default; collect and sort ascending
     rows = []
     for ds, row in ts.items():
         try:
-            dt = datetime.strptime(ds, "%Y-%m-%d").date()
+            dt = datetime.strptime(ds, "%Y-%m-%d").date().toordinal()
             o = float(row.get("1. open"))
             h = float(row.get("2. high"))
             l = float(row.get("3. low"))
@@ -67,25 +125,12 @@ def load_symbol_alphavantage(symbol: str, api_key: str, outputsize: str = "compa
             continue
 
     if not rows:
-        return None
+        raise FetchError("empty", "no usable bars", "alphavantage")
 
     rows.sort(key=lambda r: r[0])
-    for r in rows:
-        dates.append(r[0])
-        opens.append(r[1])
-        highs.append(r[2])
-        lows.append(r[3])
-        closes.append(r[4])
-        vols.append(r[5])
-
-    return {
-        "date": dates,
-        "open": opens,
-        "high": highs,
-        "low": lows,
-        "close": closes,
-        "volume": vols,
-    }
+    builder = TimeSeriesBuilder()
+    builder.extend(rows)
+    return builder.build()
 
 
 def probe_alphavantage(symbol: str, api_key: str, outputsize: str = "compact") -> Dict[str, str]:
@@ -99,7 +144,7 @@ def probe_alphavantage(symbol: str, api_key: str, outputsize: str = "compact") -
         "outputsize": outputsize,
         "apikey": api_key,
     }
-    url = "https://www.alphavantage.co/query?" + urlencode(params)
+    url = _query_url(params)
     try:
         with urlopen(url, timeout=20) as resp:
             text = resp.read().decode("utf-8")
@@ -129,46 +174,61 @@ def probe_alphavantage(symbol: str, api_key: str, outputsize: str = "compact") -
     return {"status": "error", "message": f"Unexpected API response", "keys": keys}
 
 
-def list_symbols_alphavantage(api_key: str, state: str = "active", max_symbols: int = 50, exchanges: Optional[List[str]] = None) -> List[str]:
-    """Fetch a list of symbols from Alpha Vantage LISTING_STATUS (CSV).
-
-    - state: 'active' or 'delisted'
-    - exchanges: optional allowlist (e.g., ['NYSE', 'NASDAQ'])
-    - max_symbols: cap to avoid huge scans and rate limits downstream
-    Returns list of symbol strings.
-    """
+def _request_listing(params: Dict[str, str]) -> str:
+    url = _query_url(params)
+    try:
+        with METRICS.timer("upstream_request_seconds", provider="alphavantage", function="LISTING_STATUS"):
+            with urlopen(url, timeout=30) as resp:
+                text = resp.read().decode("utf-8", errors="ignore")
+    except Exception as e:
+        err = classify_exception(e, "alphavantage")
+        METRICS.inc("upstream_errors_total", provider="alphavantage", error=error_class(err))
+        raise err
+    if text.lstrip().startswith("{"):
+        # Notices come back as JSON even when CSV was requested
+        try:
+            err = _classify_notice(json.loads(text)) or FetchError("invalid", "unexpected JSON response", "alphavantage")
+        except ValueError:
+            err = FetchError("transient", "truncated response", "alphavantage")
+        METRICS.inc("upstream_errors_total", provider="alphavantage", error=err.kind)
+        raise err
+    if not text.lower().startswith("symbol,"):
+        METRICS.inc("upstream_errors_total", provider="alphavantage", error="invalid")
+        raise FetchError("invalid", "LISTING_STATUS response is not the expected CSV", "alphavantage")
+    return text
+
+
+def fetch_listing_csv(api_key: str, state: str = "active") -> str:
+    """Download the raw LISTING_STATUS CSV; raises FetchError."""
     params = {
         "function": "LISTING_STATUS",
         "state": state,
         "apikey": api_key,
         "datatype": "csv",
     }
-    url = "https://www.alphavantage.co/query?" + urlencode(params)
-    symbols: List[str] = []
-    try:
-        with urlopen(url, timeout=30) as resp:
-            text = resp.read().decode("utf-8", errors="ignore")
-    except Exception:
-        return symbols
+    return call_with_retry(lambda _attempt: _request_listing(params), "alphavantage")
 
-    # Parse CSV
-    try:
-        reader = csv.DictReader(text.splitlines())
-        for row in reader:
-            sym = (row.get("symbol") or "").strip().upper()
-            exch = (row.get("exchange") or "").strip().upper()
-            status = (row.get("status") or "").strip().lower()
-            if not sym:
-                continue
-            if state and status and status != state:
-                continue
-            if exchanges:
-                if exch.upper() not in [e.upper() for e in exchanges]:
-                    continue
-            symbols.append(sym)
-            if len(symbols) >= max_symbols:
-                break
-    except Exception:
-        return []
 
-    return symbols
+def list_symbols_alphavantage(
+    api_key: str,
+    state: str = "active",
+    max_symbols: int = 50,
+    exchanges: Optional[List[str]] = None,
+    asset_types: Optional[List[str]] = None,
+    cache_dir: str = ".cache",
+) -> List[str]:
+    """List symbols from Alpha Vantage LISTING_STATUS.
+
+    - state: 'active' or 'delisted'
+    - exchanges: optional allowlist (e.g., ['NYSE', 'NASDAQ'])
+    - asset_types: optional allowlist (e.g., ['Stock'] to skip ETFs)
+    - max_symbols: cap to avoid huge scans and rate limits downstream
+    The listing is cached under cache_dir for a day (see stock.data.listing),
+    so repeated calls cost no API quota. Returns list of symbol strings.
+    """
+    from .listing import load_listing
+
+    index = load_listing(api_key, state=state, cache_dir=cache_dir)
+    if index is None:
+        return []
+    return index.query(exchanges=exchanges, asset_types=asset_types, status=state, limit=max_symbols)
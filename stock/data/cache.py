@@ -1,82 +1,684 @@
+import base64
 import json
+import math
 import os
+import sys
+import threading
 import time
-from datetime import datetime
-from typing import Callable, Dict, List, Optional
+import zlib
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
+from ..metrics import METRICS
+from .resilience import FetchError
+from .timeseries import COLUMNS, DAILY, TYPECODES, TimeSeries, check_interval, is_intraday
 
-def _encode_timeseries(ts: Dict[str, List]) -> Dict[str, List]:
-    out: Dict[str, List] = {}
-    for k, v in ts.items():
-        if k == "date":
-            out[k] = [d.isoformat() if hasattr(d, "isoformat") else str(d) for d in v]
-        else:
-            out[k] = v
-    return out
 
+_FORMAT_VERSION = 2
+# Intraday entries: byte-shuffled, zlib-compressed binary columns (see _pack)
+_PACKED_VERSION = 3
 
-def _decode_timeseries(data: Dict[str, List]) -> Dict[str, List]:
-    out: Dict[str, List] = {}
-    for k, v in data.items():
-        if k == "date":
-            conv = []
-            for s in v:
-                try:
-                    conv.append(datetime.strptime(str(s), "%Y-%m-%d").date())
-                except Exception:
-                    conv.append(str(s))
-            out[k] = conv
-        else:
-            out[k] = v
+# Failures that describe the symbol rather than the endpoint's health; only these are negative-cached
+NEGATIVE_KINDS = ("not_found", "empty")
+# Local sources answer from disk and depend on a data_dir the cache isn't keyed by
+NO_NEGATIVE_SOURCES = ("csv",)
+NEGATIVE_FILE = "_negative.json"
+# Cache subfolders that don't hold a source (web profiler dumps were written to profiles/)
+NON_SOURCE_DIRS = ("profiles",)
+STATE_SUFFIX = ".state.json"
+
+# Byte budget for the whole cache directory enforced by make_cached_loader (0 = unlimited)
+CACHE_MAX_BYTES = int(os.getenv("STOCK_CACHE_MAX_BYTES", "0") or 0)
+# Eviction frees down to this fraction of the budget so it doesn't run on every write
+EVICT_TARGET = 0.9
+# Longest a worker waits for another one fetching the same symbol (retries included)
+FETCH_LEASE_SECONDS = 120.0
+# Intraday entries accumulate across fetches (providers only return recent bars); older bars are dropped
+INTRADAY_RETENTION_DAYS = float(os.getenv("STOCK_INTRADAY_RETENTION_DAYS", "180") or 0)
+
+
+def _shuffle_compress(values: array) -> str:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    raw = values.tobytes()
+    size = values.itemsize
+    # Group the k-th byte of every value together: slowly changing high bytes become long runs for zlib
+    shuffled = b"".join(raw[i::size] for i in range(size))
+    return base64.b64encode(zlib.compress(shuffled, 6)).decode("ascii")
+
+
+def _decompress_unshuffle(text: str, typecode: str, n: int) -> array:
+    shuffled = zlib.decompress(base64.b64decode(text))
+    values = array(typecode)
+    size = values.itemsize
+    if len(shuffled) != n * size:
+        raise ValueError(f"packed column has {len(shuffled)} bytes, expected {n * size}")
+    raw = bytearray(len(shuffled))
+    for i in range(size):
+        raw[i::size] = shuffled[i * n:(i + 1) * n]
+    values.frombytes(bytes(raw))
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def _deltas(values: array) -> array:
+    return array(values.typecode, [values[0]] + [b - a for a, b in zip(values, values[1:])]) if values else values
+
+
+def _pack(values: array, delta: bool = False) -> Dict:
+    """Encode a column losslessly in the narrowest exact form, then shuffle and compress it.
+
+    Prices that are exact decimals (cents, 1/10000) become delta-encoded
+    integers, float32-exact prices (Yahoo) are stored as 4-byte floats;
+    anything else (including NaN/inf bars and prices too large for the
+    integer forms) stays float64. delta stores integer columns (bar times)
+    as differences between neighbours.
+    """
+    if values.typecode == "d" and values and all(map(math.isfinite, values)):
+        for scale in (100, 10000):
+            try:
+                ints = array("q", [round(v * scale) for v in values])
+            except OverflowError:
+                break
+            if all(i / scale == v for i, v in zip(ints, values)):
+                return {"t": "q", "scale": scale, "z": _shuffle_compress(_deltas(ints))}
+        try:
+            narrow = array("f", values)
+        except OverflowError:
+            narrow = None
+        if narrow is not None and narrow.tolist() == values.tolist():
+            return {"t": "f", "z": _shuffle_compress(narrow)}
+    if delta:
+        return {"t": values.typecode, "delta": True, "z": _shuffle_compress(_deltas(values))}
+    return {"t": values.typecode, "z": _shuffle_compress(values)}
+
+
+def _unpack(col: Dict, typecode: str, n: int) -> array:
+    values = _decompress_unshuffle(col["z"], col["t"], n)
+    scale = col.get("scale")
+    if scale:
+        return array(typecode, [i / scale for i in accumulate(values)])
+    if col.get("delta"):
+        return array(typecode, accumulate(values))
+    return values if values.typecode == typecode else array(typecode, values)
+
+
+def _encode_timeseries(ts: TimeSeries) -> Dict:
+    if ts.intraday:
+        # Months of minute bars: a few bytes per bar instead of ~60 as JSON numbers
+        cols = ts.copy()._cols
+        return {
+            "v": _PACKED_VERSION,
+            "interval": ts.interval,
+            "currency": ts.currency,
+            "n": len(ts),
+            "cols": {k: _pack(cols[k], delta=(k == "date")) for k in COLUMNS},
+        }
+    out: Dict = {"v": _FORMAT_VERSION, "currency": ts.currency}
+    if ts.interval != DAILY:
+        out["interval"] = ts.interval
+    for k in COLUMNS:
+        out[k] = ts[k].tolist()
     return out
 
 
+def _decode_timeseries(data: Dict) -> TimeSeries:
+    if data.get("v") == _PACKED_VERSION:
+        n = int(data["n"])
+        cols = {k: _unpack(data["cols"][k], TYPECODES[k], n) for k in COLUMNS}
+        return TimeSeries(cols, data.get("currency"), interval=data.get("interval") or DAILY)
+    if data.get("v") == _FORMAT_VERSION:
+        return TimeSeries({k: data.get(k) or [] for k in COLUMNS}, data.get("currency"), interval=data.get("interval") or DAILY)
+    # Legacy dict-of-lists with ISO date strings
+    return TimeSeries.from_dict(data)
+
+
+def _merge_intraday(old: Optional[TimeSeries], new: TimeSeries, retention_days: float) -> TimeSeries:
+    """Keep the cached bars older than the fresh fetch, append it, then apply the retention window."""
+    if not new:
+        return new
+    keys = new["date"]
+    if old and old.interval == new.interval:
+        cut = bisect_left(old["date"], keys[0])
+        if cut:
+            head = old[:cut].copy()
+            cols = {k: head._cols[k] + new.copy()._cols[k] for k in COLUMNS}
+            new = TimeSeries(cols, new.currency or old.currency, interval=new.interval)
+            keys = new["date"]
+    if retention_days > 0:
+        start = bisect_left(keys, keys[-1] - int(retention_days * 86400))
+        if start:
+            new = new[start:].copy()
+    return new
+
+
+def series_key(symbol: str, interval: Optional[str] = DAILY) -> str:
+    """File stem for symbol's series: SYMBOL for daily bars, SYMBOL@5m (SYMBOL@1wk, ...) for other intervals."""
+    sym = symbol.upper().strip()
+    interval = check_interval(interval)
+    return sym if interval == DAILY else f"{sym}@{interval}"
+
+
+def split_series_key(stem: str) -> Tuple[str, str]:
+    """Inverse of series_key: (SYMBOL, interval)."""
+    sym, _sep, interval = stem.partition("@")
+    return sym, interval or DAILY
+
+
+def _atomic_write(path: str, text: str) -> None:
+    """Write via a per-writer temp file and os.replace, so readers in other
+    processes see either the old or the new file, never a partial one."""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def cache_path(cache_dir: str, source: str, symbol: str, interval: str = DAILY) -> str:
+    """Path of the cached series for symbol: <cache_dir>/<source>/<SYMBOL>.json (<SYMBOL>@<interval>.json intraday)."""
+    return os.path.join(cache_dir, (source or "misc").lower(), f"{series_key(symbol, interval)}.json")
+
+
 def make_cached_loader(
-    inner_loader: Callable[[str], Optional[Dict[str, List]]],
+    inner_loader: Callable[[str], Optional[TimeSeries]],
     source: str,
     cache_dir: str = ".cache",
     ttl_hours: int = 24,
     throttle_ms: int = 400,
-) -> Callable[[str], Optional[Dict[str, List]]]:
+    negative_ttl_hours: float = 6,
+    max_bytes: Optional[int] = None,
+    interval: str = DAILY,
+) -> Callable[[str], Optional[TimeSeries]]:
     """Wrap a loader with on-disk caching and simple throttling.
 
-    Cache layout: <cache_dir>/<source>/<SYMBOL>.json
+    Cache layout: <cache_dir>/<source>/<SYMBOL>.json, or <SYMBOL>@<interval>.json
+    for an intraday inner loader (pass its interval). Intraday entries are
+    stored packed, and each fetch is merged into the cached bars, so history
+    builds up beyond the provider's short intraday range (up to
+    INTRADAY_RETENTION_DAYS).
+    FetchErrors from the inner loader are counted and re-raised. Symbol-level
+    failures a network provider reports as FetchError (unknown/delisted
+    symbol, empty data) are remembered for negative_ttl_hours in
+    <cache_dir>/<source>/_negative.json and re-raised from there without
+    throttling or fetching; 0 disables negative caching. A None return is
+    never remembered (it may only mean a missing file or API key), and csv
+    loaders are not negative-cached.
+
+    max_bytes caps the size of the whole cache_dir (default: STOCK_CACHE_MAX_BYTES,
+    0/None = unlimited). Hits record their access time, and a write that takes
+    the cache over budget evicts least-recently-used entries.
+
+    Safe to share a cache_dir between processes (web workers, CLI, refresher):
+    the throttle, the size counter and per-symbol fetches are coordinated via
+    stock.data.shared, and files are replaced atomically.
     """
+    from .shared import get_shared  # sqlite3 only when a loader is built, not for `cache stats`
+
     src = (source or "misc").lower()
+    interval = check_interval(interval)
+    intraday = is_intraday(interval)
     base = os.path.join(cache_dir, src)
     os.makedirs(base, exist_ok=True)
     ttl_secs = max(0, ttl_hours) * 3600
-    last_call = 0.0
+    negative = NegativeCache(src, cache_dir, ttl_hours=negative_ttl_hours) if negative_ttl_hours > 0 and src not in NO_NEGATIVE_SOURCES else None
+    budget = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    shared = get_shared(cache_dir)
+
+    def _account(delta: int) -> None:
+        # One byte counter for every process sharing cache_dir; seeded by a scan
+        used = shared.add_usage(delta)
+        if used is None:
+            used = sum(e["bytes"] for e in scan_cache(cache_dir))
+            shared.set_usage(used)
+        if used > budget:
+            with shared.lease("evict", ttl=300.0) as mine:
+                if not mine:
+                    return  # another process is already evicting
+                evicted = evict_lru(cache_dir, int(budget * EVICT_TARGET))
+                METRICS.inc("cache_evictions_total", len(evicted), source=src)
+                shared.set_usage(sum(e["bytes"] for e in scan_cache(cache_dir)))
 
-    def _load(symbol: str) -> Optional[Dict[str, List]]:
-        nonlocal last_call
+    def _read_fresh(path: str) -> Optional[TimeSeries]:
+        mtime = os.path.getmtime(path)
+        if time.time() - mtime > ttl_secs:
+            return None
+        with METRICS.timer("stage_seconds", stage="cache_decode", source=src):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            ts = _decode_timeseries(data)
+        # Record the access for LRU eviction; mtime stays the fetch time used by the TTL
+        os.utime(path, (time.time(), mtime))
+        return ts
+
+    def _load(symbol: str) -> Optional[TimeSeries]:
         sym = symbol.upper().strip()
-        path = os.path.join(base, f"{sym}.json")
+        key = series_key(sym, interval)  # negative cache and lease key
+        path = cache_path(cache_dir, src, sym, interval)
 
         # Try cache first
         try:
-            if os.path.exists(path) and (time.time() - os.path.getmtime(path) <= ttl_secs):
-                with open(path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                return _decode_timeseries(data)
+            if os.path.exists(path):
+                ts = _read_fresh(path)
+                if ts is not None:
+                    METRICS.inc("cache_requests_total", source=src, result="hit")
+                    return ts
+                METRICS.inc("cache_requests_total", source=src, result="stale")
+            else:
+                METRICS.inc("cache_requests_total", source=src, result="miss")
         except Exception:
-            pass
+            METRICS.inc("cache_requests_total", source=src, result="error")
 
-        # Throttle
-        now = time.time()
-        wait = (throttle_ms / 1000.0) - (now - last_call)
-        if wait > 0:
-            time.sleep(wait)
-        last_call = time.time()
+        _check_negative(key)
+
+        # Single-flight: while another worker fetches this symbol, wait for it and reuse its result
+        with shared.lease(f"fetch:{src}:{key}", ttl=FETCH_LEASE_SECONDS, wait=FETCH_LEASE_SECONDS):
+            try:
+                if os.path.exists(path):
+                    ts = _read_fresh(path)
+                    if ts is not None:
+                        METRICS.inc("cache_requests_total", source=src, result="shared")
+                        return ts
+            except Exception:
+                pass
+            _check_negative(key)
+            return _fetch(sym, key, path)
+
+    def _check_negative(key: str) -> None:
+        if negative is not None:
+            entry = negative.get(key)
+            if entry is not None:
+                METRICS.inc("cache_requests_total", source=src, result="negative")
+                raise FetchError(entry["kind"], f"{entry.get('message') or entry['kind']} (negative cache)", src)
+
+    def _fetch(sym: str, key: str, path: str) -> Optional[TimeSeries]:
+        # Throttle: slots are shared by every process using this cache_dir
+        shared.throttle(src, throttle_ms / 1000.0)
 
-        ts = inner_loader(sym)
+        try:
+            with METRICS.timer("stage_seconds", stage="fetch", source=src):
+                ts = inner_loader(sym)
+        except FetchError as e:
+            METRICS.inc("fetch_errors_total", source=src, kind=e.kind)
+            if negative is not None and e.kind in NEGATIVE_KINDS:
+                negative.put(key, e.kind, str(e))
+            raise
+        if ts and not isinstance(ts, TimeSeries):
+            ts = TimeSeries.from_dict(ts, interval=interval)
+        if ts and intraday:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    old: Optional[TimeSeries] = _decode_timeseries(json.load(f))
+            except Exception:
+                old = None
+            ts = _merge_intraday(old, ts, INTRADAY_RETENTION_DAYS)
         if ts:
+            if negative is not None and negative.has(key, include_expired=True):
+                # Drops an expired entry so a later failure starts a fresh count
+                negative.clear([key])
             try:
-                with open(path, "w", encoding="utf-8") as f:
-                    json.dump(_encode_timeseries(ts), f)
+                old_size = os.path.getsize(path) if os.path.exists(path) else 0
+                with METRICS.timer("stage_seconds", stage="cache_write", source=src):
+                    _atomic_write(path, json.dumps(_encode_timeseries(ts), separators=(",", ":")))
+                if budget:
+                    _account(os.path.getsize(path) - old_size)
             except Exception:
                 pass
+        else:
+            METRICS.inc("fetch_empty_total", source=src)
         return ts
 
     return _load
 
+
+def scan_cache(cache_dir: str = ".cache", source: Optional[str] = None) -> List[Dict]:
+    """List cache files as dicts: path, source, symbol, interval, kind, bytes, mtime, atime.
+
+    kind is 'series' (<SYMBOL>.json or <SYMBOL>@<interval>.json), 'state'
+    (<SYMBOL>[@<interval>].state.json), 'negative' (_negative.json) or 'other'
+    (e.g. other _-prefixed files).
+    """
+    out: List[Dict] = []
+    if not os.path.isdir(cache_dir):
+        return out
+    sources = [source.lower()] if source else sorted(os.listdir(cache_dir))
+    for src in sources:
+        if src in NON_SOURCE_DIRS:
+            continue
+        base = os.path.join(cache_dir, src)
+        if not os.path.isdir(base):
+            continue
+        with os.scandir(base) as it:
+            for entry in it:
+                if not entry.is_file():
+                    continue
+                name = entry.name
+                interval = None
+                if name == NEGATIVE_FILE:
+                    kind, symbol = "negative", None
+                elif name.startswith("_") or name.endswith(".tmp"):
+                    kind, symbol = "other", None
+                elif name.endswith(STATE_SUFFIX):
+                    kind = "state"
+                    symbol, interval = split_series_key(name[: -len(STATE_SUFFIX)])
+                elif name.endswith(".json"):
+                    kind = "series"
+                    symbol, interval = split_series_key(name[: -len(".json")])
+                else:
+                    kind, symbol = "other", None
+                st = entry.stat()
+                out.append({
+                    "path": entry.path,
+                    "source": src,
+                    "symbol": symbol,
+                    "interval": interval,
+                    "kind": kind,
+                    "bytes": st.st_size,
+                    "mtime": st.st_mtime,
+                    "atime": st.st_atime,
+                })
+    return out
+
+
+# Upper bounds (hours) of the age histogram buckets in cache_stats
+AGE_BUCKETS = ((1, "<1h"), (6, "1-6h"), (24, "6-24h"), (24 * 7, "1-7d"), (float("inf"), ">7d"))
+
+
+def cache_stats(cache_dir: str = ".cache", source: Optional[str] = None) -> Dict[str, Dict]:
+    """Per-source totals: files, bytes, series entries and a series age histogram (by fetch time)."""
+    now = time.time()
+    stats: Dict[str, Dict] = {}
+    for e in scan_cache(cache_dir, source):
+        s = stats.setdefault(e["source"], {"files": 0, "bytes": 0, "entries": 0, "ages": {label: 0 for _h, label in AGE_BUCKETS}})
+        s["files"] += 1
+        s["bytes"] += e["bytes"]
+        if e["kind"] == "series":
+            s["entries"] += 1
+            age_h = (now - e["mtime"]) / 3600.0
+            label = next(label for hours, label in AGE_BUCKETS if age_h < hours)
+            s["ages"][label] += 1
+    return stats
+
+
+def _remove_entry(e: Dict, dry_run: bool) -> List[Dict]:
+    """Remove a series file together with its indicator state; returns the removed files."""
+    removed = [e]
+    if e["kind"] == "series":
+        state = e["path"][: -len(".json")] + STATE_SUFFIX
+        if os.path.exists(state):
+            removed.append({"path": state, "source": e["source"], "symbol": e["symbol"], "interval": e["interval"], "kind": "state", "bytes": os.path.getsize(state)})
+    if not dry_run:
+        for r in removed:
+            try:
+                os.remove(r["path"])
+            except OSError:
+                pass
+    return removed
+
+
+def evict_lru(cache_dir: str, max_bytes: int, source: Optional[str] = None, dry_run: bool = False, skip: Iterable[str] = ()) -> List[Dict]:
+    """Remove least-recently-used series (and their state) until the cache fits max_bytes.
+
+    skip: paths to treat as already removed (lets prune_cache dry runs chain).
+    """
+    gone = set(skip)
+    entries = [e for e in scan_cache(cache_dir, source) if e["path"] not in gone]
+    total = sum(e["bytes"] for e in entries)
+    removed: List[Dict] = []
+    for e in sorted((e for e in entries if e["kind"] == "series"), key=lambda e: max(e["atime"], e["mtime"])):
+        if total <= max_bytes:
+            break
+        for r in _remove_entry(e, dry_run):
+            total -= r["bytes"]
+            removed.append(r)
+    return removed
+
+
+def prune_cache(cache_dir: str = ".cache", older_than_hours: Optional[float] = None, max_bytes: Optional[int] = None, source: Optional[str] = None, dry_run: bool = False) -> List[Dict]:
+    """Remove series fetched more than older_than_hours ago, then evict LRU down to max_bytes."""
+    removed: List[Dict] = []
+    if older_than_hours is not None:
+        cutoff = time.time() - older_than_hours * 3600
+        for e in scan_cache(cache_dir, source):
+            if e["kind"] == "series" and e["mtime"] < cutoff:
+                removed.extend(_remove_entry(e, dry_run))
+    if max_bytes is not None:
+        removed.extend(evict_lru(cache_dir, max_bytes, source, dry_run, skip=[r["path"] for r in removed]))
+    return removed
+
+
+def _check_series(data: Dict) -> Optional[str]:
+    try:
+        ts = _decode_timeseries(data)
+    except Exception as e:
+        return f"undecodable: {e}"
+    n = len(ts["date"])
+    for k in COLUMNS:
+        if len(ts[k]) != n:
+            return f"column '{k}' has {len(ts[k])} values, expected {n}"
+    if n == 0:
+        return "empty series"
+    dates = ts["date"]
+    if any(b <= a for a, b in zip(dates, dates[1:])):
+        return "dates not strictly increasing"
+    return None
+
+
+def verify_cache(cache_dir: str = ".cache", source: Optional[str] = None, repair: bool = False) -> List[Dict]:
+    """Check every cache file; returns [{path, problem}]. repair=True deletes broken files."""
+    problems: List[Dict] = []
+    for e in scan_cache(cache_dir, source):
+        if e["kind"] == "other":
+            continue
+        try:
+            with open(e["path"], "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as ex:
+            problem: Optional[str] = f"unreadable JSON: {ex}"
+        else:
+            if not isinstance(data, dict):
+                problem = "not a JSON object"
+            elif e["kind"] == "series":
+                problem = _check_series(data)
+            else:
+                problem = None
+        if problem:
+            problems.append({"path": e["path"], "problem": problem})
+            if repair:
+                _remove_entry(e, dry_run=False)
+    return problems
+
+
+def compact_cache(cache_dir: str = ".cache", source: Optional[str] = None, negative_ttl_hours: float = 6) -> Dict[str, int]:
+    """Rewrite series in the current compact format, drop orphaned state and expired negative entries.
+
+    Legacy (ISO date, dict-of-lists) entries are converted; each file keeps its
+    mtime so TTLs are unaffected. Unreadable files are left for verify.
+    """
+    result = {"rewritten": 0, "orphans_removed": 0, "bytes_before": 0, "bytes_after": 0}
+    entries = scan_cache(cache_dir, source)
+    # Resampled entries (<SYMBOL>@1wk~1d.json) also own the state of their timeframe
+    series = {(e["source"], e["symbol"], e["interval"].split("~")[0]) for e in entries if e["kind"] == "series"}
+    for e in entries:
+        result["bytes_before"] += e["bytes"]
+        if e["kind"] == "state" and (e["source"], e["symbol"], e["interval"]) not in series:
+            _remove_entry(e, dry_run=False)
+            result["orphans_removed"] += 1
+            continue
+        if e["kind"] == "negative":
+            # Re-saving drops expired entries (and removes the file when none are left)
+            neg = NegativeCache(e["source"], cache_dir, ttl_hours=negative_ttl_hours)
+            with neg._lock:
+                neg._save()
+        elif e["kind"] == "series":
+            try:
+                with open(e["path"], "r", encoding="utf-8") as f:
+                    raw = f.read()
+                data = json.loads(raw)
+                packed = _encode_timeseries(_decode_timeseries(data))
+                if "base_mtime" in data:
+                    # Resampled entries stay tied to the base entry they were built from
+                    packed["base_mtime"] = data["base_mtime"]
+                encoded = json.dumps(packed, separators=(",", ":"))
+            except Exception:
+                continue
+            if encoded != raw:
+                _atomic_write(e["path"], encoded)
+                os.utime(e["path"], (e["atime"], e["mtime"]))
+                result["rewritten"] += 1
+    result["bytes_after"] = sum(e["bytes"] for e in scan_cache(cache_dir, source))
+    return result
+
+
+class NegativeCache:
+    """Remember symbols that failed for symbol-level reasons, with their own TTL.
+
+    Layout: <cache_dir>/<source>/_negative.json holding
+    {SYMBOL: {"kind", "message", "ts", "count"}}; count is how many fetches
+    have failed in a row. Expired entries are ignored and dropped on write.
+    The file is re-read when another process changes it, and updates are
+    serialized across processes through a shared lease.
+    """
+
+    def __init__(self, source: str, cache_dir: str = ".cache", ttl_hours: float = 6) -> None:
+        self.base = os.path.join(cache_dir, (source or "misc").lower())
+        os.makedirs(self.base, exist_ok=True)
+        self.path = os.path.join(self.base, NEGATIVE_FILE)
+        self.ttl_secs = max(0.0, ttl_hours) * 3600
+        self._cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict]] = None
+        self._mtime: Optional[float] = None
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            mtime: Optional[float] = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        if self._entries is None or mtime != self._mtime:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self._entries = data if isinstance(data, dict) else {}
+            except Exception:
+                self._entries = {}
+            self._mtime = mtime
+        return self._entries
+
+    def _update(self, fn: Callable[[Dict[str, Dict]], int]) -> int:
+        """Apply fn to the freshest entries and save if it reports a change (read-modify-write across processes)."""
+        from .shared import get_shared
+
+        name = "negative:" + os.path.basename(self.base)
+        with self._lock, get_shared(self._cache_dir).lease(name, ttl=30.0, wait=10.0):
+            self._entries = None  # always re-read: mtime granularity can hide a concurrent write
+            changed = fn(self._load())
+            if changed:
+                self._save()
+        return changed
+
+    def _save(self) -> None:
+        now = time.time()
+        live = {k: v for k, v in self._load().items() if now - v.get("ts", 0) <= self.ttl_secs}
+        self._entries = live
+        try:
+            if live:
+                _atomic_write(self.path, json.dumps(live, indent=1, sort_keys=True))
+            elif os.path.exists(self.path):
+                os.remove(self.path)
+            self._mtime = os.path.getmtime(self.path) if live else None
+        except Exception:
+            pass
+
+    def get(self, symbol: str) -> Optional[Dict]:
+        """Return the live entry for symbol, or None."""
+        with self._lock:
+            entry = self._load().get(symbol.upper().strip())
+        if entry is None or time.time() - entry.get("ts", 0) > self.ttl_secs:
+            return None
+        return entry
+
+    def has(self, symbol: str, include_expired: bool = False) -> bool:
+        """Whether symbol has an entry, checked against the mtime-cached file without taking the shared lease."""
+        with self._lock:
+            entry = self._load().get(symbol.upper().strip())
+        return entry is not None and (include_expired or time.time() - entry.get("ts", 0) <= self.ttl_secs)
+
+    def put(self, symbol: str, kind: str, message: str = "") -> None:
+        sym = symbol.upper().strip()
+
+        def _put(entries: Dict[str, Dict]) -> int:
+            prev = entries.get(sym) or {}
+            entries[sym] = {"kind": kind, "message": message[:200], "ts": time.time(), "count": int(prev.get("count", 0)) + 1}
+            return 1
+
+        self._update(_put)
+
+    def entries(self, include_expired: bool = False) -> List[Dict]:
+        """All entries as dicts with symbol and age_hours, newest first."""
+        now = time.time()
+        with self._lock:
+            items = list(self._load().items())
+        out = []
+        for sym, entry in items:
+            age = now - entry.get("ts", 0)
+            if age > self.ttl_secs and not include_expired:
+                continue
+            out.append({"symbol": sym, "age_hours": age / 3600.0, "expired": age > self.ttl_secs, **entry})
+        out.sort(key=lambda e: e.get("ts", 0), reverse=True)
+        return out
+
+    def clear(self, symbols: Optional[List[str]] = None) -> int:
+        """Drop the given symbols (default: all); return how many were removed."""
+
+        def _clear(entries: Dict[str, Dict]) -> int:
+            if symbols is None:
+                removed = len(entries)
+                entries.clear()
+                return removed
+            return sum(1 for sym in symbols if entries.pop(sym.upper().strip(), None) is not None)
+
+        return self._update(_clear)
+
+
+class IndicatorStateStore:
+    """Persist online indicator state next to the cached series.
+
+    Layout: <cache_dir>/<source>/<SYMBOL>.state.json (<SYMBOL>@<interval>.state.json
+    intraday) holding {key: state_dict} where key identifies the indicator and
+    its parameters (e.g. "sma_crossover:50:200").
+    """
+
+    def __init__(self, source: str, cache_dir: str = ".cache", interval: str = DAILY) -> None:
+        self.base = os.path.join(cache_dir, (source or "misc").lower())
+        self.interval = check_interval(interval)
+        os.makedirs(self.base, exist_ok=True)
+
+    def _path(self, symbol: str) -> str:
+        return os.path.join(self.base, f"{series_key(symbol, self.interval)}{STATE_SUFFIX}")
+
+    def _read(self, symbol: str) -> Dict:
+        try:
+            with open(self._path(symbol), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
+    def get(self, symbol: str, key: str) -> Optional[Dict]:
+        return self._read(symbol).get(key)
+
+    def put(self, symbol: str, key: str, state: Dict) -> None:
+        data = self._read(symbol)
+        data[key] = state
+        try:
+            _atomic_write(self._path(symbol), json.dumps(data))
+        except Exception:
+            pass
@@ -1,41 +1,80 @@
 import csv
 import os
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Optional, Tuple
+
+from .timeseries import DAILY, TimeSeries, TimeSeriesBuilder, check_interval, is_intraday, time_key
 
 
 Row = Dict[str, object]
 
+# Accepted names of the time column (intraday exports often call it Datetime)
+TIME_COLUMNS = ("date", "datetime", "timestamp")
+
+
+def csv_dir(data_dir: str, interval: str = DAILY) -> str:
+    """Folder holding the CSVs for interval: data_dir itself for daily bars, data_dir/<interval>/ otherwise."""
+    interval = check_interval(interval)
+    return data_dir if interval == DAILY else os.path.join(data_dir, interval)
+
+
+# folder -> (mtime, {lower-case file name: file name}); rebuilt when the folder changes
+_LISTINGS: Dict[str, Tuple[float, Dict[str, str]]] = {}
+
 
-def load_symbol_csv(symbol: str, data_dir: str) -> Optional[Dict[str, List]]:
+def find_csv(symbol: str, folder: str) -> Optional[str]:
+    """Path of <folder>/<symbol>.csv, matching the file name case-insensitively.
+
+    Symbols are upper-cased by the cache and the UIs while files are often
+    lower-case (data/aapl.csv); on case-sensitive filesystems the name is
+    looked up in a per-folder listing instead of listing the folder per symbol.
+    """
+    path = os.path.join(folder, f"{symbol}.csv")
+    if os.path.exists(path):
+        return path
+    try:
+        mtime = os.path.getmtime(folder)
+        cached = _LISTINGS.get(folder)
+        if cached is None or cached[0] != mtime:
+            cached = _LISTINGS[folder] = (mtime, {name.lower(): name for name in os.listdir(folder)})
+    except OSError:
+        return None
+    name = cached[1].get(f"{symbol}.csv".lower())
+    return os.path.join(folder, name) if name else None
+
+
+def load_symbol_csv(symbol: str, data_dir: str, interval: str = DAILY) -> Optional[TimeSeries]:
     """
-    Load OHLCV for a symbol from <data_dir>/<symbol>.csv
-    Columns: Date, Open, High, Low, Close, Volume
-    Returns dict of lists: date (datetime.date), open, high, low, close (float), volume (int)
+    Load OHLCV for a symbol from <data_dir>/<symbol>.csv (intraday: <data_dir>/<interval>/<symbol>.csv)
+    Columns: Date (or Datetime/Timestamp), Open, High, Low, Close, Volume
+    Returns a TimeSeries: date (ordinal, or Unix seconds intraday), open, high, low, close (float), volume (int)
+    Intraday timestamps without a UTC offset are taken as UTC.
     """
-    path = os.path.join(data_dir, f"{symbol}.csv")
-    if not os.path.exists(path):
+    interval = check_interval(interval)
+    intraday = is_intraday(interval)
+    path = find_csv(symbol, csv_dir(data_dir, interval))
+    if path is None:
         return None
 
-    dates: List = []
-    opens: List[float] = []
-    highs: List[float] = []
-    lows: List[float] = []
-    closes: List[float] = []
-    vols: List[int] = []
+    builder = TimeSeriesBuilder()
 
     with open(path, "r", newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         # Normalize headers by lower-casing
         field_map = {name.lower(): name for name in reader.fieldnames or []}
-        required = ["date", "open", "high", "low", "close", "volume"]
-        if not all(col in field_map for col in required):
+        time_col = next((field_map[c] for c in TIME_COLUMNS if c in field_map), None)
+        required = ["open", "high", "low", "close", "volume"]
+        if time_col is None or not all(col in field_map for col in required):
             return None
 
         for row in reader:
             try:
-                d = row[field_map["date"]]
-                dt = datetime.strptime(d.strip(), "%Y-%m-%d").date()
+                d = row[time_col].strip()
+                if intraday:
+                    key = time_key(d, interval)
+                else:
+                    # Accept plain dates and timestamps such as "2022-02-01 00:00:00-05:00"
+                    key = datetime.strptime(d[:10], "%Y-%m-%d").date().toordinal()
                 o = float(row[field_map["open"]])
                 h = float(row[field_map["high"]])
                 l = float(row[field_map["low"]])
@@ -46,22 +85,9 @@ def load_symbol_csv(symbol: str, data_dir: str) -> Optional[Dict[str, List]]:
                 # Skip malformed rows
                 continue
 
-            dates.append(dt)
-            opens.append(o)
-            highs.append(h)
-            lows.append(l)
-            closes.append(c)
-            vols.append(v)
+            builder.append(key, o, h, l, c, v)
 
-    if not dates:
+    if not len(builder):
         return None
 
-    return {
-        "date": dates,
-        "open": opens,
-        "high": highs,
-        "low": lows,
-        "close": closes,
-        "volume": vols,
-    }
-
+    return builder.build(interval=interval)
@@ -0,0 +1,170 @@
+import csv
+import heapq
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..metrics import METRICS
+from .resilience import FetchError
+
+LISTING_TTL_HOURS = 24
+# Longest a LISTING_STATUS download may hold the shared lease (and others wait for it)
+LISTING_LEASE_SECONDS = 120.0
+FIELDS = ("symbol", "name", "exchange", "assetType", "ipoDate", "delistingDate", "status")
+
+
+def listing_path(cache_dir: str, state: str) -> str:
+    # Leading underscore keeps it out of the per-symbol series namespace (and LRU eviction)
+    return os.path.join(cache_dir, "alphavantage", f"_listing_{(state or 'active').lower()}.csv")
+
+
+class ListingIndex:
+    """LISTING_STATUS rows indexed by symbol, exchange and asset type.
+
+    Rows keep the listing's (alphabetical) order; each exchange/asset-type
+    index is a sorted list of row positions, so a filtered query lazily merges
+    the matching lists and stops as soon as `limit` symbols are found.
+    """
+
+    def __init__(self, rows: List[Dict[str, str]]) -> None:
+        self.rows = rows
+        self.by_symbol: Dict[str, int] = {}
+        self.by_exchange: Dict[str, List[int]] = {}
+        self.by_asset: Dict[str, List[int]] = {}
+        self._sets: Dict[Tuple, frozenset] = {}
+        for i, row in enumerate(rows):
+            self.by_symbol.setdefault(row["symbol"], i)
+            self.by_exchange.setdefault(row["exchange"], []).append(i)
+            self.by_asset.setdefault(row["assetType"], []).append(i)
+
+    @classmethod
+    def from_csv(cls, text: str) -> "ListingIndex":
+        rows = []
+        for raw in csv.DictReader(text.splitlines()):
+            sym = (raw.get("symbol") or "").strip().upper()
+            if not sym:
+                continue
+            row = {k: (raw.get(k) or "").strip() for k in FIELDS}
+            row["symbol"] = sym
+            row["exchange"] = row["exchange"].upper()
+            row["assetType"] = row["assetType"].upper()
+            row["status"] = row["status"].lower()
+            rows.append(row)
+        return cls(rows)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def get(self, symbol: str) -> Optional[Dict[str, str]]:
+        i = self.by_symbol.get(symbol.upper().strip())
+        return self.rows[i] if i is not None else None
+
+    def _lists(self, index: Dict[str, List[int]], keys: Optional[Iterable[str]]) -> Optional[List[List[int]]]:
+        if not keys:
+            return None
+        return [index.get(k.strip().upper(), []) for k in keys]
+
+    def _members(self, name: str, keys: Iterable[str], lists: List[List[int]]) -> frozenset:
+        key = (name, tuple(sorted(k.strip().upper() for k in keys)))
+        members = self._sets.get(key)
+        if members is None:
+            members = self._sets[key] = frozenset(i for l in lists for i in l)
+        return members
+
+    def query(self, exchanges: Optional[Iterable[str]] = None, asset_types: Optional[Iterable[str]] = None, status: Optional[str] = None, limit: Optional[int] = None) -> List[str]:
+        """Symbols matching every given filter, in listing order, at most `limit`."""
+        by_exch = self._lists(self.by_exchange, exchanges)
+        by_asset = self._lists(self.by_asset, asset_types)
+        member: Optional[frozenset] = None
+        if by_exch is not None and by_asset is not None:
+            # Walk the shorter side lazily; test membership in a cached set of the other
+            if sum(map(len, by_exch)) <= sum(map(len, by_asset)):
+                walk, member = by_exch, self._members("asset", asset_types, by_asset)
+            else:
+                walk, member = by_asset, self._members("exchange", exchanges, by_exch)
+        else:
+            walk = by_exch if by_exch is not None else by_asset
+        positions: Iterable[int] = range(len(self.rows)) if walk is None else heapq.merge(*walk)
+        out: List[str] = []
+        for i in positions:
+            if member is not None and i not in member:
+                continue
+            row = self.rows[i]
+            if status and row["status"] and row["status"] != status:
+                continue
+            out.append(row["symbol"])
+            if limit is not None and len(out) >= limit:
+                break
+        return out
+
+    def exchanges(self) -> Dict[str, int]:
+        return {k: len(v) for k, v in sorted(self.by_exchange.items())}
+
+    def asset_types(self) -> Dict[str, int]:
+        return {k: len(v) for k, v in sorted(self.by_asset.items())}
+
+
+# path -> (mtime, index); parsed listings are shared by every caller in the process
+_INDEXES: Dict[str, Tuple[float, ListingIndex]] = {}
+_LOCK = threading.Lock()
+
+
+def _read_index(path: str) -> ListingIndex:
+    mtime = os.path.getmtime(path)
+    with _LOCK:
+        hit = _INDEXES.get(path)
+        if hit is not None and hit[0] == mtime:
+            return hit[1]
+    with open(path, "r", encoding="utf-8") as f:
+        index = ListingIndex.from_csv(f.read())
+    with _LOCK:
+        _INDEXES[path] = (mtime, index)
+    return index
+
+
+def _mtime(path: str) -> Optional[float]:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def load_listing(api_key: str, state: str = "active", cache_dir: str = ".cache", ttl_hours: float = LISTING_TTL_HOURS, refresh: bool = False) -> Optional[ListingIndex]:
+    """Return the LISTING_STATUS index, downloading it only when the cached copy is missing or older than ttl_hours.
+
+    The raw CSV is kept at <cache_dir>/alphavantage/_listing_<state>.csv. If a
+    download fails, a stale copy is used rather than nothing. Returns None only
+    when there is neither.
+
+    Downloads are single-flight across processes sharing cache_dir: a worker
+    that finds another one downloading waits for it and reads its copy.
+    """
+    from .cache import _atomic_write
+    from .shared import get_shared
+
+    path = listing_path(cache_dir, state)
+    mtime = _mtime(path)
+    fresh = mtime is not None and time.time() - mtime <= ttl_hours * 3600
+    if fresh and not refresh:
+        METRICS.inc("listing_requests_total", result="hit")
+        return _read_index(path)
+
+    from .alpha_vantage import fetch_listing_csv
+
+    with get_shared(cache_dir).lease(f"listing:{(state or 'active').lower()}", ttl=LISTING_LEASE_SECONDS, wait=LISTING_LEASE_SECONDS):
+        # Another worker may have downloaded it while we waited for the lease
+        current = _mtime(path)
+        if current is not None and current != mtime and time.time() - current <= ttl_hours * 3600:
+            METRICS.inc("listing_requests_total", result="shared")
+            return _read_index(path)
+        try:
+            text = fetch_listing_csv(api_key, state=state)
+        except FetchError:
+            METRICS.inc("listing_requests_total", result="error")
+            return _read_index(path) if os.path.exists(path) else None
+        METRICS.inc("listing_requests_total", result="fetch")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _atomic_write(path, text)
+    return _read_index(path)
+
@@ -0,0 +1,278 @@
+"""Local stand-in for the Yahoo chart and Alpha Vantage endpoints.
+
+Serves payloads generated from the CSVs in a data directory so parallel fetching,
+throttling and retries can be load-tested offline and deterministically:
+
+    python -m stock.data.mock_server --data-dir data --port 8765 --latency-ms 50 --rate-limit 5
+    STOCK_YAHOO_BASE_URL=http://127.0.0.1:8765 STOCK_ALPHAVANTAGE_BASE_URL=http://127.0.0.1:8765 \
+        python main.py --source yahoo --symbols AAPL,AMZN
+
+Routes: GET /v8/finance/chart/<SYMBOL>, GET /query?function=TIME_SERIES_DAILY[_ADJUSTED]|LISTING_STATUS,
+GET /__stats (request counters as JSON).
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+from datetime import date, datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from ..utils import discover_symbols
+from .csv_provider import load_symbol_csv
+from .timeseries import TimeSeries
+
+# Calendar days covered by Yahoo range strings
+_RANGE_DAYS = {"1d": 1, "5d": 5, "1mo": 31, "3mo": 92, "6mo": 183, "1y": 366, "2y": 731, "5y": 1827, "10y": 3653, "ytd": 366}
+
+
+class MockMarket:
+    """Series store plus fault injection shared by all request handlers."""
+
+    def __init__(
+        self,
+        series: Dict[str, TimeSeries],
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        rate_limit: int = 0,
+        rate_window: float = 60.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.series = {k.upper(): v for k, v in series.items()}
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._recent: Deque[float] = deque()
+        self.stats: Dict[str, int] = {"requests": 0, "ok": 0, "rate_limited": 0, "errors": 0, "not_found": 0}
+
+    @classmethod
+    def from_data_dir(cls, data_dir: str, **kwargs) -> "MockMarket":
+        series = {}
+        for sym in discover_symbols(data_dir):
+            ts = load_symbol_csv(sym, data_dir)
+            if ts:
+                series[sym] = ts
+        return cls(series, **kwargs)
+
+    def admit(self) -> Tuple[str, float]:
+        """Decide the fate of one request: ('ok'|'rate_limited'|'error', delay_seconds)."""
+        with self._lock:
+            self.stats["requests"] += 1
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0
+            now = time.monotonic()
+            if self.rate_limit > 0:
+                while self._recent and now - self._recent[0] > self.rate_window:
+                    self._recent.popleft()
+                if len(self._recent) >= self.rate_limit:
+                    self.stats["rate_limited"] += 1
+                    return "rate_limited", delay
+                self._recent.append(now)
+            if self.error_rate > 0 and self._rng.random() < self.error_rate:
+                self.stats["errors"] += 1
+                return "error", delay
+            return "ok", delay
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def retry_after(self) -> int:
+        with self._lock:
+            if not self._recent:
+                return 1
+            return max(1, int(self.rate_window - (time.monotonic() - self._recent[0])) + 1)
+
+    def get(self, symbol: str) -> Optional[TimeSeries]:
+        return self.series.get(symbol.upper())
+
+
+def _epoch(ordinal: int) -> int:
+    d = date.fromordinal(ordinal)
+    return int(datetime(d.year, d.month, d.day, tzinfo=timezone.utc).timestamp())
+
+
+def chart_payload(symbol: str, ts: TimeSeries, range_: str) -> Dict:
+    days = _RANGE_DAYS.get(range_)
+    if days is not None and ts:
+        cutoff = ts["date"][-1] - days
+        start = next((i for i, d in enumerate(ts["date"]) if d > cutoff), len(ts))
+        ts = ts[start:]
+    closes = ts["close"].tolist()
+    return {
+        "chart": {
+            "result": [{
+                "meta": {"currency": ts.currency or "USD", "symbol": symbol, "dataGranularity": "1d", "range": range_},
+                "timestamp": [_epoch(d) for d in ts["date"]],
+                "indicators": {
+                    "quote": [{
+                        "open": ts["open"].tolist(),
+                        "high": ts["high"].tolist(),
+                        "low": ts["low"].tolist(),
+                        "close": closes,
+                        "volume": ts["volume"].tolist(),
+                    }],
+                    "adjclose": [{"adjclose": closes}],
+                },
+            }],
+            "error": None,
+        }
+    }
+
+
+def daily_payload(symbol: str, ts: TimeSeries, function: str, outputsize: str) -> Dict:
+    if outputsize != "full":
+        ts = ts[-100:]
+    adjusted = function.endswith("ADJUSTED")
+    rows = {}
+    for d, o, h, l, c, v in zip(ts.dates(), ts["open"], ts["high"], ts["low"], ts["close"], ts["volume"]):
+        row = {"1. open": f"{o:.4f}", "2. high": f"{h:.4f}", "3. low": f"{l:.4f}", "4. close": f"{c:.4f}"}
+        if adjusted:
+            row.update({"5. adjusted close": f"{c:.4f}", "6. volume": str(v)})
+        else:
+            row["5. volume"] = str(v)
+        rows[d.isoformat()] = row
+    # Alpha Vantage lists newest first
+    rows = dict(sorted(rows.items(), reverse=True))
+    return {"Meta Data": {"2. Symbol": symbol, "4. Output Size": outputsize.title()}, "Time Series (Daily)": rows}
+
+
+def listing_csv(market: MockMarket, state: str) -> str:
+    lines = ["symbol,name,exchange,assetType,ipoDate,delistingDate,status"]
+    if state == "active":
+        for i, (sym, ts) in enumerate(sorted(market.series.items())):
+            first = ts.first_date()
+            exch = "NASDAQ" if i % 2 == 0 else "NYSE"
+            lines.append(f"{sym},{sym} Inc,{exch},Stock,{first.isoformat() if first else ''},null,Active")
+    return "\n".join(lines) + "\n"
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    market: MockMarket  # set on the server-specific subclass
+    server_version = "StockMock/1.0"
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _send(self, status: int, body: str, content_type: str = "application/json", headers: Optional[Dict[str, str]] = None) -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        qs = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if url.path == "/__stats":
+            self._send(200, json.dumps(self.market.stats))
+            return
+        is_chart = url.path.startswith("/v8/finance/chart/")
+        if not is_chart and url.path != "/query":
+            self._send(404, json.dumps({"error": "unknown route"}))
+            return
+
+        fate, delay = self.market.admit()
+        if delay:
+            time.sleep(delay)
+        if fate == "error":
+            self._send(500, json.dumps({"error": "injected failure"}))
+            return
+        if fate == "rate_limited":
+            if is_chart:
+                self._send(429, "Too Many Requests", "text/plain", {"Retry-After": str(self.market.retry_after())})
+            else:
+                # Alpha Vantage signals throttling with HTTP 200 and a Note
+                self._send(200, json.dumps({"Note": "Thank you for using Alpha Vantage! Our standard API call frequency is 5 calls per minute."}))
+            return
+
+        if is_chart:
+            symbol = url.path.rsplit("/", 1)[-1]
+            ts = self.market.get(symbol)
+            if not ts:
+                self.market.count("not_found")
+                err = {"chart": {"result": None, "error": {"code": "Not Found", "description": "No data found, symbol may be delisted"}}}
+                self._send(404, json.dumps(err))
+                return
+            self.market.count("ok")
+            self._send(200, json.dumps(chart_payload(symbol.upper(), ts, qs.get("range", "1y"))))
+            return
+
+        function = qs.get("function", "").upper()
+        if function == "LISTING_STATUS":
+            self.market.count("ok")
+            self._send(200, listing_csv(self.market, qs.get("state", "active")), "text/csv")
+            return
+        if function in ("TIME_SERIES_DAILY", "TIME_SERIES_DAILY_ADJUSTED"):
+            symbol = qs.get("symbol", "")
+            ts = self.market.get(symbol)
+            if not ts:
+                self.market.count("not_found")
+                self._send(200, json.dumps({"Error Message": f"Invalid API call. Please retry or visit the documentation for {function}."}))
+                return
+            self.market.count("ok")
+            self._send(200, json.dumps(daily_payload(symbol.upper(), ts, function, qs.get("outputsize", "compact"))))
+            return
+        self._send(200, json.dumps({"Error Message": f"Unsupported function '{function}'"}))
+
+
+def make_server(market: MockMarket, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Create (not start) a threaded server; port=0 picks a free port (see server.server_address)."""
+    handler = type("BoundMockHandler", (MockHandler,), {"market": market})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_thread(market: MockMarket, host: str = "127.0.0.1", port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Start a server on a daemon thread and return (server, base_url)."""
+    server = make_server(market, host, port)
+    threading.Thread(target=server.serve_forever, name="stock-mock-server", daemon=True).start()
+    h, p = server.server_address[:2]
+    return server, f"http://{h}:{p}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve mock Yahoo / Alpha Vantage market data from CSV files")
+    parser.add_argument("--data-dir", default="data", help="Directory containing <SYMBOL>.csv files (default: data)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform +/- jitter on the latency")
+    parser.add_argument("--rate-limit", type=int, default=0, help="Max requests per --rate-window before throttling (0 = unlimited)")
+    parser.add_argument("--rate-window", type=float, default=60.0, help="Rate-limit window in seconds (default: 60)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of an injected HTTP 500 (0-1)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for jitter and error injection")
+    args = parser.parse_args()
+
+    market = MockMarket.from_data_dir(
+        args.data_dir,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_limit=args.rate_limit,
+        rate_window=args.rate_window,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    server = make_server(market, args.host, args.port)
+    print(f"Mock market data for {len(market.series)} symbols on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,31 @@
 from typing import Callable, Optional, List
 
 from .csv_provider import load_symbol_csv
+from .timeseries import DAILY, check_interval
 from ..utils import discover_symbols
 
 
-def get_loader(source: str, data_dir: Optional[str] = None, api_key: Optional[str] = None) -> Callable[[str], Optional[dict]]:
+def get_loader(source: str, data_dir: Optional[str] = None, api_key: Optional[str] = None, interval: str = "1d") -> Callable[[str], Optional[dict]]:
     """Return a callable that loads a symbol's OHLCV time series.
 
     - source: 'csv' or 'alphavantage'
     - data_dir: required for 'csv'
     - api_key: required for 'alphavantage'
+    - interval: bar size ('1d', '5m', '60m', '1wk', ...); other than daily is
+      supported by 'yahoo' and 'csv' (files in <data_dir>/<interval>/). Raises ValueError
+      for an unknown interval or one the source cannot serve.
     """
     src = (source or "csv").lower()
+    interval = check_interval(interval)
     if src == "csv":
         def _csv_loader(symbol: str):
             if data_dir is None:
                 return None
-            return load_symbol_csv(symbol, data_dir)
+            return load_symbol_csv(symbol, data_dir, interval=interval)
         return _csv_loader
     elif src == "alphavantage":
+        if interval != DAILY:
+            raise ValueError("alphavantage: only daily bars are supported (use yahoo or csv, or resample daily bars)")
         from .alpha_vantage import load_symbol_alphavantage
 
         def _av_loader(symbol: str):
@@ -31,7 +38,7 @@ def get_loader(source: str, data_dir: Optional[str] = None, api_key: Optional[st
         from .yahoo import load_symbol_yahoo
 
         def _yh_loader(symbol: str):
-            return load_symbol_yahoo(symbol)
+            return load_symbol_yahoo(symbol, interval=interval)
 
         return _yh_loader
     else:
@@ -0,0 +1,198 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from ..metrics import METRICS, error_class
+from ..universe import PRESETS
+from .cache import NegativeCache, cache_path, make_cached_loader
+from .provider import get_loader
+from .resilience import FetchError
+from .shared import get_shared
+
+# 21:30 UTC is ~90 minutes after the US close in winter and ~30 in summer
+DEFAULT_AT = "21:30"
+# Upper bound for one run; a crashed holder frees the run for other workers after this
+REFRESH_LEASE_SECONDS = 6 * 3600
+
+
+def _parse_at(value: str) -> Dict[str, int]:
+    hh, mm = (value or DEFAULT_AT).split(":", 1)
+    hour, minute = int(hh), int(mm)
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"invalid time '{value}' (expected HH:MM)")
+    return {"hour": hour, "minute": minute}
+
+
+class CacheRefresher:
+    """Prefetch preset universes into the on-disk cache so interactive scans hit it warm.
+
+    Runs once a day at `at` (HH:MM, UTC, weekdays only) or every `every_minutes`.
+    A run refetches every symbol whose cache entry is missing or older than
+    min_age_hours, going through make_cached_loader so the normal throttle,
+    retry/backoff and negative cache apply. A run stops early when the
+    provider's circuit breaker stays open (quota exhausted). When several
+    processes share the cache (web workers), only one of them runs at a time;
+    the others skip the run.
+    """
+
+    def __init__(
+        self,
+        source: str = "yahoo",
+        presets: Optional[List[str]] = None,
+        api_key: str = "",
+        data_dir: Optional[str] = None,
+        cache_dir: str = ".cache",
+        throttle_ms: int = 1000,
+        min_age_hours: float = 1.0,
+        at: str = DEFAULT_AT,
+        every_minutes: float = 0,
+    ) -> None:
+        self.source = (source or "yahoo").lower()
+        self.presets = presets or list(PRESETS)
+        unknown = [p for p in self.presets if p not in PRESETS]
+        if unknown:
+            raise ValueError(f"unknown preset(s): {', '.join(unknown)} (available: {', '.join(PRESETS)})")
+        self.api_key = api_key
+        self.data_dir = data_dir
+        self.cache_dir = cache_dir
+        self.throttle_ms = throttle_ms
+        self.min_age_hours = min_age_hours
+        self.at = _parse_at(at)
+        self.every_minutes = every_minutes
+        self.last_run: Optional[Dict] = None
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> "CacheRefresher":
+        """Build from STOCK_REFRESH_* environment variables (used by the web app)."""
+        presets = [p.strip() for p in os.getenv("STOCK_REFRESH_PRESETS", "").split(",") if p.strip()]
+        return cls(
+            source=os.getenv("STOCK_REFRESH_SOURCE", "yahoo"),
+            presets=presets or None,
+            api_key=os.getenv("ALPHAVANTAGE_API_KEY", ""),
+            throttle_ms=int(os.getenv("STOCK_REFRESH_THROTTLE_MS", "1000")),
+            at=os.getenv("STOCK_REFRESH_AT", DEFAULT_AT),
+            every_minutes=float(os.getenv("STOCK_REFRESH_EVERY_MINUTES", "0")),
+        )
+
+    def symbols(self) -> List[str]:
+        seen: Dict[str, None] = {}
+        for name in self.presets:
+            for sym in PRESETS[name]:
+                seen.setdefault(sym.upper(), None)
+        return list(seen)
+
+    def due_symbols(self) -> List[str]:
+        """Symbols whose cache entry is missing or older than min_age_hours, oldest first."""
+        negative = NegativeCache(self.source, cache_dir=self.cache_dir)
+        now = time.time()
+        due = []
+        for sym in self.symbols():
+            if negative.get(sym) is not None:
+                continue
+            try:
+                age = now - os.path.getmtime(cache_path(self.cache_dir, self.source, sym))
+            except OSError:
+                age = float("inf")
+            if age > self.min_age_hours * 3600:
+                due.append((age, sym))
+        due.sort(reverse=True)
+        return [sym for _age, sym in due]
+
+    def refresh_once(self) -> Dict:
+        """Refetch all due symbols; returns a summary dict (skipped=True if another process is refreshing)."""
+        with get_shared(self.cache_dir).lease(f"refresh:{self.source}", ttl=REFRESH_LEASE_SECONDS) as mine:
+            if not mine:
+                METRICS.inc("refresh_runs_skipped_total", source=self.source)
+                summary = {
+                    "source": self.source,
+                    "skipped": True,
+                    "finished": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                }
+                self.last_run = summary
+                return summary
+            return self._refresh()
+
+    def _refresh(self) -> Dict:
+        t0 = time.perf_counter()
+        inner = get_loader(self.source, data_dir=self.data_dir, api_key=self.api_key)
+        # ttl_hours=0 forces a fetch; results are written back to the shared cache
+        loader = make_cached_loader(inner, source=self.source, cache_dir=self.cache_dir, ttl_hours=0, throttle_ms=self.throttle_ms)
+        due = self.due_symbols()
+        refreshed = failed = 0
+        errors: Dict[str, str] = {}
+        for sym in due:
+            if self._stop.is_set():
+                break
+            try:
+                ts = loader(sym)
+            except FetchError as e:
+                failed += 1
+                errors[sym] = f"{e.kind}: {e}"
+                METRICS.inc("refresh_symbols_total", source=self.source, result=e.kind)
+                if e.kind == "circuit_open":
+                    break
+                continue
+            if ts:
+                refreshed += 1
+                METRICS.inc("refresh_symbols_total", source=self.source, result="ok")
+            else:
+                failed += 1
+                METRICS.inc("refresh_symbols_total", source=self.source, result="empty")
+        summary = {
+            "source": self.source,
+            "due": len(due),
+            "refreshed": refreshed,
+            "failed": failed,
+            "errors": errors,
+            "seconds": time.perf_counter() - t0,
+            "finished": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        self.last_run = summary
+        return summary
+
+    def next_run(self, now: Optional[datetime] = None) -> datetime:
+        now = now or datetime.now(timezone.utc)
+        if self.every_minutes > 0:
+            return now + timedelta(minutes=self.every_minutes)
+        run = now.replace(hour=self.at["hour"], minute=self.at["minute"], second=0, microsecond=0)
+        if run <= now:
+            run += timedelta(days=1)
+        while run.weekday() >= 5:
+            run += timedelta(days=1)
+        return run
+
+    def run_forever(self, on_run=None) -> None:
+        """Refresh on schedule until stop() is called; on_run(summary) is called after each run.
+
+        An unexpected error in a run or in on_run (full disk, SQLite lock
+        timeout...) is counted in refresh_runs_total{result=error}, kept in
+        last_error, and the schedule carries on with the next run.
+        """
+        while not self._stop.is_set():
+            wait = (self.next_run() - datetime.now(timezone.utc)).total_seconds()
+            if self._stop.wait(max(0.0, wait)):
+                break
+            try:
+                summary = self.refresh_once()
+                if on_run is not None:
+                    on_run(summary)
+            except Exception as e:
+                METRICS.inc("refresh_runs_total", source=self.source, result="error", error=error_class(e))
+                self.last_error = f"{datetime.now(timezone.utc).isoformat(timespec='seconds')} {type(e).__name__}: {e}"
+
+    def start(self) -> "CacheRefresher":
+        """Run the schedule on a daemon thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="stock-refresher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,200 @@
+import random
+import socket
+import threading
+import time
+from typing import Callable, Dict, Optional, TypeVar
+
+from ..metrics import METRICS
+
+T = TypeVar("T")
+
+# Kinds worth retrying; everything else fails the symbol immediately
+RETRYABLE = ("rate_limited", "transient")
+
+
+class FetchError(Exception):
+    """Classified upstream failure raised by the provider loaders.
+
+    kind is one of: rate_limited, transient, not_found, empty, auth, quota,
+    invalid, circuit_open. retry_after (seconds) is set when the upstream
+    said how long to wait.
+    """
+
+    def __init__(self, kind: str, message: str = "", provider: str = "", retry_after: Optional[float] = None) -> None:
+        super().__init__(message or kind)
+        self.kind = kind
+        self.provider = provider
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.kind in RETRYABLE
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        # HTTP-date form is rare; email.utils is slow to import, so load it only here
+        from email.utils import parsedate_to_datetime
+
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def classify_exception(exc: BaseException, provider: str) -> FetchError:
+    """Map urllib/socket/JSON exceptions onto a FetchError."""
+    if isinstance(exc, FetchError):
+        return exc
+    from urllib.error import HTTPError, URLError
+
+    if isinstance(exc, HTTPError):
+        code = exc.code
+        if code == 429:
+            return FetchError("rate_limited", "HTTP 429", provider, _retry_after(exc.headers.get("Retry-After") if exc.headers else None))
+        if code == 404:
+            return FetchError("not_found", "HTTP 404", provider)
+        if code in (401, 403):
+            return FetchError("auth", f"HTTP {code}", provider)
+        if code == 408 or code >= 500:
+            return FetchError("transient", f"HTTP {code}", provider, _retry_after(exc.headers.get("Retry-After") if exc.headers else None))
+        return FetchError("invalid", f"HTTP {code}", provider)
+    if isinstance(exc, (URLError, socket.timeout, TimeoutError, ConnectionError)):
+        return FetchError("transient", f"network: {getattr(exc, 'reason', exc)}", provider)
+    if isinstance(exc, ValueError):
+        # Truncated or non-JSON body (proxies, captive portals, partial reads)
+        return FetchError("transient", f"bad payload: {exc}", provider)
+    return FetchError("transient", f"{type(exc).__name__}: {exc}", provider)
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter: sleep U(0, min(max_delay, base_delay * 2**attempt)).
+
+    A Retry-After from the upstream replaces the computed delay; delays longer
+    than max_delay are not waited out and the error is raised instead.
+    """
+
+    def __init__(self, attempts: int = 4, base_delay: float = 0.5, max_delay: float = 60.0, seed: Optional[int] = None) -> None:
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rng = random.Random(seed)
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return retry_after
+        return self._rng.uniform(0.0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """Per-provider breaker that stops calls while an endpoint is throttling or down.
+
+    A rate-limit response opens it at once (for Retry-After or cooldown
+    seconds); `failure_threshold` consecutive transient errors open it for
+    `cooldown`. Once the open period lapses the next call is let through as a
+    probe (half-open): success closes the breaker, failure reopens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, cooldown: float = 30.0) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._open_until = 0.0
+        self.reason = ""
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._open_until > time.monotonic():
+                return "open"
+            return "half_open" if self._failures >= self.failure_threshold else "closed"
+
+    def remaining(self) -> float:
+        """Seconds until calls are allowed again (0 when closed or half-open)."""
+        with self._lock:
+            return max(0.0, self._open_until - time.monotonic())
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._open_until = 0.0
+
+    def record_failure(self, err: FetchError) -> None:
+        if err.kind not in RETRYABLE and err.kind != "quota":
+            # Symbol-level failures say nothing about endpoint health
+            return
+        with self._lock:
+            self._failures += 1
+            if err.kind in ("rate_limited", "quota"):
+                self._failures = max(self._failures, self.failure_threshold)
+                wait = err.retry_after if err.retry_after is not None else self.cooldown
+            elif self._failures >= self.failure_threshold:
+                wait = self.cooldown
+            else:
+                return
+            until = time.monotonic() + wait
+            if until > self._open_until:
+                self._open_until = until
+                self.reason = err.kind
+                METRICS.inc("circuit_open_total", provider=self.name, reason=err.kind)
+
+    def reset(self) -> None:
+        self.record_success()
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+DEFAULT_POLICY = RetryPolicy()
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(provider)
+        if breaker is None:
+            breaker = _BREAKERS[provider] = CircuitBreaker(provider)
+        return breaker
+
+
+def call_with_retry(fn: Callable[[int], T], provider: str, policy: Optional[RetryPolicy] = None, sleep: Callable[[float], None] = time.sleep) -> T:
+    """Call fn(attempt) until it succeeds, retrying rate-limit and transient FetchErrors.
+
+    While the provider's breaker is open because of throttling the call waits
+    for it (up to policy.max_delay) instead of hitting the endpoint. Longer
+    waits, and breakers opened by repeated network/server errors (endpoint
+    down), raise FetchError('circuit_open') straight away so a scan can move on.
+    """
+    policy = policy or DEFAULT_POLICY
+    breaker = get_breaker(provider)
+    attempt = 0
+    while True:
+        wait = breaker.remaining()
+        if wait > policy.max_delay or (wait > 0 and breaker.reason != "rate_limited"):
+            raise FetchError("circuit_open", f"{provider} circuit open for another {wait:.0f}s", provider, retry_after=wait)
+        if wait > 0:
+            METRICS.inc("circuit_wait_seconds_total", wait, provider=provider)
+            sleep(wait)
+        try:
+            result = fn(attempt)
+        except FetchError as e:
+            breaker.record_failure(e)
+            attempt += 1
+            if not e.retryable or attempt >= policy.attempts:
+                raise
+            delay = policy.delay(attempt - 1, e.retry_after)
+            if delay > policy.max_delay:
+                raise
+            METRICS.inc("upstream_retries_total", provider=provider, error=e.kind)
+            if breaker.remaining() <= 0 and delay > 0:
+                # An open breaker already makes the next iteration wait
+                sleep(delay)
+            continue
+        breaker.record_success()
+        return result
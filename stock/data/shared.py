@@ -0,0 +1,154 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from ..metrics import METRICS
+
+# Lives at the top of the cache dir, outside the per-source folders that scan_cache walks
+DB_FILE = "_shared.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_slots (source TEXT PRIMARY KEY, next_slot REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS cache_usage (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL);
+"""
+
+
+class SharedState:
+    """Coordination state for every process that uses the same cache directory.
+
+    Backed by SQLite in WAL mode, so uvicorn/gunicorn workers, the CLI and the
+    refresher agree on:
+    - rate-limit slots per source (reserve_slot): the throttle holds across
+      processes instead of each one sleeping independently;
+    - the cache size index (usage): one byte counter for the size budget;
+    - leases (lease): short named locks with an expiry, used for single-flight
+      fetches and for work that only one worker should do.
+
+    If the database cannot be opened (read-only or unsupported filesystem), an
+    in-memory database is used, which still coordinates threads in this process.
+    """
+
+    def __init__(self, cache_dir: str = ".cache") -> None:
+        self.path = os.path.join(cache_dir, DB_FILE)
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._db = self._open(self.path)
+        except (OSError, sqlite3.Error):
+            self.path = ":memory:"
+            self._db = self._open(self.path)
+
+    @staticmethod
+    def _open(path: str) -> sqlite3.Connection:
+        # Autocommit; writes take BEGIN IMMEDIATE so read-modify-write steps are atomic across processes
+        db = sqlite3.connect(path, timeout=30.0, isolation_level=None, check_same_thread=False)
+        if path != ":memory:":
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(_SCHEMA)
+        return db
+
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    # -- rate limiting --
+
+    def reserve_slot(self, source: str, interval: float) -> float:
+        """Reserve the next request slot for source; returns how long to sleep before using it."""
+        if interval <= 0:
+            return 0.0
+        with self._tx() as db:
+            now = time.time()
+            row = db.execute("SELECT next_slot FROM rate_slots WHERE source = ?", (source,)).fetchone()
+            slot = max(now, row[0]) if row else now
+            db.execute("INSERT OR REPLACE INTO rate_slots (source, next_slot) VALUES (?, ?)", (source, slot + interval))
+        return slot - now
+
+    def throttle(self, source: str, interval: float) -> float:
+        """reserve_slot, then sleep until the slot; returns the time slept."""
+        delay = self.reserve_slot(source, interval)
+        if delay > 0:
+            METRICS.inc("throttle_wait_seconds_total", delay, source=source)
+            time.sleep(delay)
+        return max(0.0, delay)
+
+    # -- cache size index --
+
+    def usage(self) -> Optional[int]:
+        with self._lock:
+            row = self._db.execute("SELECT bytes FROM cache_usage WHERE id = 0").fetchone()
+        return int(row[0]) if row else None
+
+    def add_usage(self, delta: int) -> Optional[int]:
+        """Apply delta to the byte counter; None when it has not been initialized yet."""
+        with self._tx() as db:
+            db.execute("UPDATE cache_usage SET bytes = bytes + ? WHERE id = 0", (int(delta),))
+            row = db.execute("SELECT bytes FROM cache_usage WHERE id = 0").fetchone()
+        return int(row[0]) if row else None
+
+    def set_usage(self, total: int) -> None:
+        with self._tx() as db:
+            db.execute("INSERT OR REPLACE INTO cache_usage (id, bytes) VALUES (0, ?)", (int(total),))
+
+    # -- leases --
+
+    def try_lease(self, name: str, ttl: float) -> Optional[str]:
+        """Take the named lease if it is free or expired; returns an owner token or None."""
+        token = f"{os.getpid()}:{threading.get_ident()}:{time.time():.6f}"
+        with self._tx() as db:
+            now = time.time()
+            row = db.execute("SELECT expires FROM leases WHERE name = ?", (name,)).fetchone()
+            if row and row[0] > now:
+                return None
+            db.execute("INSERT OR REPLACE INTO leases (name, owner, expires) VALUES (?, ?, ?)", (name, token, now + ttl))
+        return token
+
+    def release(self, name: str, token: str) -> None:
+        with self._tx() as db:
+            db.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, token))
+
+    @contextmanager
+    def lease(self, name: str, ttl: float = 120.0, wait: float = 0.0, poll: float = 0.05) -> Iterator[bool]:
+        """Hold the named lease for the block; yields False if it could not be taken within `wait` seconds.
+
+        The lease expires after ttl even if its holder dies, so a crashed worker
+        never blocks the others for longer than that.
+        """
+        token = self.try_lease(name, ttl)
+        deadline = time.time() + wait
+        while token is None and time.time() < deadline:
+            time.sleep(poll)
+            token = self.try_lease(name, ttl)
+        try:
+            yield token is not None
+        finally:
+            if token is not None:
+                self.release(name, token)
+
+
+_STATES: Dict[str, SharedState] = {}
+_STATES_LOCK = threading.Lock()
+
+
+def get_shared(cache_dir: str = ".cache") -> SharedState:
+    """The SharedState for cache_dir, opened once per process."""
+    key = os.path.abspath(cache_dir)
+    with _STATES_LOCK:
+        state = _STATES.get(key)
+        # A connection must not cross fork() (e.g. gunicorn --preload); reopen in the child
+        if state is None or state.pid != os.getpid():
+            state = _STATES[key] = SharedState(cache_dir)
+        return state
@@ -0,0 +1,274 @@
+from array import array
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+
+# Column name -> array typecode. The "date" column is the bar's time key:
+# proleptic Gregorian ordinals for daily bars, Unix seconds (UTC) for intraday bars.
+COLUMNS: Tuple[str, ...] = ("date", "open", "high", "low", "close", "volume")
+TYPECODES: Dict[str, str] = {
+    "date": "q",
+    "open": "d",
+    "high": "d",
+    "low": "d",
+    "close": "d",
+    "volume": "q",
+}
+
+# Supported bar intervals (Yahoo naming) -> length in seconds
+INTERVALS: Dict[str, int] = {
+    "1m": 60,
+    "2m": 120,
+    "5m": 300,
+    "15m": 900,
+    "30m": 1800,
+    "60m": 3600,
+    "90m": 5400,
+    "1d": 86400,
+    "1wk": 7 * 86400,
+    "1mo": 31 * 86400,
+}
+DAILY = "1d"
+# Same bar size under another name; normalized so both share one cache entry
+_ALIASES = {"1h": "60m"}
+
+
+def is_intraday(interval: Optional[str]) -> bool:
+    """True for bars shorter than a day (keyed by Unix seconds); daily, weekly and monthly bars are keyed by date."""
+    value = (interval or DAILY).strip().lower()
+    return INTERVALS.get(_ALIASES.get(value, value), INTERVALS[DAILY]) < INTERVALS[DAILY]
+
+
+def check_interval(interval: Optional[str]) -> str:
+    """Normalize an interval name; raises ValueError for unsupported ones."""
+    value = (interval or DAILY).strip().lower()
+    value = _ALIASES.get(value, value)
+    if value not in INTERVALS:
+        raise ValueError(f"unsupported interval '{interval}' (available: {', '.join(INTERVALS)})")
+    return value
+
+
+def _to_ordinal(value) -> int:
+    if isinstance(value, int):
+        return value
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    return datetime.strptime(str(value).strip()[:10], "%Y-%m-%d").date().toordinal()
+
+
+def _to_epoch(value) -> int:
+    """Unix seconds for an intraday time key; naive datetimes and strings without an offset are UTC."""
+    if isinstance(value, int):
+        return value
+    if not isinstance(value, datetime):
+        if isinstance(value, date):
+            value = datetime(value.year, value.month, value.day)
+        else:
+            value = datetime.fromisoformat(str(value).strip())
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def time_key(value, interval: Optional[str] = DAILY) -> int:
+    """The "date" column value for a date, datetime, ISO string or int at the given interval."""
+    return _to_epoch(value) if is_intraday(interval) else _to_ordinal(value)
+
+
+class TimeSeries:
+    """Column-oriented OHLCV bars backed by typed ``array`` buffers.
+
+    Read access mirrors the legacy dict-of-lists shape so existing callers keep
+    working: ``ts["close"]``, ``ts.get("_currency")`` and ``"close" in ts``.
+    Columns are returned as ``memoryview`` slices over the underlying arrays, so
+    slicing a series (``ts[-250:]``) is a zero-copy view and NumPy can wrap a
+    column without copying (``np.frombuffer(ts["close"])``).
+
+    ``interval`` is the bar size ("1d", "5m", ...); intraday series key their
+    bars by Unix seconds instead of date ordinals (see COLUMNS).
+    """
+
+    __slots__ = ("_cols", "_start", "_stop", "currency", "interval")
+
+    def __init__(
+        self,
+        columns: Dict[str, array],
+        currency: Optional[str] = None,
+        start: int = 0,
+        stop: Optional[int] = None,
+        interval: str = DAILY,
+    ) -> None:
+        cols: Dict[str, array] = {}
+        length: Optional[int] = None
+        for name in COLUMNS:
+            values = columns.get(name)
+            code = TYPECODES[name]
+            if values is None:
+                values = array(code)
+            elif not (isinstance(values, array) and values.typecode == code):
+                values = array(code, values)
+            if length is None:
+                length = len(values)
+            elif len(values) != length:
+                raise ValueError(f"column '{name}' has {len(values)} rows, expected {length}")
+            cols[name] = values
+        total = length or 0
+        self._cols = cols
+        self._start = max(0, min(start, total))
+        self._stop = total if stop is None else max(self._start, min(stop, total))
+        self.currency = currency
+        self.interval = interval
+
+    # --- Construction helpers ---
+
+    @classmethod
+    def from_dict(cls, data: Dict, interval: Optional[str] = None) -> "TimeSeries":
+        """Build from a legacy dict of lists (dates as date objects, ISO strings or ordinals).
+
+        interval defaults to the dict's "_interval" entry, else daily.
+        """
+        if isinstance(data, TimeSeries):
+            return data
+        currency = data.get("_currency", data.get("currency"))
+        interval = interval or data.get("_interval") or DAILY
+        raw_dates = data.get("date") or []
+        builder = TimeSeriesBuilder()
+        cols = [data.get(name) or [] for name in COLUMNS[1:]]
+        for i, d in enumerate(raw_dates):
+            try:
+                builder.append(
+                    time_key(d, interval),
+                    float(cols[0][i]),
+                    float(cols[1][i]),
+                    float(cols[2][i]),
+                    float(cols[3][i]),
+                    int(cols[4][i] or 0),
+                )
+            except Exception:
+                # Skip malformed rows
+                continue
+        return builder.build(currency=currency if isinstance(currency, str) else None, interval=interval)
+
+    # --- Mapping-style access ---
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __bool__(self) -> bool:
+        return self._stop > self._start
+
+    def __contains__(self, key: object) -> bool:
+        return key in TYPECODES or key == "_currency"
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("TimeSeries views only support contiguous slices")
+            return TimeSeries(self._cols, self.currency, self._start + start, self._start + max(start, stop), self.interval)
+        if key == "_currency":
+            return self.currency
+        if key in self._cols:
+            return memoryview(self._cols[key])[self._start:self._stop]
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+    def keys(self) -> Tuple[str, ...]:
+        return COLUMNS
+
+    def column(self, name: str) -> memoryview:
+        """Zero-copy view of a column (buffer protocol: format 'd' or 'q')."""
+        return self[name]
+
+    # --- Conversions ---
+
+    @property
+    def intraday(self) -> bool:
+        return is_intraday(self.interval)
+
+    def _label(self, key: int) -> Union[date, datetime]:
+        if self.intraday:
+            return datetime.fromtimestamp(key, timezone.utc)
+        return date.fromordinal(key)
+
+    def dates(self) -> List[Union[date, datetime]]:
+        """Bar labels: ``datetime.date`` for daily bars, UTC ``datetime`` for intraday ones."""
+        if self.intraday:
+            return [datetime.fromtimestamp(t, timezone.utc) for t in self["date"]]
+        return [date.fromordinal(o) for o in self["date"]]
+
+    def first_date(self) -> Optional[Union[date, datetime]]:
+        return self._label(self._cols["date"][self._start]) if self else None
+
+    def last_date(self) -> Optional[Union[date, datetime]]:
+        return self._label(self._cols["date"][self._stop - 1]) if self else None
+
+    def copy(self) -> "TimeSeries":
+        """Return a compact copy that owns only the rows in this view."""
+        return TimeSeries(
+            {name: self._cols[name][self._start:self._stop] for name in COLUMNS},
+            self.currency,
+            interval=self.interval,
+        )
+
+    def to_dict(self) -> Dict[str, List]:
+        """Return the legacy dict-of-lists representation (see dates() for the labels)."""
+        out: Dict[str, List] = {"date": self.dates()}
+        for name in COLUMNS[1:]:
+            out[name] = self[name].tolist()
+        if self.currency:
+            out["_currency"] = self.currency
+        if self.intraday:
+            out["_interval"] = self.interval
+        return out
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(self) * self._cols[name].itemsize for name in COLUMNS)
+
+    def __reduce__(self):
+        # Pickle only the viewed rows (worker processes should not receive full parents)
+        compact = self.copy()
+        return (TimeSeries, (compact._cols, compact.currency, 0, None, compact.interval))
+
+    def __repr__(self) -> str:
+        return f"TimeSeries(bars={len(self)}, interval={self.interval!r}, first={self.first_date()}, last={self.last_date()}, currency={self.currency!r})"
+
+
+class TimeSeriesBuilder:
+    """Append-only helper used by providers to fill typed columns row by row."""
+
+    __slots__ = ("_cols",)
+
+    def __init__(self) -> None:
+        self._cols: Dict[str, array] = {name: array(TYPECODES[name]) for name in COLUMNS}
+
+    def append(self, date_key: int, o: float, h: float, l: float, c: float, v: int) -> None:
+        cols = self._cols
+        cols["date"].append(date_key)
+        cols["open"].append(o)
+        cols["high"].append(h)
+        cols["low"].append(l)
+        cols["close"].append(c)
+        cols["volume"].append(v)
+
+    def extend(self, rows: Iterable[Sequence]) -> None:
+        for r in rows:
+            self.append(r[0], r[1], r[2], r[3], r[4], r[5])
+
+    def __len__(self) -> int:
+        return len(self._cols["date"])
+
+    def build(self, currency: Optional[str] = None, interval: str = DAILY) -> TimeSeries:
+        cols = self._cols
+        # Hand the buffers over; the builder starts fresh if reused
+        self._cols = {name: array(TYPECODES[name]) for name in COLUMNS}
+        return TimeSeries(cols, currency, interval=interval)
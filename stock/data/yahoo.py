@@ -1,35 +1,94 @@
 import json
+import os
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Optional
 from urllib.request import urlopen, Request
 
+from ..metrics import METRICS, error_class
+from .resilience import FetchError, call_with_retry, classify_exception
+from .timeseries import TimeSeries, TimeSeriesBuilder, check_interval, is_intraday
 
-def _fetch_chart(symbol: str, interval: str = "1d", range_: str = "1y", host: str = "query1") -> Optional[dict]:
-    url = f"https://{host}.finance.yahoo.com/v8/finance/chart/{symbol}?interval={interval}&range={range_}"
+
+# "{host}" is replaced by query1/query2; override with STOCK_YAHOO_BASE_URL
+# (e.g. http://127.0.0.1:8765 for stock.data.mock_server, where both hosts map to one server)
+BASE_URL = os.getenv("STOCK_YAHOO_BASE_URL", "https://{host}.finance.yahoo.com").rstrip("/")
+
+
+# Longest range Yahoo serves per interval (1m: last 7 days, <1h: last 60 days)
+DEFAULT_RANGES: Dict[str, str] = {
+    "1m": "7d",
+    "2m": "60d",
+    "5m": "60d",
+    "15m": "60d",
+    "30m": "60d",
+    "60m": "730d",
+    "90m": "60d",
+    "1d": "1y",
+    "1wk": "5y",
+    "1mo": "max",
+}
+
+
+def set_base_url(url: str) -> None:
+    global BASE_URL
+    BASE_URL = url.rstrip("/")
+
+
+def _request_chart(symbol: str, interval: str = "1d", range_: str = "1y", host: str = "query1") -> dict:
+    """One chart request; raises a classified FetchError on any failure."""
+    url = f"{BASE_URL.replace('{host}', host)}/v8/finance/chart/{symbol}?interval={interval}&range={range_}"
     try:
         req = Request(url, headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0 Safari/537.36"})
-        with urlopen(req, timeout=20) as resp:
-            return json.loads(resp.read().decode("utf-8"))
-    except Exception:
+        with METRICS.timer("upstream_request_seconds", provider="yahoo"):
+            with urlopen(req, timeout=20) as resp:
+                data = json.loads(resp.read().decode("utf-8"))
+    except Exception as e:
+        err = classify_exception(e, "yahoo")
+        METRICS.inc("upstream_errors_total", provider="yahoo", error=error_class(err))
+        raise err
+    chart = data.get("chart") if isinstance(data, dict) else None
+    if not isinstance(chart, dict):
+        METRICS.inc("upstream_errors_total", provider="yahoo", error="invalid")
+        raise FetchError("invalid", "missing chart key", "yahoo")
+    if chart.get("error"):
+        err_info = chart.get("error") or {}
+        kind = "not_found" if str(err_info.get("code", "")).lower().replace(" ", "") == "notfound" else "invalid"
+        METRICS.inc("upstream_errors_total", provider="yahoo", error=kind)
+        raise FetchError(kind, str(err_info.get("description") or err_info), "yahoo")
+    return data
+
+
+def _fetch_chart(symbol: str, interval: str = "1d", range_: str = "1y", host: str = "query1") -> Optional[dict]:
+    try:
+        return _request_chart(symbol, interval=interval, range_=range_, host=host)
+    except FetchError:
         return None
 
 
-def load_symbol_yahoo(symbol: str, range_: str = "1y", interval: str = "1d") -> Optional[Dict[str, List]]:
-    """Fetch OHLCV from Yahoo Finance chart API and normalize to dict of lists.
+def _get_chart(symbol: str, interval: str, range_: str) -> dict:
+    # Retries alternate between the two chart hosts
+    return call_with_retry(
+        lambda attempt: _request_chart(symbol, interval=interval, range_=range_, host="query2" if attempt % 2 else "query1"),
+        "yahoo",
+    )
 
-    Returns None on errors.
+
+def load_symbol_yahoo(symbol: str, range_: Optional[str] = None, interval: str = "1d") -> TimeSeries:
+    """Fetch OHLCV from Yahoo Finance chart API and normalize to a TimeSeries.
+
+    range_ defaults to DEFAULT_RANGES[interval]. Intraday bars are keyed by
+    their Unix timestamp, daily bars by date (see stock.data.timeseries).
+    Throttling and network errors are retried with backoff behind the 'yahoo'
+    circuit breaker; raises FetchError (stock.data.resilience) if the symbol
+    still cannot be loaded.
     """
-    data = _fetch_chart(symbol, interval=interval, range_=range_)
-    if (not data) or ("chart" in data and data.get("chart", {}).get("error")):
-        # Try secondary host
-        data = _fetch_chart(symbol, interval=interval, range_=range_, host="query2")
-    if not data or "chart" not in data:
-        return None
-    chart = data.get("chart", {})
-    if chart.get("error"):
-        return None
-    if not chart or not chart.get("result"):
-        return None
+    interval = check_interval(interval)
+    intraday = is_intraday(interval)
+    range_ = range_ or DEFAULT_RANGES[interval]
+    data = _get_chart(symbol, interval=interval, range_=range_)
+    chart = data["chart"]
+    if not chart.get("result"):
+        raise FetchError("empty", "empty result array", "yahoo")
     res = chart["result"][0]
     ts = res.get("timestamp") or []
     indicators = res.get("indicators", {})
@@ -44,21 +103,16 @@ def load_symbol_yahoo(symbol: str, range_: str = "1y", interval: str = "1d") ->
     vols = quote.get("volume") or []
 
     if not ts or not closes:
-        # Try fallback range
-        if range_ != "max":
+        # Try fallback range (intraday data is only served for recent ranges)
+        if range_ != "max" and not intraday:
             return load_symbol_yahoo(symbol, range_="max", interval=interval)
-        return None
+        raise FetchError("empty", "no bars returned", "yahoo")
 
-    dates: List = []
-    o_list: List[float] = []
-    h_list: List[float] = []
-    l_list: List[float] = []
-    c_list: List[float] = []
-    v_list: List[int] = []
+    builder = TimeSeriesBuilder()
 
     for i in range(len(ts)):
         try:
-            dt = datetime.utcfromtimestamp(int(ts[i])).date()
+            key = int(ts[i]) if intraday else datetime.utcfromtimestamp(int(ts[i])).date().toordinal()
             o = float(opens[i]) if opens and opens[i] is not None else None
             h = float(highs[i]) if highs and highs[i] is not None else None
             l = float(lows[i]) if lows and lows[i] is not None else None
@@ -75,42 +129,28 @@ def load_symbol_yahoo(symbol: str, range_: str = "1y", interval: str = "1d") ->
             h = c
         if l is None:
             l = c
-        dates.append(dt)
-        o_list.append(o)
-        h_list.append(h)
-        l_list.append(l)
-        c_list.append(c)
-        v_list.append(v)
-
-    if not dates:
-        return None
+        builder.append(key, o, h, l, c, v)
+
+    if not len(builder):
+        raise FetchError("empty", "no usable bars", "yahoo")
 
-    return {
-        "date": dates,
-        "open": o_list,
-        "high": h_list,
-        "low": l_list,
-        "close": c_list,
-        "volume": v_list,
-        "_currency": meta.get("currency"),
-    }
+    return builder.build(currency=meta.get("currency"), interval=interval)
 
 
 def probe_yahoo(symbol: str, range_: str = "1y", interval: str = "1d") -> Dict[str, str]:
     """Return a dict with diagnostics for Yahoo chart calls."""
-    data = _fetch_chart(symbol, interval=interval, range_=range_)
     host_tried = "query1"
-    if not data:
-        data = _fetch_chart(symbol, interval=interval, range_=range_, host="query2")
-        host_tried = "query1, query2"
-    if not data:
-        return {"status": "error", "message": "No response (network/blocked)", "host": host_tried}
-    chart = data.get("chart")
-    if not chart:
-        return {"status": "error", "message": "Missing chart key", "host": host_tried}
-    if chart.get("error"):
-        err = chart.get("error") or {}
-        return {"status": "error", "message": str(err), "host": host_tried}
+    try:
+        try:
+            data = _request_chart(symbol, interval=interval, range_=range_)
+        except FetchError as e:
+            if not e.retryable:
+                raise
+            host_tried = "query1, query2"
+            data = _request_chart(symbol, interval=interval, range_=range_, host="query2")
+    except FetchError as e:
+        return {"status": "error", "message": f"{e.kind}: {e}", "host": host_tried}
+    chart = data["chart"]
     res = chart.get("result") or []
     if not res:
         return {"status": "error", "message": "Empty result array", "host": host_tried}
@@ -0,0 +1,199 @@
+import csv
+import gzip
+import io
+import json
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+from .metrics import METRICS
+
+# (column, type) in export order; feature columns a strategy doesn't produce are left empty
+COLUMNS: List[Tuple[str, str]] = [
+    ("symbol", "str"),
+    ("strategy", "str"),
+    ("score", "float"),
+    ("decision", "str"),
+    ("last_close", "float"),
+    ("currency", "str"),
+    ("dist_200sma_pct", "float"),
+    ("sma50_slope", "float"),
+    ("last_signal", "str"),
+    ("rsi", "float"),
+    ("rsi_rising", "bool"),
+    ("macd", "float"),
+    ("macd_hist", "float"),
+    ("macd_hist_slope", "float"),
+    ("n_bars", "int"),
+    ("reasons", "str"),
+]
+
+# File suffix -> format; .gz is accepted on top of the text formats
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}
+
+
+def export_format(path: str, fmt: Optional[str] = None) -> str:
+    """Format for path: fmt when given, otherwise taken from the file suffix."""
+    if fmt:
+        fmt = fmt.lower()
+        if fmt not in set(FORMATS.values()):
+            raise ValueError(f"unknown export format '{fmt}' (choose from csv, jsonl, parquet, arrow)")
+        return fmt
+    stem = path[:-3] if path.lower().endswith(".gz") else path
+    suffix = os.path.splitext(stem)[1].lower()
+    if suffix not in FORMATS:
+        raise ValueError(f"cannot tell the export format of {path}; use .csv, .jsonl, .parquet or .arrow")
+    return FORMATS[suffix]
+
+
+def export_row(item: Dict) -> Dict:
+    """Flatten one ranked result (see recommend.iter_analyze_with_loader) into an export row."""
+    meta = item.get("meta", {})
+    feats = meta.get("features") or {}
+    row: Dict = {}
+    for name, kind in COLUMNS:
+        if name == "symbol":
+            value = item.get("symbol")
+        elif name == "score":
+            value = item.get("score")
+        elif name == "reasons":
+            value = "; ".join(meta.get("decision_reasons") or [])
+        else:
+            value = meta[name] if meta.get(name) is not None else feats.get(name)
+        if kind == "float" and isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = float(value) if math.isfinite(value) else None
+        elif kind == "int" and isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = int(value)
+        elif kind == "bool" and value is not None:
+            value = bool(value)
+        elif kind == "str" and value is not None:
+            value = str(value)
+        elif not isinstance(value, (int, float, str)):
+            value = None
+        row[name] = value
+    return row
+
+
+class Exporter:
+    """Write results one at a time; use as a context manager or call close().
+
+    Text formats are written through as rows arrive; Parquet/Arrow buffer at
+    most batch_size rows before writing a record batch, so memory stays flat
+    however many symbols are scanned.
+    """
+
+    format = ""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.rows = 0
+
+    def write(self, item: Dict) -> None:
+        self._write(export_row(item))
+        self.rows += 1
+        METRICS.inc("export_rows_total", format=self.format)
+
+    def _write(self, row: Dict) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+    def __enter__(self) -> "Exporter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _open_text(path: str):
+    if path.lower().endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path, "wb"), encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+class CSVExporter(Exporter):
+    format = "csv"
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self._f = _open_text(path)
+        self._writer = csv.writer(self._f)
+        self._writer.writerow([name for name, _kind in COLUMNS])
+
+    def _write(self, row: Dict) -> None:
+        self._writer.writerow(["" if row[name] is None else row[name] for name, _kind in COLUMNS])
+
+    def close(self) -> None:
+        self._f.close()
+
+
+class JSONLExporter(Exporter):
+    format = "jsonl"
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self._f = _open_text(path)
+
+    def _write(self, row: Dict) -> None:
+        self._f.write(json.dumps(row, separators=(",", ":")) + "\n")
+
+    def close(self) -> None:
+        self._f.close()
+
+
+class ArrowExporter(Exporter):
+    """Parquet or Arrow IPC (Feather v2) file written in record batches; needs pyarrow."""
+
+    def __init__(self, path: str, format: str = "parquet", batch_size: int = 1024) -> None:
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ValueError(f"{format} export needs pyarrow (pip install pyarrow); CSV and JSONL work without it")
+        super().__init__(path)
+        self.format = format
+        self._pa = pa
+        types = {"str": pa.string(), "float": pa.float64(), "int": pa.int64(), "bool": pa.bool_()}
+        self._schema = pa.schema([(name, types[kind]) for name, kind in COLUMNS])
+        self._batch_size = max(1, batch_size)
+        self._columns: Dict[str, List] = {name: [] for name, _kind in COLUMNS}
+        self._pending = 0
+        if format == "parquet":
+            import pyarrow.parquet as pq
+
+            self._writer = pq.ParquetWriter(path, self._schema)
+        else:
+            self._writer = pa.ipc.new_file(path, self._schema)
+
+    def _write(self, row: Dict) -> None:
+        for name, values in self._columns.items():
+            values.append(row[name])
+        self._pending += 1
+        if self._pending >= self._batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        batch = self._pa.record_batch([self._columns[name] for name, _kind in COLUMNS], schema=self._schema)
+        self._writer.write_batch(batch)
+        for values in self._columns.values():
+            values.clear()
+        self._pending = 0
+
+    def close(self) -> None:
+        self._flush()
+        self._writer.close()
+
+
+def open_exporter(path: str, fmt: Optional[str] = None, batch_size: int = 1024) -> Exporter:
+    """Exporter for path, in fmt or the format implied by its suffix (.csv, .jsonl, .parquet, .arrow; .csv.gz/.jsonl.gz compress)."""
+    fmt = export_format(path, fmt)
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    if fmt == "csv":
+        return CSVExporter(path)
+    if fmt == "jsonl":
+        return JSONLExporter(path)
+    return ArrowExporter(path, format=fmt, batch_size=batch_size)
@@ -1,11 +1,54 @@
+import heapq
+import math
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from typing import List
+from typing import Dict, List, Optional
 
-from .recommend import analyze_and_rank, analyze_and_rank_with_loader
 from .utils import discover_symbols, parse_symbols, validate_and_suggest
 
 
+COLUMNS = ("symbol", "score", "decision", "last_close", "dist200", "slope50", "last_signal")
+
+
+def _record(item: Dict) -> Dict:
+    """Typed sort key and preformatted cells for one result, built once per result."""
+    meta = item["meta"]
+
+    def num(v):
+        return float(v) if isinstance(v, (int, float)) and not math.isnan(v) else None
+
+    def fmt(v, f):
+        return f.format(v) if v is not None else "nan"
+
+    last_close, dist200, slope50 = num(meta.get("last_close")), num(meta.get("dist_200sma_pct")), num(meta.get("sma50_slope"))
+    decision = meta.get("decision") or "DON'T BUY"
+    last_signal = meta.get("last_signal") or "none"
+    return {
+        "key": (item["symbol"], float(item["score"]), decision, last_close, dist200, slope50, last_signal),
+        "values": (
+            item["symbol"],
+            f"{item['score']:.3f}",
+            decision,
+            fmt(last_close, "{:.2f}"),
+            fmt(dist200, "{:.2f}"),
+            fmt(slope50, "{:.4f}"),
+            last_signal,
+        ),
+        "buy": decision == "BUY",
+        "item": item,
+    }
+
+
+def _sort_records(records: List[Dict], idx: int, descending: bool) -> List[Dict]:
+    # Missing numbers sort last in either direction; the sort is stable, so ties keep score order
+    present = [r for r in records if r["key"][idx] is not None]
+    missing = [r for r in records if r["key"][idx] is None]
+    present.sort(key=lambda r: r["key"][idx], reverse=descending)
+    return present + missing
+
+
 class App(tk.Tk):
     def __init__(self) -> None:
         super().__init__()
@@ -14,9 +57,27 @@ class App(tk.Tk):
         # Defaults for cache/throttle options
         self.throttle_ms = 400
         self.ttl_hours = 24
+        # Background analysis: the worker thread only touches these, never Tk widgets
+        self._worker: Optional[threading.Thread] = None
+        self._cancel = threading.Event()
+        self._events: "queue.Queue" = queue.Queue()
+        # Typed records for every result of the last scan; the table shows a view of them
+        self._records: List[Dict] = []
+        self._shown: List[Dict] = []
+        self._sort = ("score", True)
+        self._scan: Dict = {}
 
         self._build_controls()
         self._build_table()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    # Worker -> UI messages: ("row", symbol, results), ("done", errors, probe) or ("failed", message)
+    POLL_MS = 100
+    BATCH = 25
+
+    def _on_close(self) -> None:
+        self._cancel.set()
+        self.destroy()
 
     def _build_controls(self) -> None:
         # Section 1: Source & Symbols
@@ -87,11 +148,16 @@ class App(tk.Tk):
         act_frm = ttk.LabelFrame(self, text="3. Analyze", padding=10)
         act_frm.pack(fill=tk.X, padx=8, pady=(0, 6))
 
-        ttk.Button(act_frm, text="Analyze", command=self._analyze).grid(row=0, column=0, padx=(0, 8))
+        self.btn_analyze = ttk.Button(act_frm, text="Analyze", command=self._analyze)
+        self.btn_analyze.grid(row=0, column=0, padx=(0, 8))
+        self.btn_cancel = ttk.Button(act_frm, text="Cancel", command=self._cancel_analysis, state="disabled")
+        self.btn_cancel.grid(row=0, column=1, padx=(0, 8))
         self.only_buy_var = tk.BooleanVar(value=False)
-        ttk.Checkbutton(act_frm, text="Show BUY only", variable=self.only_buy_var).grid(row=0, column=1, sticky=tk.W)
-        ttk.Button(act_frm, text="Columns", command=self._show_columns_help).grid(row=0, column=2, padx=(8, 0))
-        ttk.Button(act_frm, text="Options", command=self._open_options).grid(row=0, column=3, padx=(8, 0))
+        ttk.Checkbutton(act_frm, text="Show BUY only", variable=self.only_buy_var, command=self._render).grid(row=0, column=2, sticky=tk.W)
+        ttk.Button(act_frm, text="Columns", command=self._show_columns_help).grid(row=0, column=3, padx=(8, 0))
+        ttk.Button(act_frm, text="Options", command=self._open_options).grid(row=0, column=4, padx=(8, 0))
+        self.progress = ttk.Progressbar(act_frm, orient="horizontal", mode="determinate", length=200)
+        self.progress.grid(row=0, column=5, padx=(12, 0), sticky=tk.W)
 
         # Status
         self.status_var = tk.StringVar(value="Ready")
@@ -102,7 +168,7 @@ class App(tk.Tk):
         self._toggle_controls()
 
     def _build_table(self) -> None:
-        columns = ("symbol", "score", "decision", "last_close", "dist200", "slope50", "last_signal")
+        columns = COLUMNS
         self.tree = ttk.Treeview(self, columns=columns, show="headings")
         self.tree.heading("symbol", text="Symbol")
         self.tree.heading("score", text="Score")
@@ -258,97 +324,186 @@ class App(tk.Tk):
             messagebox.showerror("Parameters", "Fast/Slow/Top must be integers.")
             return
 
-        self.status_var.set("Analyzing...")
-        self.update_idletasks()
-
-        # Build loader and analyze
+        # Build loader; fetching and scoring run on a worker thread
         from .data.provider import get_loader
-        loader = get_loader(self.source_var.get(), data_dir=data_dir, api_key=self.apikey_var.get().strip())
+        source = self.source_var.get()
+        api_key = self.apikey_var.get().strip()
+        loader = get_loader(source, data_dir=data_dir, api_key=api_key)
         # Add cache + throttle
         try:
             from .data.cache import make_cached_loader
-            loader = make_cached_loader(loader, source=self.source_var.get(), cache_dir=".cache", ttl_hours=self.ttl_hours, throttle_ms=self.throttle_ms)
+            loader = make_cached_loader(loader, source=source, cache_dir=".cache", ttl_hours=self.ttl_hours, throttle_ms=self.throttle_ms)
         except Exception:
             pass
-        ranked = analyze_and_rank_with_loader(symbols, loader, fast=fast, slow=slow)
-        if self.only_buy_var.get():
-            ranked = [r for r in ranked if (r.get("meta", {}).get("decision") == "BUY")]
-
-        # Clear table
-        for iid in self.tree.get_children():
-            self.tree.delete(iid)
-
-        # Populate
-        for item in ranked[: top]:
-            meta = item["meta"]
-            last_close = meta.get("last_close")
-            dist200 = meta.get("dist_200sma_pct")
-            slope50 = meta.get("sma50_slope")
-            last_signal = meta.get("last_signal") or "none"
-            decision = meta.get("decision") or "DON'T BUY"
-
-            def fmt(v, f):
-                return f.format(v) if isinstance(v, (int, float)) else "nan"
-
-            row = (
-                item["symbol"],
-                f"{item['score']:.3f}",
-                decision,
-                fmt(last_close, "{:.2f}"),
-                fmt(dist200, "{:.2f}"),
-                fmt(slope50, "{:.4f}"),
-                last_signal,
-            )
-            tag = "even" if (len(self.tree.get_children()) % 2 == 0) else "odd"
-            self.tree.insert("", tk.END, values=row, tags=(tag,))
-
-        self.status_var.set(f"Done. Shown {min(top, len(ranked))} of {len(ranked)} symbols.")
-        if len(ranked) == 0 and len(symbols) > 0:
-            # Provide a targeted diagnostic for Alpha Vantage
-            if self.source_var.get() == "alphavantage":
-                try:
+
+        self._records = []
+        self._render()
+        self._scan = {"symbols": symbols, "source": source, "api_key": api_key, "top": top, "done": 0}
+        self._cancel.clear()
+        self._events = queue.Queue()
+        self.progress.configure(maximum=len(symbols), value=0)
+        self.btn_analyze.configure(state="disabled")
+        self.btn_cancel.configure(state="normal")
+        self.status_var.set(f"Analyzing 0/{len(symbols)}...")
+        self._worker = threading.Thread(
+            target=self._run_analysis, args=(symbols, loader, fast, slow, source, api_key, self._events), name="stock-analyze", daemon=True
+        )
+        self._worker.start()
+        self.after(self.POLL_MS, self._drain_events)
+
+    def _run_analysis(self, symbols: List[str], loader, fast: int, slow: int, source: str, api_key: str, events: "queue.Queue") -> None:
+        """Worker thread: fetch and score, posting each symbol's results to the UI queue."""
+        from .recommend import iter_analyze_with_loader
+
+        errors: Dict[str, str] = {}
+        found = 0
+        try:
+            for sym, rows in iter_analyze_with_loader(symbols, loader, fast=fast, slow=slow, errors=errors):
+                found += len(rows)
+                events.put(("row", sym, rows))
+                if self._cancel.is_set():
+                    break
+        except Exception as e:
+            events.put(("failed", str(e)))
+            return
+        probe = None
+        if not found and not self._cancel.is_set() and source in ("alphavantage", "yahoo"):
+            # The diagnostic request runs here too, so it cannot freeze the window
+            try:
+                if source == "alphavantage":
                     from .data.alpha_vantage import probe_alphavantage
-                    probe = probe_alphavantage(symbols[0], self.apikey_var.get().strip() or "")
-                    status = probe.get("status", "error")
-                    msg = probe.get("message", "Unknown error")
-                    extra = ""
-                    if probe.get("keys"):
-                        extra = f"\nKeys: {probe.get('keys')}"
-                    if probe.get("raw"):
-                        extra += f"\nRaw: {probe.get('raw')}"
-                    messagebox.showwarning(
-                        "No Data",
-                        f"Alpha Vantage returned no data for {symbols[0]}\n\n"
-                        f"Status: {status}\nMessage: {msg}{extra}\n\n"
-                        "Tips: 1) Use demo+MSFT for a quick test, 2) one symbol at a time,\n"
-                        "3) wait 60s (rate limits), 4) verify API key and internet connectivity."
-                    )
-                except Exception:
-                    messagebox.showwarning(
-                        "No Data",
-                        "Alpha Vantage returned no data for the requested symbols.\n\n"
-                        "Try: 1) testing with demo key + MSFT, 2) one symbol at a time,\n"
-                        "3) wait 60s (rate limits), 4) verify API key and internet connectivity."
-                    )
-            elif self.source_var.get() == "yahoo":
-                try:
+                    probe = probe_alphavantage(symbols[0], api_key or "")
+                else:
                     from .data.yahoo import probe_yahoo
                     probe = probe_yahoo(symbols[0])
-                    status = probe.get("status", "error")
-                    msg = probe.get("message", "Unknown error")
-                    host = probe.get("host", "query1")
-                    messagebox.showwarning(
-                        "No Data",
-                        f"Yahoo returned no data for {symbols[0]}\n\n"
-                        f"Status: {status}\nMessage: {msg}\nHost: {host}\n\n"
-                        "Tips: 1) Try a single liquid ticker like MSFT, 2) wait 30s to avoid limits,\n"
-                        "3) check network/proxy settings, 4) try CSV files if blocked."
-                    )
-                except Exception:
-                    messagebox.showwarning(
-                        "No Data",
-                        "Yahoo returned no data. Try a single symbol (e.g., MSFT), wait briefly, or check network."
-                    )
+            except Exception:
+                probe = {}
+        events.put(("done", errors, probe))
+
+    def _cancel_analysis(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            self._cancel.set()
+            self.btn_cancel.configure(state="disabled")
+            self.status_var.set("Cancelling after the current symbol...")
+
+    def _drain_events(self) -> None:
+        """Apply queued worker results in small batches, then reschedule itself."""
+        batch: List = []
+        finished = None
+        try:
+            while len(batch) < self.BATCH:
+                ev = self._events.get_nowait()
+                if ev[0] == "row":
+                    batch.append(ev)
+                else:
+                    finished = ev
+                    break
+        except queue.Empty:
+            pass
+        scan = self._scan
+        for _tag, _sym, rows in batch:
+            scan["done"] += 1
+            self._records.extend(_record(item) for item in rows)
+        if batch:
+            self.progress.configure(value=scan["done"])
+            self._render()
+            if finished is None:
+                self.status_var.set(f"Analyzing {scan['done']}/{len(scan['symbols'])}...")
+        if finished is not None:
+            self._finish_analysis(finished)
+            return
+        # Keep draining promptly while a backlog remains, otherwise poll
+        self.after(1 if batch and not self._events.empty() else self.POLL_MS, self._drain_events)
+
+    def _render(self) -> None:
+        """Bind the current view (filter -> top N by score -> column sort) to the table.
+
+        Table rows are a fixed pool of item IDs (r0, r1, ...) whose stripe depends
+        only on position, so a re-render just rewrites the values of slots whose
+        record changed and inserts/deletes the difference in count.
+        """
+        recs = self._records
+        if self.only_buy_var.get():
+            recs = [r for r in recs if r["buy"]]
+        try:
+            top = max(1, int(self.top_var.get()))
+        except Exception:
+            top = self._scan.get("top", 10)
+        view = heapq.nlargest(top, recs, key=lambda r: r["key"][1])
+        col, descending = self._sort
+        if (col, descending) != ("score", True):
+            view = _sort_records(view, COLUMNS.index(col), descending)
+        shown = self._shown
+        for i, rec in enumerate(view):
+            if i < len(shown):
+                if shown[i] is not rec:
+                    self.tree.item(f"r{i}", values=rec["values"])
+            else:
+                self.tree.insert("", tk.END, iid=f"r{i}", values=rec["values"], tags=("even" if i % 2 == 0 else "odd",))
+        if len(shown) > len(view):
+            self.tree.delete(*[f"r{i}" for i in range(len(view), len(shown))])
+        self._shown = view
+
+    def _finish_analysis(self, event: tuple) -> None:
+        self._worker = None
+        self.btn_analyze.configure(state="normal")
+        self.btn_cancel.configure(state="disabled")
+        scan = self._scan
+        if event[0] == "failed":
+            self.status_var.set("Analysis failed.")
+            messagebox.showerror("Analyze", f"Analysis failed: {event[1]}")
+            return
+        _tag, errors, probe = event
+        shown = len(self._shown)
+        skipped = f", {len(errors)} skipped" if errors else ""
+        if self._cancel.is_set():
+            self.status_var.set(f"Cancelled after {scan['done']}/{len(scan['symbols'])} symbols. Shown {shown} of {len(self._records)}{skipped}.")
+            return
+        self.status_var.set(f"Done. Shown {shown} of {len(self._records)} symbols{skipped}.")
+        if probe is None:
+            return
+        symbols = scan["symbols"]
+        # Provide a targeted diagnostic for the source
+        if scan["source"] == "alphavantage":
+            if probe:
+                status = probe.get("status", "error")
+                msg = probe.get("message", "Unknown error")
+                extra = ""
+                if probe.get("keys"):
+                    extra = f"\nKeys: {probe.get('keys')}"
+                if probe.get("raw"):
+                    extra += f"\nRaw: {probe.get('raw')}"
+                messagebox.showwarning(
+                    "No Data",
+                    f"Alpha Vantage returned no data for {symbols[0]}\n\n"
+                    f"Status: {status}\nMessage: {msg}{extra}\n\n"
+                    "Tips: 1) Use demo+MSFT for a quick test, 2) one symbol at a time,\n"
+                    "3) wait 60s (rate limits), 4) verify API key and internet connectivity."
+                )
+            else:
+                messagebox.showwarning(
+                    "No Data",
+                    "Alpha Vantage returned no data for the requested symbols.\n\n"
+                    "Try: 1) testing with demo key + MSFT, 2) one symbol at a time,\n"
+                    "3) wait 60s (rate limits), 4) verify API key and internet connectivity."
+                )
+        elif scan["source"] == "yahoo":
+            if probe:
+                status = probe.get("status", "error")
+                msg = probe.get("message", "Unknown error")
+                host = probe.get("host", "query1")
+                messagebox.showwarning(
+                    "No Data",
+                    f"Yahoo returned no data for {symbols[0]}\n\n"
+                    f"Status: {status}\nMessage: {msg}\nHost: {host}\n\n"
+                    "Tips: 1) Try a single liquid ticker like MSFT, 2) wait 30s to avoid limits,\n"
+                    "3) check network/proxy settings, 4) try CSV files if blocked."
+                )
+            else:
+                messagebox.showwarning(
+                    "No Data",
+                    "Yahoo returned no data. Try a single symbol (e.g., MSFT), wait briefly, or check network."
+                )
 
     def _open_options(self) -> None:
         win = tk.Toplevel(self)
@@ -406,22 +561,9 @@ class App(tk.Tk):
         )
 
     def _sort_by(self, col: str, descending: bool) -> None:
-        data = []
-        for iid in self.tree.get_children(""):
-            vals = self.tree.item(iid, "values")
-            data.append((vals, iid))
-        index_map = {"symbol": 0, "score": 1, "decision": 2, "last_close": 3, "dist200": 4, "slope50": 5, "last_signal": 6}
-        idx = index_map.get(col, 0)
-
-        def parse(v: str):
-            try:
-                return float(v)
-            except Exception:
-                return v
-
-        data.sort(key=lambda x: parse(x[0][idx]), reverse=descending)
-        for i, (_, iid) in enumerate(data):
-            self.tree.move(iid, "", i)
+        # Sorts the typed records, never the cell strings; works mid-scan too
+        self._sort = (col, descending)
+        self._render()
         # Toggle sort order next time
         self.tree.heading(col, command=lambda c=col: self._sort_by(c, not descending))
 
@@ -1,4 +1,5 @@
-from typing import List, Optional, Tuple
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
 
 
 def sma(values: List[float], window: int) -> List[Optional[float]]:
@@ -76,3 +77,158 @@ def macd(values: List[float], fast: int = 12, slow: int = 26, signal: int = 9) -
     hist: List[Optional[float]] = [None if macd_line[i] is None or signal_line[i] is None else macd_line[i] - signal_line[i] for i in range(len(values))]
     return macd_line, signal_line, hist
 
+
+
+# --- Online (streaming) indicator state ---
+#
+# Each state consumes one value per update() in O(1) and reproduces the batch
+# functions above bar for bar. to_dict()/from_dict() round-trip through JSON so
+# the state can be persisted next to the cached series and resumed later.
+
+
+class SMAState:
+    def __init__(self, window: int) -> None:
+        if window <= 0:
+            raise ValueError("window must be > 0")
+        self.window = window
+        self.count = 0
+        self.total = 0.0
+        self.buf: Deque[float] = deque()
+        self.value: Optional[float] = None
+
+    def update(self, v: float) -> Optional[float]:
+        self.total += v
+        if len(self.buf) == self.window:
+            self.total -= self.buf.popleft()
+        self.buf.append(v)
+        self.count += 1
+        if self.count >= self.window:
+            self.value = self.total / self.window
+        return self.value
+
+    def to_dict(self) -> Dict:
+        return {"window": self.window, "count": self.count, "total": self.total, "buf": list(self.buf), "value": self.value}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SMAState":
+        st = cls(int(data["window"]))
+        st.count = int(data["count"])
+        st.total = float(data["total"])
+        st.buf = deque(float(v) for v in data["buf"])
+        st.value = data.get("value")
+        return st
+
+
+class EMAState:
+    def __init__(self, window: int) -> None:
+        if window <= 0:
+            raise ValueError("window must be > 0")
+        self.window = window
+        self.k = 2 / (window + 1)
+        self.value: Optional[float] = None
+
+    def update(self, v: float) -> float:
+        if self.value is None:
+            self.value = v
+        else:
+            self.value = v * self.k + self.value * (1 - self.k)
+        return self.value
+
+    def to_dict(self) -> Dict:
+        return {"window": self.window, "value": self.value}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "EMAState":
+        st = cls(int(data["window"]))
+        st.value = data.get("value")
+        return st
+
+
+class RSIState:
+    def __init__(self, window: int = 14) -> None:
+        if window <= 0:
+            raise ValueError("window must be > 0")
+        self.window = window
+        self.count = 0
+        self.prev: Optional[float] = None
+        self.gains = 0.0
+        self.losses = 0.0
+        self.changes: Deque[float] = deque()
+        self.value: Optional[float] = None
+
+    def update(self, v: float) -> Optional[float]:
+        if self.prev is None:
+            self.prev = v
+            self.count = 1
+            return None
+        change = v - self.prev
+        self.prev = v
+        i = self.count
+        self.count += 1
+        self.gains += max(change, 0.0)
+        self.losses += max(-change, 0.0)
+        self.changes.append(change)
+        if i >= self.window:
+            old_change = self.changes.popleft()
+            self.gains -= max(old_change, 0.0)
+            self.losses -= max(-old_change, 0.0)
+            avg_gain = self.gains / self.window
+            avg_loss = self.losses / self.window
+            if avg_loss == 0:
+                self.value = 100.0
+            else:
+                rs = avg_gain / avg_loss
+                self.value = 100.0 - (100.0 / (1 + rs))
+        return self.value
+
+    def to_dict(self) -> Dict:
+        return {
+            "window": self.window,
+            "count": self.count,
+            "prev": self.prev,
+            "gains": self.gains,
+            "losses": self.losses,
+            "changes": list(self.changes),
+            "value": self.value,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "RSIState":
+        st = cls(int(data["window"]))
+        st.count = int(data["count"])
+        st.prev = data.get("prev")
+        st.gains = float(data["gains"])
+        st.losses = float(data["losses"])
+        st.changes = deque(float(v) for v in data["changes"])
+        st.value = data.get("value")
+        return st
+
+
+class MACDState:
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9) -> None:
+        self.fast = EMAState(fast)
+        self.slow = EMAState(slow)
+        self.signal_window = signal
+        self.k = 2 / (signal + 1)
+        self.signal: Optional[float] = None
+        self.value: Optional[Tuple[float, float, float]] = None
+
+    def update(self, v: float) -> Tuple[float, float, float]:
+        line = float(self.fast.update(v)) - float(self.slow.update(v))
+        self.signal = line if self.signal is None else line * self.k + self.signal * (1 - self.k)
+        self.value = (line, self.signal, line - self.signal)
+        return self.value
+
+    def to_dict(self) -> Dict:
+        return {"fast": self.fast.to_dict(), "slow": self.slow.to_dict(), "signal_window": self.signal_window, "signal": self.signal}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "MACDState":
+        st = cls(int(data["fast"]["window"]), int(data["slow"]["window"]), int(data["signal_window"]))
+        st.fast = EMAState.from_dict(data["fast"])
+        st.slow = EMAState.from_dict(data["slow"])
+        st.signal = data.get("signal")
+        if st.signal is not None and st.fast.value is not None and st.slow.value is not None:
+            line = float(st.fast.value) - float(st.slow.value)
+            st.value = (line, st.signal, line - st.signal)
+        return st
@@ -0,0 +1,130 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def error_class(exc: BaseException) -> str:
+    """Short, low-cardinality label for an upstream exception."""
+    kind = getattr(exc, "kind", None)
+    if isinstance(kind, str):
+        return kind
+    code = getattr(exc, "code", None)
+    if isinstance(code, int):
+        return f"HTTP{code}"
+    return type(exc).__name__
+
+
+class Metrics:
+    """Thread-safe in-process counters and timers.
+
+    Counters: inc("cache_requests_total", source="yahoo", result="hit")
+    Timers:   with timer("stage_seconds", stage="fetch"): ...
+    render_prometheus() produces the text exposition format served at /metrics;
+    summary() is the human-readable table printed by the CLI --profile option.
+    """
+
+    def __init__(self, prefix: str = "stock_") -> None:
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        # name -> labels -> [count, sum, max]
+        self._timers: Dict[str, Dict[LabelKey, List[float]]] = {}
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        key = _key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        key = _key(labels)
+        with self._lock:
+            series = self._timers.setdefault(name, {})
+            agg = series.get(key)
+            if agg is None:
+                series[key] = [1, seconds, seconds]
+            else:
+                agg[0] += 1
+                agg[1] += seconds
+                if seconds > agg[2]:
+                    agg[2] = seconds
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "counters": {n: {k: v for k, v in s.items()} for n, s in self._counters.items()},
+                "timers": {n: {k: list(v) for k, v in s.items()} for n, s in self._timers.items()},
+            }
+
+    def render_prometheus(self) -> str:
+        snap = self.snapshot()
+
+        def fmt(labels: LabelKey) -> str:
+            parts = [f'{k}="{v}"' for k, v in labels]
+            return "{" + ",".join(parts) + "}" if parts else ""
+
+        lines: List[str] = []
+        for name in sorted(snap["counters"]):
+            full = self.prefix + name
+            lines.append(f"# TYPE {full} counter")
+            for labels, value in sorted(snap["counters"][name].items()):
+                lines.append(f"{full}{fmt(labels)} {value:g}")
+        for name in sorted(snap["timers"]):
+            full = self.prefix + name
+            lines.append(f"# TYPE {full} summary")
+            for labels, (count, total, _peak) in sorted(snap["timers"][name].items()):
+                lines.append(f"{full}_count{fmt(labels)} {count:g}")
+                lines.append(f"{full}_sum{fmt(labels)} {total:.6f}")
+            lines.append(f"# TYPE {full}_max gauge")
+            for labels, (_count, _total, peak) in sorted(snap["timers"][name].items()):
+                lines.append(f"{full}_max{fmt(labels)} {peak:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        snap = self.snapshot()
+        lines: List[str] = []
+        rows = []
+        for name, series in snap["timers"].items():
+            for labels, (count, total, peak) in series.items():
+                label = ",".join(f"{k}={v}" for k, v in labels)
+                rows.append((total, f"{name}{'{' + label + '}' if label else ''}", count, peak))
+        if rows:
+            lines.append(f"{'TIMER':<60}{'COUNT':>8}{'TOTAL_S':>10}{'AVG_MS':>10}{'MAX_MS':>10}")
+            for total, label, count, peak in sorted(rows, reverse=True):
+                lines.append(f"{label:<60}{int(count):>8}{total:>10.3f}{total / count * 1000:>10.2f}{peak * 1000:>10.2f}")
+        counters = [
+            (f"{name}{'{' + ','.join(f'{k}={v}' for k, v in labels) + '}' if labels else ''}", value)
+            for name, series in snap["counters"].items()
+            for labels, value in series.items()
+        ]
+        if counters:
+            if lines:
+                lines.append("")
+            lines.append(f"{'COUNTER':<70}{'VALUE':>10}")
+            for label, value in sorted(counters):
+                lines.append(f"{label:<70}{value:>10g}")
+        return "\n".join(lines) if lines else "(no metrics recorded)"
+
+
+# Process-wide registry used by the data layer, the ranking pipeline and the web app
+METRICS = Metrics()
@@ -0,0 +1,131 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+MODES = ("cprofile", "sample")
+
+
+def _frame_label(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """Low-overhead statistical profiler for one thread.
+
+    A daemon thread snapshots the target thread's stack every `interval`
+    seconds via sys._current_frames(). Stacks are kept in collapsed
+    ("folded") form, root first, which flamegraph.pl / speedscope / inferno
+    read directly.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None) -> None:
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None or self.thread_id == me:
+                continue
+            names: List[str] = []
+            while frame is not None:
+                names.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            names.reverse()
+            self.stacks[";".join(names)] += 1
+            self.samples += 1
+
+    def start(self) -> "SamplingProfiler":
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stock-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def hot_functions(self, limit: int = 25) -> List[Dict]:
+        """Rank frames by self samples (leaf) and report inclusive samples too."""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, n in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += n
+            for f in set(frames):
+                total[f] += n
+        out = []
+        for func, n in own.most_common(limit):
+            out.append({
+                "function": func,
+                "self_samples": n,
+                "self_pct": 100.0 * n / max(1, self.samples),
+                "total_pct": 100.0 * total[func] / max(1, self.samples),
+            })
+        return out
+
+    def report(self, limit: int = 25) -> str:
+        lines = [f"Sampling profile: {self.samples} samples every {self.interval * 1000:.1f} ms", f"{'SELF%':>7}{'TOTAL%':>8}  FUNCTION"]
+        for row in self.hot_functions(limit):
+            lines.append(f"{row['self_pct']:>7.1f}{row['total_pct']:>8.1f}  {row['function']}")
+        return "\n".join(lines)
+
+    def write_folded(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, n in sorted(self.stacks.items()):
+                f.write(f"{stack} {n}\n")
+
+
+def _cprofile_report(prof: cProfile.Profile, limit: int) -> str:
+    buf = io.StringIO()
+    stats = pstats.Stats(prof, stream=buf)
+    stats.strip_dirs().sort_stats("tottime").print_stats(limit)
+    return buf.getvalue().strip()
+
+
+def run_profiled(fn: Callable[[], object], mode: str = "cprofile", out_path: Optional[str] = None, limit: int = 25, interval: float = 0.005) -> Tuple[object, str]:
+    """Run fn() under a profiler and return (result, hot-function report text).
+
+    mode 'cprofile' is deterministic (exact call counts, higher overhead) and
+    out_path receives a pstats dump; mode 'sample' is statistical and out_path
+    receives folded stacks for flamegraph tools.
+    """
+    if mode not in MODES:
+        raise ValueError(f"unknown profiler mode '{mode}' (expected one of {', '.join(MODES)})")
+    t0 = time.perf_counter()
+    if mode == "sample":
+        sampler = SamplingProfiler(interval=interval).start()
+        try:
+            result = fn()
+        finally:
+            sampler.stop()
+        report = sampler.report(limit)
+        if out_path:
+            sampler.write_folded(out_path)
+    else:
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            result = fn()
+        finally:
+            prof.disable()
+        report = _cprofile_report(prof, limit)
+        if out_path:
+            prof.dump_stats(out_path)
+    elapsed = time.perf_counter() - t0
+    header = f"Profiled run took {elapsed:.3f}s ({mode})"
+    if out_path:
+        header += f"; raw profile written to {out_path}"
+    return result, header + "\n" + report
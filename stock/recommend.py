@@ -1,7 +1,10 @@
-from typing import Dict, List, Tuple, Callable, Optional
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
 from .data.csv_provider import load_symbol_csv
-from .strategy.sma_crossover import evaluate_symbol
+from .data.resilience import FetchError
+from .metrics import METRICS
+from .strategy.registry import IndicatorCache, get_strategy
+from .strategy.sma_crossover import CrossoverState, evaluate_symbol_incremental
 
 
 def _sparkline_svg(closes: List[float], sma_fast: List[Optional[float]], sma_slow: List[Optional[float]], last_n: int = 90, width: int = 220, height: int = 60) -> str:
@@ -61,8 +64,11 @@ def _score(features: Dict) -> float:
     events = features.get("events") or []
     if events:
         idx, last_type = events[-1]
+        n_bars = features.get("n_bars")
+        if n_bars is None:
+            n_bars = len(features["sma_fast"])
         # fresher events get higher weight
-        recency = max(1, 10 if idx >= len(features["sma_fast"]) - 10 else len(features["sma_fast"]) - idx)
+        recency = max(1, 10 if idx >= n_bars - 10 else n_bars - idx)
         if last_type == "bull":
             score += 2.0 + 10.0 / recency
         else:
@@ -119,38 +125,151 @@ def _decision(features: Dict) -> Tuple[str, List[str]]:
     return decision, reasons
 
 
-def analyze_and_rank_with_loader(symbols: List[str], loader: Callable[[str], Optional[Dict]], fast: int = 50, slow: int = 200, include_chart: bool = False) -> List[Dict]:
-    results: List[Dict] = []
+def _evaluate_with_state(sym: str, ts, fast: int, slow: int, state_store) -> Dict:
+    key = f"sma_crossover:{fast}:{slow}"
+    state = None
+    try:
+        raw = state_store.get(sym, key)
+        state = CrossoverState.from_dict(raw) if raw else None
+    except Exception:
+        state = None
+    feats, state, consumed = evaluate_symbol_incremental(ts, state, fast=fast, slow=slow)
+    if consumed:
+        state_store.put(sym, key, state.to_dict())
+    return feats
+
+
+def iter_analyze_with_loader(
+    symbols: List[str],
+    loader: Callable[[str], Optional[Dict]],
+    fast: int = 50,
+    slow: int = 200,
+    include_chart: bool = False,
+    state_store=None,
+    strategies: Optional[List[str]] = None,
+    errors: Optional[Dict[str, str]] = None,
+    features: bool = False,
+    snapshot=None,
+) -> Iterator[Tuple[str, List[Dict]]]:
+    """Evaluate symbols one at a time, yielding (symbol, results) as each finishes.
+
+    Same arguments as analyze_and_rank_with_loader, without the final sort.
+    Every symbol is yielded, with an empty list when it was skipped, so callers
+    can report progress; stop iterating to cancel the rest of the scan.
+    With features=True, meta['features'] holds the strategy's scalar features
+    (RSI, MACD histogram, bar count...) for exports.
+
+    With a snapshot (stock.snapshot.ScanSnapshot) and no chart, a symbol whose
+    data and parameters match its stored entry yields the stored results
+    without being evaluated; evaluated symbols are recorded into it.
+    """
+    strats = [get_strategy(name) for name in (strategies or ["sma_crossover"])]
+    if include_chart:
+        snapshot = None
+    if snapshot is not None:
+        from .snapshot import fingerprint
+
+        features = True
+        params_prefix = f"{','.join(s.name for s in strats)}:{fast}:{slow}"
+    timer = METRICS.timer
     for sym in symbols:
-        ts = loader(sym)
+        try:
+            with timer("stage_seconds", stage="load"):
+                ts = loader(sym)
+        except FetchError as e:
+            METRICS.inc("symbols_total", result=e.kind)
+            if errors is not None:
+                errors[sym] = f"{e.kind}: {e}"
+            yield sym, []
+            continue
         if not ts:
+            METRICS.inc("symbols_total", result="no_data")
+            yield sym, []
             continue
-        feats = evaluate_symbol(ts, fast=fast, slow=slow)
-        score = _score(feats)
-        decision, reasons = _decision(feats)
-        chart_svg = None
-        if include_chart:
-            try:
-                chart_svg = _sparkline_svg(ts.get("close", []), feats.get("sma_fast", []), feats.get("sma_slow", []))
-            except Exception:
-                chart_svg = None
-        results.append(
-            {
-                "symbol": sym,
-                "score": score,
-                "meta": {
-                    "currency": ts.get("_currency"),
-                    "last_close": feats.get("last_close"),
-                    "dist_200sma_pct": feats.get("dist_200sma_pct"),
-                    "sma50_slope": feats.get("sma50_slope"),
-                    "last_signal": feats.get("last_signal"),
-                    "decision": decision,
-                    "decision_reasons": reasons,
-                    "chart_svg": chart_svg,
-                },
-            }
-        )
+        METRICS.inc("symbols_total", result="analyzed")
+        if snapshot is not None:
+            fp = fingerprint(ts)
+            # ts.interval is the timeframe the strategies ran on (resampled or not)
+            params = f"{params_prefix}:{ts.interval}"
+            stored = snapshot.lookup(sym, fp, params)
+            if stored is not None:
+                yield sym, stored
+                continue
+        ind = IndicatorCache(ts)
+        results: List[Dict] = []
+        for strat in strats:
+            with timer("stage_seconds", stage="evaluate", strategy=strat.name):
+                if strat.name == "sma_crossover" and state_store is not None and not include_chart:
+                    feats = _evaluate_with_state(sym, ts, fast, slow, state_store)
+                else:
+                    feats = strat.evaluate(ind, fast=fast, slow=slow)
+            with timer("stage_seconds", stage="score", strategy=strat.name):
+                score = strat.score(feats)
+                decision, reasons = strat.decision(feats)
+            chart_svg = None
+            if include_chart:
+                try:
+                    with timer("stage_seconds", stage="sparkline"):
+                        chart_svg = _sparkline_svg(ts.get("close", []), feats.get("sma_fast") or ind.sma(fast), feats.get("sma_slow") or ind.sma(slow))
+                except Exception:
+                    chart_svg = None
+            results.append(
+                {
+                    "symbol": sym,
+                    "score": score,
+                    "meta": {
+                        "strategy": strat.name,
+                        "currency": ts.get("_currency"),
+                        "last_close": feats.get("last_close"),
+                        "dist_200sma_pct": feats.get("dist_200sma_pct"),
+                        "sma50_slope": feats.get("sma50_slope"),
+                        "last_signal": feats.get("last_signal"),
+                        "decision": decision,
+                        "decision_reasons": reasons,
+                        "chart_svg": chart_svg,
+                    },
+                }
+            )
+            if features:
+                results[-1]["meta"]["features"] = {k: v for k, v in feats.items() if v is None or isinstance(v, (int, float, str))}
+        if snapshot is not None:
+            snapshot.record(sym, fp, params, results)
+        yield sym, results
+
+
+def analyze_and_rank_with_loader(
+    symbols: List[str],
+    loader: Callable[[str], Optional[Dict]],
+    fast: int = 50,
+    slow: int = 200,
+    include_chart: bool = False,
+    state_store=None,
+    strategies: Optional[List[str]] = None,
+    errors: Optional[Dict[str, str]] = None,
+    snapshot=None,
+) -> List[Dict]:
+    """Evaluate and rank symbols with one or more registered strategies.
+
+    strategies: names from stock.strategy.registry (default: ['sma_crossover']).
+    All strategies for a symbol share one IndicatorCache, so an SMA/EMA needed
+    by several of them is computed once. Each (symbol, strategy) pair yields a
+    result; meta['strategy'] tells them apart.
 
+    When a state_store (see stock.data.cache.IndicatorStateStore) is given and no
+    chart is requested, persisted crossover state is resumed so only bars newer
+    than the previous run are processed.
+
+    Symbols whose loader raises FetchError are skipped; pass an `errors` dict
+    to collect {symbol: "kind: message"} for them.
+
+    Pass a stock.snapshot.ScanSnapshot to skip symbols unchanged since it was
+    saved (see iter_analyze_with_loader); saving it is up to the caller.
+    """
+    results: List[Dict] = []
+    for _sym, rows in iter_analyze_with_loader(
+        symbols, loader, fast=fast, slow=slow, include_chart=include_chart, state_store=state_store, strategies=strategies, errors=errors, snapshot=snapshot
+    ):
+        results.extend(rows)
     results.sort(key=lambda x: x["score"], reverse=True)
     return results
 
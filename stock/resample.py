@@ -0,0 +1,157 @@
+import json
+import os
+import time
+from datetime import date
+from typing import Callable, Optional
+
+from .data.timeseries import DAILY, INTERVALS, TimeSeries, TimeSeriesBuilder, check_interval, is_intraday
+from .metrics import METRICS
+
+# Unix day 0 (1970-01-01) as a proleptic Gregorian ordinal
+_EPOCH_ORDINAL = 719163
+
+
+def _day_fn(src: str, offset_seconds: int) -> Callable[[int], int]:
+    """Map a source time key to its day ordinal."""
+    if is_intraday(src):
+        return lambda t: (t + offset_seconds) // 86400 + _EPOCH_ORDINAL
+    return lambda o: o
+
+
+def _bucket_fn(src: str, target: str, offset_seconds: int) -> Callable[[int], int]:
+    """Map a source time key to the id of the target bar it belongs to."""
+    if is_intraday(target):
+        step = INTERVALS[target]
+        return lambda t: (t + offset_seconds) // step
+    to_day = _day_fn(src, offset_seconds)
+    if target == DAILY:
+        return to_day
+    if target == "1wk":
+        # Ordinal 1 (0001-01-01) is a Monday, so weeks run Monday to Sunday
+        return lambda k: (to_day(k) - 1) // 7
+
+    def _month(k: int) -> int:
+        d = date.fromordinal(to_day(k))
+        return d.year * 12 + d.month
+
+    return _month
+
+
+def check_timeframe(base: str, target: str) -> str:
+    """Normalized target; raises ValueError unless base bars can be aggregated into it."""
+    base = check_interval(base)
+    target = check_interval(target)
+    if INTERVALS[target] < INTERVALS[base] or (is_intraday(target) and not is_intraday(base)):
+        raise ValueError(f"cannot resample {base} bars to the finer timeframe {target}")
+    return target
+
+
+def resample(ts: TimeSeries, target: str, offset_minutes: int = 0) -> TimeSeries:
+    """Aggregate bars into a coarser timeframe in one pass.
+
+    Each output bar takes the open of its first input bar, the highest high,
+    the lowest low, the close of its last bar and the summed volume, and is
+    keyed by the time key of its first bar. The last bar may cover a period
+    still in progress. offset_minutes shifts intraday timestamps before
+    bucketing (e.g. -300 to cut days at midnight US/Eastern instead of UTC).
+
+    target: "1d", "1wk", "1mo" or an intraday interval longer than the
+    series'. Returns ts unchanged when target equals its interval; raises
+    ValueError when target is finer.
+    """
+    src = check_interval(ts.interval)
+    target = check_timeframe(src, target)
+    if target == src:
+        return ts
+
+    bucket = _bucket_fn(src, target, offset_minutes * 60)
+    # Date-keyed timeframes built from intraday bars are keyed by the first bar's day
+    label = _day_fn(src, offset_minutes * 60) if not is_intraday(target) else (lambda t: t)
+    builder = TimeSeriesBuilder()
+    append = builder.append
+    cur: Optional[int] = None
+    key = 0
+    o = h = l = c = 0.0
+    v = 0
+    for t, bo, bh, bl, bc, bv in zip(ts["date"], ts["open"], ts["high"], ts["low"], ts["close"], ts["volume"]):
+        b = bucket(t)
+        if b != cur:
+            if cur is not None:
+                append(label(key), o, h, l, c, v)
+            cur, key, o, h, l, c, v = b, t, bo, bh, bl, bc, bv
+        else:
+            if bh > h:
+                h = bh
+            if bl < l:
+                l = bl
+            c = bc
+            v += bv
+    if cur is not None:
+        append(label(key), o, h, l, c, v)
+    return builder.build(currency=ts.currency, interval=target)
+
+
+def make_resampled_loader(
+    loader: Callable[[str], Optional[TimeSeries]],
+    target: str,
+    source: Optional[str] = None,
+    cache_dir: Optional[str] = ".cache",
+    base_interval: str = DAILY,
+    ttl_hours: float = 24,
+    offset_minutes: int = 0,
+) -> Callable[[str], Optional[TimeSeries]]:
+    """Wrap a loader (usually a make_cached_loader) so it returns target bars.
+
+    Resampled series are stored next to their base entry as
+    <cache_dir>/<source>/<SYMBOL>@<target>~<base>.json and reused while the
+    base cache file is unchanged and within ttl_hours, so a hit reads the
+    short resampled series instead of decoding the base one (months of
+    minute bars for a daily view). Without source/cache_dir the result is
+    recomputed on every call.
+    """
+    from .data.cache import _atomic_write, _decode_timeseries, _encode_timeseries, cache_path
+
+    base_interval = check_interval(base_interval)
+    target = check_timeframe(base_interval, target)
+    if target == base_interval:
+        return loader
+    src = (source or "").lower()
+    ttl_secs = max(0.0, ttl_hours) * 3600
+    label = f"{target}~{base_interval}"
+
+    def _load(symbol: str) -> Optional[TimeSeries]:
+        sym = symbol.upper().strip()
+        if not src or cache_dir is None:
+            ts = loader(sym)
+            return resample(ts, target, offset_minutes) if ts else ts
+
+        base_path = cache_path(cache_dir, src, sym, base_interval)
+        path = os.path.join(cache_dir, src, f"{sym}@{label}.json")
+        try:
+            base_mtime = os.path.getmtime(base_path)
+            if time.time() - base_mtime <= ttl_secs:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("base_mtime") == base_mtime:
+                    METRICS.inc("resample_requests_total", timeframe=target, result="hit")
+                    # Keep the base entry recent for LRU eviction; its mtime stays the fetch time
+                    os.utime(base_path, (time.time(), base_mtime))
+                    return _decode_timeseries(data)
+        except (OSError, ValueError, KeyError):
+            pass
+
+        ts = loader(sym)
+        if not ts:
+            return ts
+        with METRICS.timer("stage_seconds", stage="resample", timeframe=target):
+            out = resample(ts, target, offset_minutes)
+        METRICS.inc("resample_requests_total", timeframe=target, result="miss")
+        try:
+            data = _encode_timeseries(out)
+            data["base_mtime"] = os.path.getmtime(base_path)
+            _atomic_write(path, json.dumps(data, separators=(",", ":")))
+        except OSError:
+            pass
+        return out
+
+    return _load
@@ -0,0 +1,107 @@
+import json
+import os
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from .data.timeseries import COLUMNS, DAILY, TimeSeries, check_interval
+from .metrics import METRICS
+
+# Bump when scoring or decision logic changes so old snapshots are re-evaluated
+SNAPSHOT_VERSION = 1
+
+
+def snapshot_path(cache_dir: str, source: str, name: str = "default", interval: str = DAILY, timeframe: Optional[str] = None) -> str:
+    """<cache_dir>/<source>/_snapshot-<name>.json (the cache tools treat _-prefixed files as 'other').
+
+    Scans of other bars get their own file: _snapshot-<name>@<interval>.json,
+    or _snapshot-<name>@<timeframe>~<interval>.json when resampled.
+    """
+    interval = check_interval(interval)
+    timeframe = check_interval(timeframe or interval)
+    if timeframe != interval:
+        name = f"{name}@{timeframe}~{interval}"
+    elif interval != DAILY:
+        name = f"{name}@{interval}"
+    return os.path.join(cache_dir, (source or "misc").lower(), f"_snapshot-{name}.json")
+
+
+def fingerprint(ts: TimeSeries) -> str:
+    """Cheap content hash of a series: bar count, interval and a CRC of every column."""
+    crc = 0
+    for name in COLUMNS:
+        crc = zlib.crc32(ts.column(name), crc)
+    return f"{len(ts)}:{ts.interval}:{ts.currency or ''}:{crc:08x}"
+
+
+class ScanSnapshot:
+    """Results of the last scan per symbol, reused while data and parameters match.
+
+    Layout: {"v", "saved_at", "symbols": {SYMBOL: {"fp", "params", "results"}}}
+    where results are the dicts iter_analyze_with_loader yielded (features
+    included, no chart). Symbols missing from a run keep their entry.
+    record() compares decisions with the previous entry made under the same
+    params, so after a scan changes() lists the BUYs gained and lost since
+    the snapshot was saved.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.saved_at: Optional[float] = None
+        self.symbols: Dict[str, Dict] = {}
+        self.reused = 0
+        self.evaluated = 0
+        self.new_buys: List[Tuple[str, str]] = []
+        self.lost_buys: List[Tuple[str, str]] = []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("v") == SNAPSHOT_VERSION:
+                self.saved_at = data.get("saved_at")
+                self.symbols = data.get("symbols") or {}
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def lookup(self, symbol: str, fp: str, params: str) -> Optional[List[Dict]]:
+        """Stored results when the symbol was last scanned with the same data and params."""
+        entry = self.symbols.get(symbol)
+        if entry and entry.get("fp") == fp and entry.get("params") == params:
+            self.reused += 1
+            METRICS.inc("snapshot_requests_total", result="unchanged")
+            return entry["results"]
+        return None
+
+    def record(self, symbol: str, fp: str, params: str, results: List[Dict]) -> None:
+        """Store freshly evaluated results and note decisions that flipped.
+
+        Entries made under other params (strategies, windows, timeframe) are
+        replaced without being compared.
+        """
+        self.evaluated += 1
+        METRICS.inc("snapshot_requests_total", result="evaluated")
+        prev = self.symbols.get(symbol)
+        if prev is not None and prev.get("params") == params:
+            before = {r["meta"].get("strategy"): r["meta"].get("decision") for r in prev.get("results", [])}
+            for r in results:
+                strategy = r["meta"].get("strategy")
+                if strategy not in before:
+                    continue
+                was_buy = before[strategy] == "BUY"
+                is_buy = r["meta"].get("decision") == "BUY"
+                if is_buy and not was_buy:
+                    self.new_buys.append((symbol, strategy))
+                elif was_buy and not is_buy:
+                    self.lost_buys.append((symbol, strategy))
+        self.symbols[symbol] = {"fp": fp, "params": params, "results": results}
+
+    def changes(self) -> Dict[str, List[Tuple[str, str]]]:
+        """(symbol, strategy) pairs that became or stopped being BUY in this run."""
+        return {"new_buys": list(self.new_buys), "lost_buys": list(self.lost_buys)}
+
+    def save(self) -> None:
+        from .data.cache import _atomic_write
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.saved_at = time.time()
+        data = {"v": SNAPSHOT_VERSION, "saved_at": self.saved_at, "symbols": self.symbols}
+        _atomic_write(self.path, json.dumps(data, separators=(",", ":")))
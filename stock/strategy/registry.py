@@ -0,0 +1,270 @@
+from typing import Dict, List, Optional, Sequence, Tuple, Type
+
+from .. import indicators
+from ..data.timeseries import TimeSeries
+from .sma_crossover import SLOPE_WINDOW, detect_crossovers, evaluate_symbol
+
+
+class IndicatorCache:
+    """Memoize indicator series for one symbol so strategies share the work.
+
+    Keys are (indicator, params); a scan creates one cache per symbol and hands
+    it to every strategy, so e.g. the slow SMA used by the crossover strategy is
+    reused as the trend filter of the RSI strategy.
+    """
+
+    def __init__(self, ts: TimeSeries) -> None:
+        self.ts = ts
+        self.closes: Sequence[float] = ts["close"]
+        self._memo: Dict[Tuple, object] = {}
+
+    def _get(self, key: Tuple, compute):
+        try:
+            return self._memo[key]
+        except KeyError:
+            value = self._memo[key] = compute()
+            return value
+
+    def sma(self, window: int) -> List[Optional[float]]:
+        return self._get(("sma", window), lambda: indicators.sma(self.closes, window))
+
+    def ema(self, window: int) -> List[Optional[float]]:
+        return self._get(("ema", window), lambda: indicators.ema(self.closes, window))
+
+    def rsi(self, window: int = 14) -> List[Optional[float]]:
+        return self._get(("rsi", window), lambda: indicators.rsi(self.closes, window))
+
+    def macd(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        def compute():
+            # Build on the cached EMAs instead of recomputing them
+            ema_fast = self.ema(fast)
+            ema_slow = self.ema(slow)
+            line = [float(a) - float(b) for a, b in zip(ema_fast, ema_slow)]
+            k = 2 / (signal + 1)
+            sig: List[Optional[float]] = []
+            prev: Optional[float] = None
+            for v in line:
+                prev = v if prev is None else v * k + prev * (1 - k)
+                sig.append(prev)
+            hist = [a - b for a, b in zip(line, sig)]
+            return line, sig, hist
+
+        return self._get(("macd", fast, slow, signal), compute)
+
+    def __len__(self) -> int:
+        return len(self._memo)
+
+
+def _dist_pct(last_close: Optional[float], ref: Optional[float]) -> Optional[float]:
+    if last_close is None or ref is None or ref == 0:
+        return None
+    return (last_close - float(ref)) / float(ref) * 100.0
+
+
+def _slope(series: List[Optional[float]]) -> Optional[float]:
+    if len(series) >= SLOPE_WINDOW and series[-1] is not None and series[-SLOPE_WINDOW] is not None:
+        return (float(series[-1]) - float(series[-SLOPE_WINDOW])) / SLOPE_WINDOW
+    return None
+
+
+class Strategy:
+    """Base class for rankable strategies.
+
+    Subclasses set name/label and implement evaluate(); score() and decision()
+    turn the features into a sortable number and a ('BUY'|"DON'T BUY", reasons)
+    pair. Features should include last_close, dist_200sma_pct, sma50_slope and
+    last_signal so every UI can render them.
+    """
+
+    name = ""
+    label = ""
+
+    def evaluate(self, ind: IndicatorCache, fast: int = 50, slow: int = 200) -> Dict:
+        raise NotImplementedError
+
+    def score(self, features: Dict) -> float:
+        raise NotImplementedError
+
+    def decision(self, features: Dict) -> Tuple[str, List[str]]:
+        raise NotImplementedError
+
+
+STRATEGIES: Dict[str, Type[Strategy]] = {}
+
+
+def register_strategy(cls: Type[Strategy]) -> Type[Strategy]:
+    """Class decorator adding a Strategy subclass to the registry under cls.name."""
+    if not cls.name:
+        raise ValueError("strategy must define a name")
+    STRATEGIES[cls.name] = cls
+    return cls
+
+
+def get_strategy(name: str) -> Strategy:
+    try:
+        return STRATEGIES[(name or "sma_crossover").lower()]()
+    except KeyError:
+        raise ValueError(f"unknown strategy '{name}' (available: {', '.join(sorted(STRATEGIES))})")
+
+
+def list_strategies() -> List[Tuple[str, str]]:
+    return [(name, cls.label or name) for name, cls in STRATEGIES.items()]
+
+
+@register_strategy
+class SmaCrossoverStrategy(Strategy):
+    name = "sma_crossover"
+    label = "SMA crossover"
+
+    def evaluate(self, ind: IndicatorCache, fast: int = 50, slow: int = 200) -> Dict:
+        return evaluate_symbol(ind.ts, fast=fast, slow=slow, sma_fast=ind.sma(fast), sma_slow=ind.sma(slow))
+
+    def score(self, features: Dict) -> float:
+        from ..recommend import _score
+        return _score(features)
+
+    def decision(self, features: Dict) -> Tuple[str, List[str]]:
+        from ..recommend import _decision
+        return _decision(features)
+
+
+@register_strategy
+class RsiStrategy(Strategy):
+    """Buy pullbacks: RSI low and turning up while price holds the slow SMA trend."""
+
+    name = "rsi"
+    label = "RSI pullback"
+    window = 14
+    oversold = 35.0
+
+    def evaluate(self, ind: IndicatorCache, fast: int = 50, slow: int = 200) -> Dict:
+        closes = ind.closes
+        rsi = ind.rsi(self.window)
+        sma_fast = ind.sma(fast)
+        sma_slow = ind.sma(slow)
+        last_close = closes[-1] if closes else None
+        last_rsi = rsi[-1] if rsi else None
+        prev_rsi = rsi[-SLOPE_WINDOW] if len(rsi) >= SLOPE_WINDOW else None
+        rising = last_rsi is not None and prev_rsi is not None and last_rsi > prev_rsi
+        last_signal = None
+        if last_rsi is not None:
+            last_signal = "bull" if last_rsi <= self.oversold else ("bear" if last_rsi >= 100.0 - self.oversold else None)
+        return {
+            "sma_fast": sma_fast,
+            "sma_slow": sma_slow,
+            "rsi": last_rsi,
+            "rsi_rising": rising,
+            "last_signal": last_signal,
+            "last_close": last_close,
+            "dist_200sma_pct": _dist_pct(last_close, sma_slow[-1] if sma_slow else None),
+            "sma50_slope": _slope(sma_fast),
+            "n_bars": len(closes),
+        }
+
+    def score(self, features: Dict) -> float:
+        rsi = features.get("rsi")
+        if not isinstance(rsi, (int, float)):
+            return 0.0
+        score = (50.0 - rsi) / 10.0
+        if features.get("rsi_rising"):
+            score += 1.0
+        dist = features.get("dist_200sma_pct")
+        if isinstance(dist, (int, float)) and dist >= 0:
+            score += 1.0
+        return float(score)
+
+    def decision(self, features: Dict) -> Tuple[str, List[str]]:
+        reasons: List[str] = []
+        checks = 0
+        rsi = features.get("rsi")
+        if isinstance(rsi, (int, float)) and rsi <= self.oversold:
+            checks += 1
+            reasons.append(f"RSI oversold ({rsi:.1f})")
+        else:
+            reasons.append("RSI not oversold")
+        if features.get("rsi_rising"):
+            checks += 1
+            reasons.append("RSI turning up")
+        else:
+            reasons.append("RSI not rising")
+        dist = features.get("dist_200sma_pct")
+        if isinstance(dist, (int, float)) and dist >= 0:
+            checks += 1
+            reasons.append("Price above 200SMA")
+        else:
+            reasons.append("Price not above 200SMA")
+        return ("BUY" if checks >= 2 else "DON'T BUY"), reasons
+
+
+@register_strategy
+class MacdStrategy(Strategy):
+    """Trend following on MACD/signal crossovers (12/26/9)."""
+
+    name = "macd"
+    label = "MACD crossover"
+    fast_window = 12
+    slow_window = 26
+    signal_window = 9
+
+    def evaluate(self, ind: IndicatorCache, fast: int = 50, slow: int = 200) -> Dict:
+        closes = ind.closes
+        line, sig, hist = ind.macd(self.fast_window, self.slow_window, self.signal_window)
+        idx, dirs = detect_crossovers(line, sig, last_only=True)
+        events = [(idx[0], "bull" if dirs[0] > 0 else "bear")] if idx else []
+        sma_fast = ind.sma(fast)
+        sma_slow = ind.sma(slow)
+        last_close = closes[-1] if closes else None
+        return {
+            "sma_fast": sma_fast,
+            "sma_slow": sma_slow,
+            "events": events,
+            "macd": line[-1] if line else None,
+            "macd_hist": hist[-1] if hist else None,
+            "macd_hist_slope": _slope(hist),
+            "last_signal": events[-1][1] if events else None,
+            "last_close": last_close,
+            "dist_200sma_pct": _dist_pct(last_close, sma_slow[-1] if sma_slow else None),
+            "sma50_slope": _slope(sma_fast),
+            "n_bars": len(closes),
+        }
+
+    def score(self, features: Dict) -> float:
+        score = 0.0
+        events = features.get("events") or []
+        if events:
+            idx, kind = events[-1]
+            n_bars = features.get("n_bars", 0)
+            # Same recency weighting as the SMA crossover score
+            recency = max(1, 10 if idx >= n_bars - 10 else n_bars - idx)
+            if kind == "bull":
+                score += 2.0 + 10.0 / recency
+            else:
+                score -= 1.0 + 10.0 / recency
+        hist = features.get("macd_hist")
+        last_close = features.get("last_close")
+        if isinstance(hist, (int, float)) and last_close:
+            # Histogram as % of price keeps scores comparable across symbols
+            score += 100.0 * hist / float(last_close)
+        return float(score)
+
+    def decision(self, features: Dict) -> Tuple[str, List[str]]:
+        reasons: List[str] = []
+        checks = 0
+        if features.get("last_signal") == "bull":
+            checks += 1
+            reasons.append("MACD above signal line")
+        else:
+            reasons.append("MACD below signal line")
+        macd = features.get("macd")
+        if isinstance(macd, (int, float)) and macd > 0:
+            checks += 1
+            reasons.append("MACD above zero")
+        else:
+            reasons.append("MACD not above zero")
+        slope = features.get("macd_hist_slope")
+        if isinstance(slope, (int, float)) and slope > 0:
+            checks += 1
+            reasons.append("Histogram rising")
+        else:
+            reasons.append("Histogram not rising")
+        return ("BUY" if checks >= 2 else "DON'T BUY"), reasons
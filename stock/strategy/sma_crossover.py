@@ -1,32 +1,88 @@
-from typing import Dict, List, Optional, Tuple
+from array import array
+from bisect import bisect_left
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
 
-from ..indicators import sma
+from ..data.timeseries import TimeSeries
+from ..indicators import SMAState, sma
 
+SLOPE_WINDOW = 5
 
-def _crossovers(fast: List[Optional[float]], slow: List[Optional[float]]) -> List[Tuple[int, str]]:
-    """Return list of (index, 'bull'|'bear') crossover events."""
-    events: List[Tuple[int, str]] = []
-    prev_diff: Optional[float] = None
-    for i in range(len(fast)):
-        f = fast[i]
-        s = slow[i]
+
+def _sign(f: Optional[float], s: Optional[float]) -> Optional[int]:
+    if f is None or s is None:
+        return None
+    diff = f - s
+    return (diff > 0) - (diff < 0)
+
+
+def detect_crossovers(fast: Sequence[Optional[float]], slow: Sequence[Optional[float]], last_only: bool = False) -> Tuple[array, array]:
+    """Return (indices, directions) of crossover events as compact arrays.
+
+    Events are sign changes of fast - slow over bars where both values exist:
+    a bar is a bull (+1) event when its difference is > 0 and the previous
+    bar's was <= 0, and a bear (-1) event when it is < 0 and the previous was
+    >= 0. A bar with diff == 0 is never an event itself but does reset the
+    sign, so touching and moving back to the same side (+, 0, +) counts as a
+    new event. With last_only=True the series is walked backwards and only
+    the most recent event is returned.
+    """
+    n = min(len(fast), len(slow))
+    idx = array("q")
+    dirs = array("b")
+    if last_only:
+        nxt_i = -1
+        nxt_s = 0
+        for i in range(n - 1, -1, -1):
+            sg = _sign(fast[i], slow[i])
+            if sg is None:
+                continue
+            if nxt_i >= 0 and nxt_s and nxt_s != sg:
+                idx.append(nxt_i)
+                dirs.append(nxt_s)
+                break
+            nxt_i, nxt_s = i, sg
+        return idx, dirs
+
+    prev: Optional[int] = None
+    for i, f, s in zip(range(n), fast, slow):
         if f is None or s is None:
             continue
         diff = f - s
-        if prev_diff is not None:
-            if prev_diff <= 0 and diff > 0:
-                events.append((i, "bull"))
-            elif prev_diff >= 0 and diff < 0:
-                events.append((i, "bear"))
-        prev_diff = diff
-    return events
+        sg = (diff > 0) - (diff < 0)
+        if sg and prev is not None and sg != prev:
+            idx.append(i)
+            dirs.append(sg)
+        prev = sg
+    return idx, dirs
 
 
-def evaluate_symbol(ts: Dict[str, List], fast: int = 50, slow: int = 200) -> Dict:
-    closes: List[float] = ts["close"]
-    sma_fast = sma(closes, fast)
-    sma_slow = sma(closes, slow)
-    events = _crossovers(sma_fast, sma_slow)
+def _crossovers(fast: List[Optional[float]], slow: List[Optional[float]], last_only: bool = False) -> List[Tuple[int, str]]:
+    """Return list of (index, 'bull'|'bear') crossover events."""
+    idx, dirs = detect_crossovers(fast, slow, last_only=last_only)
+    return [(i, "bull" if d > 0 else "bear") for i, d in zip(idx, dirs)]
+
+
+def evaluate_symbol(
+    ts: TimeSeries,
+    fast: int = 50,
+    slow: int = 200,
+    all_events: bool = False,
+    sma_fast: Optional[List[Optional[float]]] = None,
+    sma_slow: Optional[List[Optional[float]]] = None,
+) -> Dict:
+    """Compute crossover features. 'events' holds only the latest event unless all_events=True.
+
+    Precomputed SMA series (e.g. from a shared indicator cache) can be passed in.
+    """
+    if not isinstance(ts, TimeSeries):
+        ts = TimeSeries.from_dict(ts)
+    closes: Sequence[float] = ts["close"]
+    if sma_fast is None:
+        sma_fast = sma(closes, fast)
+    if sma_slow is None:
+        sma_slow = sma(closes, slow)
+    events = _crossovers(sma_fast, sma_slow, last_only=not all_events)
 
     last_signal: Optional[str] = None
     if events:
@@ -40,7 +96,7 @@ def evaluate_symbol(ts: Dict[str, List], fast: int = 50, slow: int = 200) -> Dic
         dist_200sma_pct = (last_close - float(last_slow)) / float(last_slow) * 100.0
 
     # 50SMA slope approximation via last N diffs
-    slope_window = 5
+    slope_window = SLOPE_WINDOW
     slope: Optional[float] = None
     if len(sma_fast) >= slope_window and sma_fast[-1] is not None and sma_fast[-slope_window] is not None:
         slope = (float(sma_fast[-1]) - float(sma_fast[-slope_window])) / slope_window
@@ -53,5 +109,114 @@ def evaluate_symbol(ts: Dict[str, List], fast: int = 50, slow: int = 200) -> Dic
         "last_close": last_close,
         "dist_200sma_pct": dist_200sma_pct,
         "sma50_slope": slope,
+        "n_bars": len(closes),
     }
 
+
+class CrossoverState:
+    """Online counterpart of evaluate_symbol: O(1) work per appended bar.
+
+    Tracks both SMAs, the last valid fast-slow difference, the latest crossover
+    event and the few recent fast SMA values needed for the slope feature.
+    """
+
+    def __init__(self, fast: int = 50, slow: int = 200) -> None:
+        self.fast = SMAState(fast)
+        self.slow = SMAState(slow)
+        self.n_bars = 0
+        self.prev_diff: Optional[float] = None
+        self.last_event: Optional[Tuple[int, str]] = None
+        self.recent_fast: Deque[Optional[float]] = deque(maxlen=SLOPE_WINDOW)
+        self.last_close: Optional[float] = None
+        self.last_date: Optional[int] = None
+
+    def update(self, close: float, date_ordinal: Optional[int] = None) -> None:
+        f = self.fast.update(close)
+        s = self.slow.update(close)
+        i = self.n_bars
+        self.n_bars += 1
+        self.recent_fast.append(f)
+        self.last_close = close
+        self.last_date = date_ordinal
+        if f is None or s is None:
+            return
+        diff = f - s
+        if self.prev_diff is not None:
+            if self.prev_diff <= 0 and diff > 0:
+                self.last_event = (i, "bull")
+            elif self.prev_diff >= 0 and diff < 0:
+                self.last_event = (i, "bear")
+        self.prev_diff = diff
+
+    def features(self) -> Dict:
+        last_slow = self.slow.value
+        dist_200sma_pct: Optional[float] = None
+        if self.last_close is not None and last_slow is not None and last_slow != 0:
+            dist_200sma_pct = (self.last_close - float(last_slow)) / float(last_slow) * 100.0
+        slope: Optional[float] = None
+        rf = self.recent_fast
+        if len(rf) >= SLOPE_WINDOW and rf[-1] is not None and rf[0] is not None:
+            slope = (float(rf[-1]) - float(rf[0])) / SLOPE_WINDOW
+        return {
+            "events": [self.last_event] if self.last_event else [],
+            "last_signal": self.last_event[1] if self.last_event else None,
+            "last_close": self.last_close,
+            "dist_200sma_pct": dist_200sma_pct,
+            "sma50_slope": slope,
+            "n_bars": self.n_bars,
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            "fast": self.fast.to_dict(),
+            "slow": self.slow.to_dict(),
+            "n_bars": self.n_bars,
+            "prev_diff": self.prev_diff,
+            "last_event": list(self.last_event) if self.last_event else None,
+            "recent_fast": list(self.recent_fast),
+            "last_close": self.last_close,
+            "last_date": self.last_date,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "CrossoverState":
+        st = cls(int(data["fast"]["window"]), int(data["slow"]["window"]))
+        st.fast = SMAState.from_dict(data["fast"])
+        st.slow = SMAState.from_dict(data["slow"])
+        st.n_bars = int(data["n_bars"])
+        st.prev_diff = data.get("prev_diff")
+        ev = data.get("last_event")
+        st.last_event = (int(ev[0]), str(ev[1])) if ev else None
+        st.recent_fast = deque(data.get("recent_fast") or [], maxlen=SLOPE_WINDOW)
+        st.last_close = data.get("last_close")
+        st.last_date = data.get("last_date")
+        return st
+
+
+def evaluate_symbol_incremental(ts: TimeSeries, state: Optional[CrossoverState] = None, fast: int = 50, slow: int = 200) -> Tuple[Dict, CrossoverState, int]:
+    """Resume a persisted CrossoverState with the bars newer than its last date.
+
+    Returns (features, state, bars_consumed). The state is rebuilt from the full
+    series when parameters changed or the stored last bar no longer matches the
+    data (e.g. the provider revised history).
+    """
+    if not isinstance(ts, TimeSeries):
+        ts = TimeSeries.from_dict(ts)
+    dates = ts["date"]
+    closes = ts["close"]
+    start = 0
+    if state is not None and state.fast.window == fast and state.slow.window == slow and state.last_date is not None:
+        pos = bisect_left(dates, state.last_date)
+        if pos < len(dates) and dates[pos] == state.last_date and closes[pos] == state.last_close:
+            start = pos + 1
+        else:
+            state = None
+    else:
+        state = None
+    if state is None:
+        state = CrossoverState(fast, slow)
+        start = 0
+    for i in range(start, len(closes)):
+        state.update(closes[i], dates[i])
+    return state.features(), state, len(closes) - start
+
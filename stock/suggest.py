@@ -0,0 +1,161 @@
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+MAX_DISTANCE = 2
+
+
+def bounded_levenshtein(a: str, b: str, bound: int) -> int:
+    """Edit distance, or bound + 1 as soon as it is known to exceed bound."""
+    if a == b:
+        return 0
+    la, lb = len(a), len(b)
+    if abs(la - lb) > bound:
+        return bound + 1
+    if la == 0 or lb == 0:
+        return max(la, lb)
+    prev = list(range(lb + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * lb
+        row_min = i
+        for j, cb in enumerate(b, 1):
+            v = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            cur[j] = v
+            if v < row_min:
+                row_min = v
+        if row_min > bound:
+            return bound + 1
+        prev = cur
+    d = prev[-1]
+    return d if d <= bound else bound + 1
+
+
+def _deletes(word: str, depth: int) -> List[Set[str]]:
+    """levels[k] = strings obtained by deleting exactly k characters from word (k <= depth)."""
+    levels = [{word}]
+    for _ in range(depth):
+        levels.append({s[:i] + s[i + 1:] for s in levels[-1] for i in range(len(s))} if levels[-1] else set())
+    return levels
+
+
+class SymbolIndex:
+    """Deletion-neighbourhood index for bounded edit-distance lookups.
+
+    Every symbol is stored under each string reachable by deleting up to
+    max_distance characters. Two symbols within distance r always share such a
+    key with at most r deletions on each side, so a lookup only verifies the
+    handful of symbols that share a key with the query, widening r one step at
+    a time and stopping as soon as a match at that distance is found.
+    Symbols keep their insertion order as a rank to break ties in favour of
+    more common tickers.
+    """
+
+    def __init__(self, words: Iterable[str] = (), max_distance: int = MAX_DISTANCE) -> None:
+        self.max_distance = max_distance
+        self.words: List[str] = []
+        self.rank: Dict[str, int] = {}
+        # levels[k][key] -> ids of words that reach key with exactly k deletions
+        self.levels: List[Dict[str, List[int]]] = [{} for _ in range(max_distance + 1)]
+        for w in words:
+            self.add(w)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, word: object) -> bool:
+        return word in self.rank
+
+    def add(self, word: str) -> None:
+        if not word or word in self.rank:
+            return
+        wid = self.rank[word] = len(self.words)
+        self.words.append(word)
+        for k, keys in enumerate(_deletes(word, self.max_distance)):
+            level = self.levels[k]
+            for key in keys:
+                level.setdefault(key, []).append(wid)
+
+    def search(self, word: str, radius: int = MAX_DISTANCE) -> List[Tuple[int, str]]:
+        """All (distance, word) within radius, nearest first then by rank."""
+        radius = min(radius, self.max_distance)
+        seen: Set[int] = set()
+        out: List[Tuple[int, str]] = []
+        for wid in self._candidates(_deletes(word, radius), radius, radius, seen):
+            d = bounded_levenshtein(word, self.words[wid], radius)
+            if d <= radius:
+                out.append((d, self.words[wid]))
+        out.sort(key=lambda t: (t[0], self.rank[t[1]]))
+        return out
+
+    def nearest(self, word: str, radius: int = MAX_DISTANCE) -> Optional[str]:
+        if word in self.rank:
+            return word
+        radius = min(radius, self.max_distance)
+        qdel = _deletes(word, radius)
+        seen: Set[int] = set()
+        best: Optional[Tuple[int, int]] = None
+        for r in range(1, radius + 1):
+            # Every word within distance r shows up among the level <= r candidates
+            for wid in self._candidates(qdel, r, r, seen):
+                d = bounded_levenshtein(word, self.words[wid], radius)
+                if d <= radius and (best is None or (d, wid) < best):
+                    best = (d, wid)
+            if best is not None and best[0] <= r:
+                break
+        return self.words[best[1]] if best is not None else None
+
+    def _candidates(self, qdel: List[Set[str]], qdepth: int, wdepth: int, seen: Set[int]) -> List[int]:
+        out: List[int] = []
+        for keys in qdel[: qdepth + 1]:
+            for level in self.levels[: wdepth + 1]:
+                for key in keys:
+                    for wid in level.get(key, ()):
+                        if wid not in seen:
+                            seen.add(wid)
+                            out.append(wid)
+        return out
+
+
+def _universe(cache_dir: str) -> List[str]:
+    """Candidate symbols, most common first: COMMON_TICKERS, presets, then any cached exchange listing."""
+    from .universe import PRESETS
+    from .utils import COMMON_TICKERS
+
+    words: List[str] = list(COMMON_TICKERS)
+    for syms in PRESETS.values():
+        words.extend(syms)
+    try:
+        from .data.listing import listing_path, _read_index
+
+        path = listing_path(cache_dir, "active")
+        if os.path.exists(path):
+            words.extend(row["symbol"] for row in _read_index(path).rows)
+    except Exception:
+        pass
+    return words
+
+
+_INDEX: Optional[SymbolIndex] = None
+_INDEX_KEY: Optional[Tuple] = None
+_LOCK = threading.Lock()
+
+
+def get_index(cache_dir: str = ".cache") -> SymbolIndex:
+    """Build the suggestion index on first use; rebuilt only when the cached listing changes."""
+    global _INDEX, _INDEX_KEY
+    try:
+        from .data.listing import listing_path
+
+        key: Tuple = (cache_dir, os.path.getmtime(listing_path(cache_dir, "active")))
+    except Exception:
+        key = (cache_dir, None)
+    with _LOCK:
+        if _INDEX is None or _INDEX_KEY != key:
+            _INDEX = SymbolIndex(w.upper() for w in _universe(cache_dir))
+            _INDEX_KEY = key
+        return _INDEX
+
+
+def suggest(sym: str, radius: int = MAX_DISTANCE, cache_dir: str = ".cache") -> Optional[str]:
+    """Closest known symbol within radius edits, preferring common tickers on ties."""
+    return get_index(cache_dir).nearest(sym.upper().strip(), radius)
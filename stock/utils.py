@@ -3,11 +3,15 @@ import re
 from typing import List, Tuple
 
 
-def discover_symbols(data_dir: str) -> List[str]:
+def discover_symbols(data_dir: str, interval: str = "1d") -> List[str]:
+    """Symbols with a CSV in data_dir (intraday intervals: data_dir/<interval>/)."""
+    from .data.csv_provider import csv_dir
+
+    folder = csv_dir(data_dir, interval)
     symbols = []
     try:
-        for name in os.listdir(data_dir):
-            path = os.path.join(data_dir, name)
+        for name in os.listdir(folder):
+            path = os.path.join(folder, name)
             if os.path.isfile(path) and name.lower().endswith(".csv"):
                 symbols.append(os.path.splitext(name)[0])
     except FileNotFoundError:
@@ -52,39 +56,11 @@ def is_plausible_symbol(sym: str) -> bool:
     return bool(_SYMBOL_RE.match(sym))
 
 
-def _levenshtein(a: str, b: str) -> int:
-    if a == b:
-        return 0
-    if len(a) == 0:
-        return len(b)
-    if len(b) == 0:
-        return len(a)
-    dp = list(range(len(b) + 1))
-    for i, ca in enumerate(a, 1):
-        prev = dp[0]
-        dp[0] = i
-        for j, cb in enumerate(b, 1):
-            cur = dp[j]
-            cost = 0 if ca == cb else 1
-            dp[j] = min(
-                dp[j] + 1,      # deletion
-                dp[j - 1] + 1,  # insertion
-                prev + cost,    # substitution
-            )
-            prev = cur
-    return dp[-1]
-
-
 def suggest_symbol(sym: str) -> str | None:
-    # Offer suggestion if close to a common ticker (edit distance <= 2)
-    best = None
-    best_d = 10**9
-    for cand in COMMON_TICKERS:
-        d = _levenshtein(sym, cand)
-        if d < best_d:
-            best = cand
-            best_d = d
-    return best if best is not None and best_d <= 2 else None
+    # Offer suggestion if close to a known ticker (edit distance <= 2); see stock.suggest
+    from .suggest import suggest
+
+    return suggest(sym)
 
 
 def validate_and_suggest(symbols: List[str]) -> Tuple[List[str], List[Tuple[str, str | None]]]:
@@ -1,4 +1,4 @@
-import importlib
+import importlib.util
 import subprocess
 import sys
 import threading
@@ -6,7 +6,6 @@ import time
 import webbrowser
 from typing import List
 import socket
-import ctypes
 
 
 REQUIRED: List[str] = [
@@ -17,10 +16,12 @@ REQUIRED: List[str] = [
 
 
 def ensure_deps() -> None:
+    # find_spec only locates the package; the real imports happen once, when the server loads
     missing = []
     for name in REQUIRED:
         try:
-            importlib.import_module(name)
+            if importlib.util.find_spec(name) is None:
+                missing.append(name)
         except Exception:
             missing.append(name)
     if not missing:
@@ -43,12 +44,26 @@ def main() -> None:
     parser.add_argument("--port", type=int, default=8000, help="Port to bind (default: 8000)")
     parser.add_argument("--reload", action="store_true", help="Enable auto-reload (dev mode)")
     parser.add_argument("--lang", choices=["en", "it"], default="en", help="Default language to open (en/it)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes (default: 1). Workers share the throttle and cache through .cache/_shared.sqlite3",
+    )
     args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.workers > 1 and args.reload:
+        parser.error("--reload cannot be combined with --workers")
 
     # In a frozen EXE (PyInstaller), dependencies are bundled: skip pip
     is_frozen = getattr(sys, "frozen", False) or hasattr(sys, "_MEIPASS")
     if not is_frozen:
         ensure_deps()
+    elif args.workers > 1:
+        # Worker processes re-import the app by name, which the bundled EXE cannot do
+        print("--workers is not supported by the packaged EXE; running a single worker")
+        args.workers = 1
 
     # After ensuring deps, run the server via uvicorn
     import uvicorn
@@ -72,6 +87,8 @@ def main() -> None:
     if chosen_port != args.port:
         # Show a small dialog (Windows) informing the port change
         try:
+            import ctypes
+
             ctypes.windll.user32.MessageBoxW(0, f"La porta {args.port} era occupata. Uso la porta {chosen_port}.", "Stock Advisor", 0)
         except Exception:
             print(f"Port {args.port} busy, switching to {chosen_port}")
@@ -86,7 +103,11 @@ def main() -> None:
             pass
     threading.Thread(target=_open, args=(chosen_port,), daemon=True).start()
 
-    uvicorn.run(asgi_app, host=args.host, port=chosen_port, reload=args.reload)
+    if args.workers > 1:
+        # Multiple processes need the import string; each worker loads its own app
+        uvicorn.run("stock.web.server:app", host=args.host, port=chosen_port, workers=args.workers)
+    else:
+        uvicorn.run(asgi_app, host=args.host, port=chosen_port, reload=args.reload)
 
 
 if __name__ == "__main__":
@@ -1,20 +1,40 @@
-from typing import List, Optional, Dict
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Callable, Optional, Dict, Tuple
+import hashlib
+import json
 import os
 import sys
+import threading
+import time
 
 from fastapi import FastAPI, Request, Form
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, PlainTextResponse, Response
 
-from ..recommend import analyze_and_rank_with_loader
-from ..data.provider import get_loader, get_universe
-from ..data.cache import make_cached_loader
-from ..utils import discover_symbols, parse_symbols
-from ..universe import PRESETS, get_preset
+from ..utils import parse_symbols
+from ..universe import PRESETS
+from ..metrics import METRICS
+from ..strategy.registry import list_strategies
 
 
-app = FastAPI(title="Stock Trend Advisor")
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Opt-in background cache prewarming, configured via STOCK_REFRESH_* env vars
+    refresher = None
+    if os.getenv("STOCK_REFRESH", "").strip().lower() in ("1", "true", "yes", "on"):
+        from ..data.refresher import CacheRefresher
+        refresher = CacheRefresher.from_env().start()
+    _app.state.refresher = refresher
+    try:
+        yield
+    finally:
+        if refresher is not None:
+            refresher.stop()
+        if _SERVICE is not None:
+            _SERVICE.close()
+
+
+app = FastAPI(title="Stock Trend Advisor", lifespan=lifespan)
 
 # Resolve templates directory for normal and PyInstaller-frozen runs
 def _templates_dir() -> str:
@@ -25,90 +45,319 @@ def _templates_dir() -> str:
     root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
     return os.path.join(root, "stock", "web", "templates")
 
-templates = Jinja2Templates(directory=_templates_dir())
+_TEMPLATES = None
+
+
+def _templates():
+    """Jinja environment, created on the first page render rather than at import."""
+    global _TEMPLATES
+    if _TEMPLATES is None:
+        from fastapi.templating import Jinja2Templates
+
+        _TEMPLATES = Jinja2Templates(directory=_templates_dir())
+    return _TEMPLATES
+
+
+# -------- Page caching --------
+# Form pages and help pages depend only on the template, so each is rendered once
+# per template version and revalidated with ETag/Last-Modified (304 on repeat
+# visits). Analyze results are kept for a short time keyed by a hash of the
+# normalized form, so a refresh or a resubmit of the same form is served as-is.
+RESULT_CACHE_SECONDS = float(os.getenv("STOCK_RESULT_CACHE_SECONDS", "60"))
+RESULT_CACHE_SIZE = 64
+
+# template name -> (template mtime, body, etag)
+_PAGES: Dict[str, Tuple[float, bytes, str]] = {}
+# form hash -> (expires, body, etag, created)
+_RESULTS: "OrderedDict[str, Tuple[float, bytes, str, float]]" = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+
+def _not_modified(request: Request, etag: str, last_modified: float) -> bool:
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        # If-None-Match wins over If-Modified-Since when both are sent
+        tags = [t.strip() for t in inm.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+    ims = request.headers.get("if-modified-since")
+    if ims:
+        from email.utils import parsedate_to_datetime
+
+        try:
+            return int(last_modified) <= parsedate_to_datetime(ims).timestamp()
+        except Exception:
+            return False
+    return False
+
+
+def _page_response(request: Request, page: str, body: bytes, etag: str, last_modified: float, cache_control: str) -> Response:
+    from email.utils import formatdate
+
+    headers = {"ETag": etag, "Last-Modified": formatdate(last_modified, usegmt=True), "Cache-Control": cache_control}
+    if _not_modified(request, etag, last_modified):
+        METRICS.inc("page_cache_total", page=page, result="not_modified")
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(body, headers=headers)
+
+
+def _form_defaults() -> Dict:
+    return {
+        "presets": list(PRESETS.keys()),
+        "defaults": {
+            "source": "yahoo",
+            "preset": "S&P 100",
+            "count": "20",
+            "fast": 50,
+            "slow": 200,
+            "top": 10,
+            "decision_only": False,
+            "data_dir": "data",
+            "symbols": "",
+            "apikey": "",
+            "ttl_hours": 24,
+            "throttle_ms": 400,
+            "strategy_preset": "custom",
+            "strategy": "sma_crossover",
+        },
+        "strategies": list_strategies(),
+    }
+
+
+def _static_page(request: Request, name: str, context: Optional[Callable[[], Dict]] = None) -> Response:
+    """Serve a template whose output only changes when the template file does.
+
+    context is a callable so it is only built when the page is (re)rendered.
+    """
+    try:
+        mtime = os.path.getmtime(os.path.join(_templates_dir(), name))
+    except OSError:
+        mtime = 0.0
+    with _CACHE_LOCK:
+        hit = _PAGES.get(name)
+    if hit is None or hit[0] != mtime:
+        METRICS.inc("page_cache_total", page=name, result="miss")
+        body = _templates().get_template(name).render(context() if context else {}).encode("utf-8")
+        hit = (mtime, body, _etag(body))
+        with _CACHE_LOCK:
+            _PAGES[name] = hit
+    else:
+        METRICS.inc("page_cache_total", page=name, result="hit")
+    # no-cache: browsers keep the page but revalidate, which is a bodiless 304
+    return _page_response(request, name, hit[1], hit[2], mtime or time.time(), "no-cache")
+
+
+def _result_key(lang: str, **form) -> str:
+    """Stable hash of the analyze form after normalizing case, whitespace and symbol lists."""
+    norm: Dict[str, object] = {"lang": lang}
+    for k, v in form.items():
+        if isinstance(v, str):
+            v = v.strip()
+        norm[k] = v
+    norm["source"] = str(norm.get("source", "")).lower()
+    norm["strategy"] = str(norm.get("strategy", "")).lower()
+    norm["count"] = str(norm.get("count", "")).lower()
+    norm["conv"] = str(norm.get("conv", "")).upper()
+    norm["symbols"] = ",".join(parse_symbols(str(norm.get("symbols", ""))))
+    norm["decision_only"] = norm.get("decision_only") is not None
+    raw = json.dumps(norm, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _cached_result(request: Request, key: Optional[str]) -> Optional[Response]:
+    if key is None or RESULT_CACHE_SECONDS <= 0:
+        return None
+    now = time.time()
+    with _CACHE_LOCK:
+        hit = _RESULTS.get(key)
+        if hit is not None and hit[0] <= now:
+            del _RESULTS[key]
+            hit = None
+        if hit is not None:
+            _RESULTS.move_to_end(key)
+    if hit is None:
+        METRICS.inc("page_cache_total", page="analyze", result="miss")
+        return None
+    METRICS.inc("page_cache_total", page="analyze", result="hit")
+    return _page_response(request, "analyze", hit[1], hit[2], hit[3], "private, no-cache")
+
+
+def _store_result(request: Request, key: Optional[str], body: bytes) -> Response:
+    now = time.time()
+    etag = _etag(body)
+    if key is not None and RESULT_CACHE_SECONDS > 0:
+        with _CACHE_LOCK:
+            _RESULTS[key] = (now + RESULT_CACHE_SECONDS, body, etag, now)
+            _RESULTS.move_to_end(key)
+            while len(_RESULTS) > RESULT_CACHE_SIZE:
+                _RESULTS.popitem(last=False)
+    return _page_response(request, "analyze", body, etag, now, "private, no-cache")
 
 
 @app.get("/", response_class=HTMLResponse)
 def index(request: Request):
-    return templates.TemplateResponse(
-        "index.html",
-        {
-            "request": request,
-            "presets": list(PRESETS.keys()),
-            "defaults": {
-                "source": "yahoo",
-                "preset": "S&P 100",
-                "count": "20",
-                "fast": 50,
-                "slow": 200,
-                "top": 10,
-                "decision_only": False,
-                "data_dir": "data",
-                "symbols": "",
-                "apikey": "",
-                "ttl_hours": 24,
-                "throttle_ms": 400,
-                "strategy_preset": "custom",
-            },
-        },
-    )
+    return _static_page(request, "index.html", _form_defaults)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text format: stage timings, cache hit/miss/stale, throttle waits, upstream errors."""
+    return PlainTextResponse(METRICS.render_prometheus(), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/help", response_class=HTMLResponse)
 def help_page(request: Request):
-    return templates.TemplateResponse(
-        "help.html",
-        {
-            "request": request,
-        },
-    )
+    return _static_page(request, "help.html")
 
 
 @app.get("/help-it", response_class=HTMLResponse)
 def help_page_it(request: Request):
-    return templates.TemplateResponse(
-        "help_it.html",
-        {
-            "request": request,
-        },
-    )
+    return _static_page(request, "help_it.html")
 
 
-# -------- Italian UI --------
+# Raw profiler dumps (?debug=profile&save=1) live outside the data cache so they
+# never count against its size budget; only the newest PROFILE_KEEP are kept
+PROFILE_DIR = os.getenv("STOCK_PROFILE_DIR", "profiles")
+PROFILE_KEEP = 20
 
-@app.get("/it", response_class=HTMLResponse)
-def index_it(request: Request):
-    return templates.TemplateResponse(
-        "index_it.html",
+
+def _prune_profiles(out_dir: str, keep: int = PROFILE_KEEP) -> None:
+    try:
+        names = sorted(n for n in os.listdir(out_dir) if n.startswith("analyze-"))
+    except OSError:
+        return
+    # Names embed the millisecond timestamp, so they sort oldest first
+    for name in names[: max(0, len(names) - keep)]:
+        try:
+            os.remove(os.path.join(out_dir, name))
+        except OSError:
+            pass
+
+
+def _run_analysis(request: Request, fn):
+    """Run the scan; with ?debug=profile run it under a profiler and return its report.
+
+    ?profiler=sample switches from cProfile to the sampling profiler. With
+    &save=1 the raw output (pstats or folded stacks for flamegraphs) is also
+    written to PROFILE_DIR.
+    """
+    if request.query_params.get("debug") != "profile":
+        return fn(), None
+    from ..profiling import MODES, run_profiled
+
+    mode = request.query_params.get("profiler", "cprofile")
+    if mode not in MODES:
+        mode = "cprofile"
+    out_path = None
+    if request.query_params.get("save") == "1":
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        ext = "folded" if mode == "sample" else "pstats"
+        out_path = os.path.join(PROFILE_DIR, f"analyze-{int(time.time() * 1000)}.{ext}")
+    result, report = run_profiled(fn, mode=mode, out_path=out_path)
+    if out_path:
+        _prune_profiles(PROFILE_DIR, PROFILE_KEEP)
+    note = "Only the request thread is profiled; FX lookups on the service's worker pool are not included."
+    return result, f"{report}\n{note}"
+
+
+# -------- Analysis views --------
+# The pipeline lives in AnalysisService; each language only picks a template and hint text.
+
+HINTS = {
+    "en": {
+        "alphavantage": "Alpha Vantage may be rate-limited or key invalid. Try a single symbol or wait 60s.",
+        "yahoo": "Yahoo may be rate-limited or blocked by network. Try a single symbol like MSFT or wait 30s.",
+    },
+    "it": {
+        "alphavantage": "Alpha Vantage potrebbe essere limitato o la chiave non valida. Prova un singolo simbolo o attendi 60s.",
+        "yahoo": "Yahoo potrebbe essere limitato o bloccato dalla rete. Prova un simbolo come MSFT o attendi 30s.",
+    },
+}
+
+_SERVICE = None
+_SERVICE_LOCK = threading.Lock()
+
+
+def get_service():
+    """The process-wide AnalysisService, created on first use."""
+    global _SERVICE
+    with _SERVICE_LOCK:
+        if _SERVICE is None:
+            from .service import AnalysisService
+
+            _SERVICE = AnalysisService()
+        return _SERVICE
+
+
+def _analysis_view(request: Request, lang: str, template: str, form: Dict) -> Response:
+    # Same normalized form within RESULT_CACHE_SECONDS: reuse the rendered page
+    cache_key = None
+    if request.query_params.get("debug") != "profile":
+        cache_key = _result_key(lang, **form)
+        cached = _cached_result(request, cache_key)
+        if cached is not None:
+            return cached
+
+    result = get_service().analyze(
+        source=form["source"],
+        preset=form["preset"],
+        count=form["count"],
+        strategy=form["strategy"],
+        fast=form["fast"],
+        slow=form["slow"],
+        decision_only=form["decision_only"] is not None,
+        data_dir=form["data_dir"],
+        apikey=form["apikey"],
+        symbols=form["symbols"],
+        ttl_hours=form["ttl_hours"],
+        throttle_ms=form["throttle_ms"],
+        conv=form["conv"],
+        runner=lambda fn: _run_analysis(request, fn),
+    )
+    ranked = result["ranked"]
+    page = _templates().TemplateResponse(
+        template,
         {
             "request": request,
             "presets": list(PRESETS.keys()),
             "defaults": {
-                "source": "yahoo",
-                "preset": "S&P 100",
-                "count": "20",
-                "fast": 50,
-                "slow": 200,
-                "top": 10,
-                "decision_only": False,
-                "data_dir": "data",
-                "symbols": "",
-                "apikey": "",
-                "ttl_hours": 24,
-                "throttle_ms": 400,
-                "strategy_preset": "custom",
+                "source": form["source"],
+                "preset": form["preset"],
+                "count": form["count"],
+                "strategy_preset": form["strategy_preset"],
+                "strategy": result["strategy"],
+                "fast": form["fast"],
+                "slow": form["slow"],
+                "top": form["top"],
+                "decision_only": form["decision_only"] is not None,
+                "data_dir": form["data_dir"],
+                "symbols": ",".join(result["symbols"]),
+                "apikey": form["apikey"],
+                "ttl_hours": form["ttl_hours"],
+                "throttle_ms": form["throttle_ms"],
+                "conv": result["conv"],
             },
+            "strategies": list_strategies(),
+            "ranked": ranked[: max(1, form["top"])],
+            "hint": HINTS[lang].get(result["hint"]) if result["hint"] else None,
+            "profile_report": result["profile_report"],
         },
     )
+    # Empty results are usually a rate limit or bad key; let the next submit retry
+    return _store_result(request, cache_key if ranked else None, page.body)
 
 
-@app.post("/analyze-it", response_class=HTMLResponse)
-def analyze_it(
+@app.post("/analyze", response_class=HTMLResponse)
+def analyze(
     request: Request,
     source: str = Form("yahoo"),
     preset: str = Form("S&P 100"),
     count: str = Form("20"),
     strategy_preset: str = Form("custom"),
+    strategy: str = Form("sma_crossover"),
     fast: int = Form(50),
     slow: int = Form(200),
     top: int = Form(10),
@@ -120,101 +369,26 @@ def analyze_it(
     throttle_ms: int = Form(400),
     conv: str = Form("")
 ):
-    # Prepare symbols according to user inputs
-    symbols_list: List[str] = []
-    if symbols.strip():
-        symbols_list = parse_symbols(symbols)
-    else:
-        if source == "yahoo":
-            base = get_preset(preset)
-            max_syms = 1000 if count.lower() == "all" else max(1, int(count))
-            symbols_list = base[: max_syms]
-        elif source == "alphavantage":
-            max_syms = 10 if count.lower() == "all" else max(1, int(count))
-            symbols_list = get_universe("alphavantage", api_key=apikey.strip(), max_symbols=max_syms)
-        else:  # csv
-            symbols_list = discover_symbols(data_dir)
-
-    # Build loader with cache/throttle
-    loader = get_loader(source, data_dir=data_dir, api_key=apikey.strip())
-    loader = make_cached_loader(loader, source=source, cache_dir=".cache", ttl_hours=ttl_hours, throttle_ms=throttle_ms)
-
-    ranked = analyze_and_rank_with_loader(symbols_list, loader, fast=fast, slow=slow, include_chart=True)
-    if decision_only is not None:
-        ranked = [r for r in ranked if (r.get("meta", {}).get("decision") == "BUY")]
-
-    # Currency conversion (optional)
-    conv = (conv or "").upper()
-    if conv in ("USD", "EUR"):
-        try:
-            from ..data.yahoo import load_fx_rate_yahoo
-            for item in ranked:
-                meta = item.get("meta", {})
-                price = meta.get("last_close")
-                cur = (meta.get("currency") or "").upper()
-                if isinstance(price, (int, float)) and cur and cur != conv:
-                    rate = load_fx_rate_yahoo(cur, conv)
-                    if isinstance(rate, float):
-                        meta["display_price"] = float(price) * rate
-                        meta["currency_display"] = conv
-                    else:
-                        meta["display_price"] = price
-                        meta["currency_display"] = cur or "N/A"
-                else:
-                    meta["display_price"] = price
-                    meta["currency_display"] = cur or "N/A"
-        except Exception:
-            for item in ranked:
-                meta = item.get("meta", {})
-                meta["display_price"] = meta.get("last_close")
-                meta["currency_display"] = meta.get("currency") or "N/A"
-    else:
-        for item in ranked:
-            meta = item.get("meta", {})
-            meta["display_price"] = meta.get("last_close")
-            meta["currency_display"] = meta.get("currency") or "N/A"
-
-    hint = None
-    if not ranked and symbols_list:
-        if source == "alphavantage":
-            hint = "Alpha Vantage potrebbe essere limitato o la chiave non valida. Prova un singolo simbolo o attendi 60s."
-        elif source == "yahoo":
-            hint = "Yahoo potrebbe essere limitato o bloccato dalla rete. Prova un simbolo come MSFT o attendi 30s."
-
-    return templates.TemplateResponse(
-        "index_it.html",
-        {
-            "request": request,
-            "presets": list(PRESETS.keys()),
-            "defaults": {
-                "source": source,
-                "preset": preset,
-                "count": count,
-                "strategy_preset": strategy_preset,
-                "fast": fast,
-                "slow": slow,
-                "top": top,
-                "decision_only": decision_only is not None,
-                "data_dir": data_dir,
-                "symbols": ",".join(symbols_list),
-                "apikey": apikey,
-                "ttl_hours": ttl_hours,
-                "throttle_ms": throttle_ms,
-                "conv": conv,
-            },
-            "ranked": ranked[: max(1, top)],
-            "hint": hint,
-        },
-    )
+    form = dict(locals())
+    del form["request"]
+    return _analysis_view(request, "en", "index.html", form)
 
 
-@app.post("/analyze", response_class=HTMLResponse)
-def analyze(
+# -------- Italian UI --------
+
+@app.get("/it", response_class=HTMLResponse)
+def index_it(request: Request):
+    return _static_page(request, "index_it.html", _form_defaults)
+
+
+@app.post("/analyze-it", response_class=HTMLResponse)
+def analyze_it(
     request: Request,
     source: str = Form("yahoo"),
     preset: str = Form("S&P 100"),
     count: str = Form("20"),
     strategy_preset: str = Form("custom"),
+    strategy: str = Form("sma_crossover"),
     fast: int = Form(50),
     slow: int = Form(200),
     top: int = Form(10),
@@ -226,91 +400,9 @@ def analyze(
     throttle_ms: int = Form(400),
     conv: str = Form("")
 ):
-    # Prepare symbols according to user inputs
-    symbols_list: List[str] = []
-    if symbols.strip():
-        symbols_list = parse_symbols(symbols)
-    else:
-        if source == "yahoo":
-            base = get_preset(preset)
-            max_syms = 1000 if count.lower() == "all" else max(1, int(count))
-            symbols_list = base[: max_syms]
-        elif source == "alphavantage":
-            max_syms = 10 if count.lower() == "all" else max(1, int(count))
-            symbols_list = get_universe("alphavantage", api_key=apikey.strip(), max_symbols=max_syms)
-        else:  # csv
-            symbols_list = discover_symbols(data_dir)
-
-    # Build loader with cache/throttle
-    loader = get_loader(source, data_dir=data_dir, api_key=apikey.strip())
-    loader = make_cached_loader(loader, source=source, cache_dir=".cache", ttl_hours=ttl_hours, throttle_ms=throttle_ms)
-
-    ranked = analyze_and_rank_with_loader(symbols_list, loader, fast=fast, slow=slow, include_chart=True)
-    if decision_only is not None:
-        ranked = [r for r in ranked if (r.get("meta", {}).get("decision") == "BUY")]
-
-    conv = (conv or "").upper()
-    if conv in ("USD", "EUR"):
-        try:
-            from ..data.yahoo import load_fx_rate_yahoo
-            for item in ranked:
-                meta = item.get("meta", {})
-                price = meta.get("last_close")
-                cur = (meta.get("currency") or "").upper()
-                if isinstance(price, (int, float)) and cur and cur != conv:
-                    rate = load_fx_rate_yahoo(cur, conv)
-                    if isinstance(rate, float):
-                        meta["display_price"] = float(price) * rate
-                        meta["currency_display"] = conv
-                    else:
-                        meta["display_price"] = price
-                        meta["currency_display"] = cur or "N/A"
-                else:
-                    meta["display_price"] = price
-                    meta["currency_display"] = cur or "N/A"
-        except Exception:
-            for item in ranked:
-                meta = item.get("meta", {})
-                meta["display_price"] = meta.get("last_close")
-                meta["currency_display"] = meta.get("currency") or "N/A"
-    else:
-        for item in ranked:
-            meta = item.get("meta", {})
-            meta["display_price"] = meta.get("last_close")
-            meta["currency_display"] = meta.get("currency") or "N/A"
-
-    hint = None
-    if not ranked and symbols_list:
-        if source == "alphavantage":
-            hint = "Alpha Vantage may be rate-limited or key invalid. Try a single symbol or wait 60s."
-        elif source == "yahoo":
-            hint = "Yahoo may be rate-limited or blocked by network. Try a single symbol like MSFT or wait 30s."
-
-    return templates.TemplateResponse(
-        "index.html",
-        {
-            "request": request,
-            "presets": list(PRESETS.keys()),
-            "defaults": {
-                "source": source,
-                "preset": preset,
-                "count": count,
-                "strategy_preset": strategy_preset,
-                "fast": fast,
-                "slow": slow,
-                "top": top,
-                "decision_only": decision_only is not None,
-                "data_dir": data_dir,
-                "symbols": ",".join(symbols_list),
-                "apikey": apikey,
-                "ttl_hours": ttl_hours,
-                "throttle_ms": throttle_ms,
-                "conv": conv,
-            },
-            "ranked": ranked[: max(1, top)],
-            "hint": hint,
-        },
-    )
+    form = dict(locals())
+    del form["request"]
+    return _analysis_view(request, "it", "index_it.html", form)
 
 
 def main():
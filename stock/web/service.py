@@ -0,0 +1,218 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..data.cache import cache_path, make_cached_loader
+from ..data.provider import get_loader, get_universe
+from ..data.timeseries import TimeSeries
+from ..metrics import METRICS
+from ..recommend import analyze_and_rank_with_loader
+from ..strategy.registry import STRATEGIES
+from ..universe import get_preset
+from ..utils import discover_symbols, parse_symbols
+
+MEMORY_ENTRIES = int(os.getenv("STOCK_MEMORY_CACHE_ENTRIES", "512"))
+MAX_LOADERS = 32
+FX_TTL_SECONDS = 3600
+
+
+class AnalysisService:
+    """Long-lived analysis pipeline shared by the web views.
+
+    Owns the state that should survive between requests:
+    - cache tiers: decoded series in an in-memory LRU in front of the on-disk
+      cache (make_cached_loader), valid while the cache file is unchanged and
+      within the request's TTL;
+    - the throttle per source, which make_cached_loader keeps in
+      stock.data.shared, so it holds across concurrent requests and across
+      worker processes sharing cache_dir;
+    - cached loaders per (source, data dir, key, ttl, throttle), which keep
+      their negative cache and size-budget bookkeeping warm;
+    - a small worker pool and TTL cache for FX rates.
+
+    analyze() returns plain data; the language-specific views only render it.
+    """
+
+    def __init__(self, cache_dir: str = ".cache", memory_entries: int = MEMORY_ENTRIES, fx_workers: int = 4) -> None:
+        self.cache_dir = cache_dir
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[Tuple[str, str], Tuple[float, TimeSeries]]" = OrderedDict()
+        self._loaders: "OrderedDict[Tuple, Callable]" = OrderedDict()
+        self._fx: Dict[Tuple[str, str], Tuple[float, Optional[float]]] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, fx_workers), thread_name_prefix="stock-fx")
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False)
+
+    # -- symbols --
+
+    def select_symbols(self, source: str, symbols: str, preset: str, count: str, data_dir: str, api_key: str) -> List[str]:
+        if symbols.strip():
+            return parse_symbols(symbols)
+        if source == "yahoo":
+            max_syms = 1000 if count.lower() == "all" else max(1, int(count))
+            return get_preset(preset)[: max_syms]
+        if source == "alphavantage":
+            max_syms = 10 if count.lower() == "all" else max(1, int(count))
+            return get_universe("alphavantage", api_key=api_key, max_symbols=max_syms)
+        return discover_symbols(data_dir)
+
+    # -- loaders and cache tiers --
+
+    def loader(self, source: str, data_dir: str, api_key: str, ttl_hours: int, throttle_ms: int) -> Callable[[str], Optional[TimeSeries]]:
+        src = (source or "csv").lower()
+        # The key is hashed so API keys are not kept around as dict keys
+        key = (src, data_dir, hashlib.sha256(api_key.encode("utf-8")).hexdigest(), ttl_hours, throttle_ms)
+        with self._lock:
+            fn = self._loaders.get(key)
+            if fn is not None:
+                self._loaders.move_to_end(key)
+                return fn
+        inner = get_loader(src, data_dir=data_dir, api_key=api_key)
+        disk = make_cached_loader(inner, source=src, cache_dir=self.cache_dir, ttl_hours=ttl_hours, throttle_ms=max(0, throttle_ms))
+        fn = self._memory_tier(src, disk, ttl_hours)
+        with self._lock:
+            self._loaders[key] = fn
+            while len(self._loaders) > MAX_LOADERS:
+                self._loaders.popitem(last=False)
+        return fn
+
+    def _memory_tier(self, src: str, disk: Callable[[str], Optional[TimeSeries]], ttl_hours: int) -> Callable[[str], Optional[TimeSeries]]:
+        ttl_secs = max(0, ttl_hours) * 3600
+
+        def _load(symbol: str) -> Optional[TimeSeries]:
+            sym = symbol.upper().strip()
+            path = cache_path(self.cache_dir, src, sym)
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                mtime = None
+            if mtime is not None and time.time() - mtime <= ttl_secs:
+                with self._lock:
+                    hit = self._memory.get((src, sym))
+                    if hit is not None and hit[0] == mtime:
+                        self._memory.move_to_end((src, sym))
+                    else:
+                        hit = None
+                if hit is not None:
+                    METRICS.inc("cache_requests_total", source=src, result="memory")
+                    return hit[1]
+            ts = disk(sym)
+            if ts:
+                try:
+                    mtime = os.path.getmtime(path)
+                except OSError:
+                    return ts
+                with self._lock:
+                    self._memory[(src, sym)] = (mtime, ts)
+                    self._memory.move_to_end((src, sym))
+                    while len(self._memory) > self.memory_entries:
+                        self._memory.popitem(last=False)
+            return ts
+
+        return _load
+
+    # -- FX --
+
+    def fx_rate(self, ccy_from: str, ccy_to: str) -> Optional[float]:
+        key = (ccy_from.upper(), ccy_to.upper())
+        now = time.time()
+        with self._lock:
+            hit = self._fx.get(key)
+        if hit is not None and now - hit[0] <= FX_TTL_SECONDS:
+            return hit[1]
+        from ..data.yahoo import load_fx_rate_yahoo
+
+        try:
+            rate = load_fx_rate_yahoo(*key)
+        except Exception:
+            rate = None
+        if isinstance(rate, float):
+            # Failures are not remembered; the next request retries
+            with self._lock:
+                self._fx[key] = (now, rate)
+        return rate
+
+    def convert_prices(self, ranked: List[Dict], conv: str) -> None:
+        """Fill meta display_price/currency_display, converting to conv (USD/EUR) when asked."""
+        rates: Dict[str, Optional[float]] = {}
+        if conv in ("USD", "EUR"):
+            currencies = sorted({
+                (item["meta"].get("currency") or "").upper()
+                for item in ranked
+                if isinstance(item["meta"].get("last_close"), (int, float))
+            } - {"", conv})
+            # Distinct currencies are looked up concurrently, each at most once per FX_TTL_SECONDS
+            for cur, rate in zip(currencies, self._pool.map(lambda c: self.fx_rate(c, conv), currencies)):
+                rates[cur] = rate
+        for item in ranked:
+            meta = item.get("meta", {})
+            price = meta.get("last_close")
+            cur = (meta.get("currency") or "").upper()
+            rate = rates.get(cur)
+            if isinstance(price, (int, float)) and isinstance(rate, float):
+                meta["display_price"] = float(price) * rate
+                meta["currency_display"] = conv
+            else:
+                meta["display_price"] = price
+                meta["currency_display"] = cur or "N/A"
+
+    # -- pipeline --
+
+    def analyze(
+        self,
+        source: str = "yahoo",
+        preset: str = "S&P 100",
+        count: str = "20",
+        strategy: str = "sma_crossover",
+        fast: int = 50,
+        slow: int = 200,
+        decision_only: bool = False,
+        data_dir: str = "data",
+        apikey: str = "",
+        symbols: str = "",
+        ttl_hours: int = 24,
+        throttle_ms: int = 400,
+        conv: str = "",
+        runner: Optional[Callable] = None,
+    ) -> Dict:
+        """Run a scan and return {symbols, ranked, strategy, conv, hint, profile_report}.
+
+        hint is the source name when a network source returned nothing (the
+        views turn it into a localized message). runner(fn) -> (result, report)
+        lets the caller wrap the ranking step, e.g. in a profiler.
+        """
+        api_key = apikey.strip()
+        symbols_list = self.select_symbols(source, symbols, preset, count, data_dir, api_key)
+        loader = self.loader(source, data_dir, api_key, ttl_hours, throttle_ms)
+
+        strategy = (strategy or "sma_crossover").lower()
+        strategies = list(STRATEGIES) if strategy == "all" else [strategy if strategy in STRATEGIES else "sma_crossover"]
+
+        def run():
+            return analyze_and_rank_with_loader(symbols_list, loader, fast=fast, slow=slow, include_chart=True, strategies=strategies)
+
+        if runner is not None:
+            ranked, profile_report = runner(run)
+        else:
+            ranked, profile_report = run(), None
+        if decision_only:
+            ranked = [r for r in ranked if (r.get("meta", {}).get("decision") == "BUY")]
+
+        conv = (conv or "").upper()
+        self.convert_prices(ranked, conv)
+
+        hint = source if not ranked and symbols_list and source in ("alphavantage", "yahoo") else None
+        return {
+            "symbols": symbols_list,
+            "ranked": ranked,
+            "strategy": strategy,
+            "conv": conv,
+            "hint": hint,
+            "profile_report": profile_report,
+        }